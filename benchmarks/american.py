@@ -0,0 +1,59 @@
+"""Throughput and convergence of the American option pricers.
+
+Run from the repository root:  python -m benchmarks.american [n_contracts]
+
+Prints contracts/second against step count for the binomial and trinomial
+lattices and the Longstaff-Schwartz pricer, then checks that all three
+converge to black_scholes for American calls without dividends.
+"""
+import sys
+import time
+
+import numpy as np
+
+from finance_scripts.options.american import lattice_price, longstaff_schwartz
+from finance_scripts.options.pricing import black_scholes
+
+
+def make_contracts(n, seed=0):
+    rng = np.random.default_rng(seed)
+    S = np.full(n, 100.0)
+    K = rng.uniform(80.0, 120.0, n)
+    T = rng.uniform(0.1, 2.0, n)
+    sigma = rng.uniform(0.1, 0.5, n)
+    return S, K, T, 0.03, sigma
+
+
+def throughput(n):
+    S, K, T, r, sigma = make_contracts(n)
+    print(f"{'pricer':<12}{'steps':>7}{'contracts/s':>14}")
+    for method in ('binomial', 'trinomial'):
+        for steps in (50, 100, 200, 500, 1000):
+            start = time.perf_counter()
+            lattice_price(S, K, T, r, sigma, 'put', steps=steps, method=method)
+            print(f"{method:<12}{steps:>7}{n / (time.perf_counter() - start):>14,.0f}")
+    m = max(n // 10, 1)
+    for steps in (10, 25, 50, 100):
+        start = time.perf_counter()
+        longstaff_schwartz(S[:m], K[:m], T[:m], r, sigma[:m], 'put', steps=steps,
+                           paths=20_000, chunk_paths=5_000, seed=0)
+        print(f"{'lsm':<12}{steps:>7}{m / (time.perf_counter() - start):>14,.0f}")
+
+
+def convergence(n=20):
+    S, K, T, r, sigma = make_contracts(n, seed=1)
+    reference = black_scholes(S, K, T, r, sigma, 'call')
+    print(f"\nmax |American call - black_scholes| over {n} contracts, q = 0")
+    for method in ('binomial', 'trinomial'):
+        for steps in (50, 200, 800):
+            error = np.abs(lattice_price(S, K, T, r, sigma, 'call', steps=steps, method=method) - reference)
+            print(f"{method:<12}{steps:>7}  {error.max():.2e}")
+    result = longstaff_schwartz(S, K, T, r, sigma, 'call', steps=50, paths=200_000, seed=0)
+    z = np.abs(result.price - reference) / result.stderr
+    print(f"{'lsm':<12}{50:>7}  {np.abs(result.price - reference).max():.2e}"
+          f"  (max {z.max():.1f} standard errors)")
+
+
+if __name__ == "__main__":
+    throughput(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000)
+    convergence()
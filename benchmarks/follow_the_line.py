@@ -0,0 +1,83 @@
+"""Speed of the follow-the-line backtest, and agreement with TradingView.
+
+Run from the repository root:
+    python -m benchmarks.follow_the_line [n_bars]
+    python -m benchmarks.follow_the_line --compare us500_1h.csv
+
+The first form backtests a random walk of n_bars 1-minute bars (default
+ten years, 5.26M bars) and reports the one-off compile time separately.
+The second runs the strategy with the inputs of the Nov 21 - Jul 24
+TradingView export on a chart export of CAPITALCOM:US500 1h bars (columns
+time, open, high, low, close; time in epoch seconds or ISO format, in the
+same timezone as the chart) and matches the trades against the xlsx list.
+That export was made with bar magnifier and recalculate-after-fill on,
+which need intrabar data, so a few stop exits and re-entries can differ.
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from finance_scripts.backtest.follow_the_line import StrategyParams, backtest
+from finance_scripts.backtest.tradingview import read_export
+
+XLSX = 'follow the line+ macd + hull suite + ATR trailing stop BACKTEST NOV 21-JULY 24.xlsx'
+# Inputs listed on the export's Properties sheet.
+XLSX_PARAMS = StrategyParams(signal_length=9, atr_period=12, line_fast=4, tick_size=0.1)
+XLSX_START = '2021-11-01'
+
+
+def make_bars(n_bars, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 4000.0 + np.cumsum(rng.normal(0.0, 0.5, n_bars))
+    open_ = np.concatenate([close[:1], close[:-1]])
+    high = np.maximum(open_, close) + rng.uniform(0.0, 0.5, n_bars)
+    low = np.minimum(open_, close) - rng.uniform(0.0, 0.5, n_bars)
+    time_ = 1_500_000_000 + 60 * np.arange(n_bars)
+    return {'time': time_, 'open': open_, 'high': high, 'low': low, 'close': close}
+
+
+def speed(n_bars=5_256_000):
+    warm = make_bars(2_000)
+    start = time.perf_counter()
+    backtest(warm)
+    print(f"first call (compile or load cache): {time.perf_counter() - start:.2f} s")
+
+    bars = make_bars(n_bars)
+    start = time.perf_counter()
+    result = backtest(bars)
+    elapsed = time.perf_counter() - start
+    print(f"{n_bars} bars: {elapsed:.2f} s, {n_bars / elapsed / 1e6:.1f} M bars/s, {len(result.trades)} trades")
+
+
+def compare(csv_path):
+    bars = pd.read_csv(csv_path)
+    times = bars['time']
+    bars['time'] = (pd.to_datetime(times, unit='s') if np.issubdtype(times.dtype, np.number)
+                    else pd.to_datetime(times).dt.tz_localize(None))
+    ours = backtest(bars, XLSX_PARAMS, trade_from=XLSX_START).trades
+    theirs = read_export(XLSX).trades
+    theirs['direction'] = theirs['direction'].astype(str)
+    ours = ours[ours['entry_time'] <= theirs['entry_time'].max()]
+
+    merged = theirs.merge(ours, on=['entry_time', 'direction'], how='outer', suffixes=('_tv', ''), indicator=True)
+    both = merged[merged['_merge'] == 'both']
+    print(f"TradingView trades {len(theirs)}, ours {len(ours)}, same entry bar and side {len(both)}")
+    print(f"exit signal agrees: {(both['exit_signal_tv'] == both['exit_signal']).mean():.1%}")
+    print(f"exit bar agrees:    {(both['exit_time_tv'] == both['exit_time']).mean():.1%}")
+    for column in ('entry_price', 'exit_price', 'contracts'):
+        print(f"max |{column} diff|: {(both[column + '_tv'] - both[column]).abs().max():.2f}")
+    closed = both[both['exit_signal_tv'] != 'Open']
+    print(f"net profit of matched trades: TradingView {closed['profit_tv'].sum():.2f}, ours {closed['profit'].sum():.2f}")
+    unmatched = merged[merged['_merge'] != 'both'][['entry_time', 'direction', '_merge']]
+    if len(unmatched):
+        print("unmatched entries (left_only = TradingView only):")
+        print(unmatched.to_string(index=False))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2 and sys.argv[1] == '--compare':
+        compare(sys.argv[2])
+    else:
+        speed(*(int(a) for a in sys.argv[1:]))
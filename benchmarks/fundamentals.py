@@ -0,0 +1,83 @@
+"""Cold and warm runs of the cockpit's statement loading through the fundamentals store.
+
+Run from the repository root:
+    python -m benchmarks.fundamentals [n_tickers] [latency_ms]
+
+Serves synthetic income statements and balance sheets for n_tickers
+tickers (default 500) from a FrameProvider that sleeps latency_ms per call
+(default 200) to stand in for the network, and loads the constituents and
+both statements of every ticker with the cockpit's 10 threads: once into
+an empty store, once more from the store, and once offline.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from finance_scripts.data.fundamentals import FrameProvider, FundamentalsStore
+
+INCOME_ITEMS = ['Total Revenue', 'Gross Profit', 'Operating Income', 'Net Income']
+BALANCE_ITEMS = ['Current Assets', 'Current Liabilities', 'Total Assets']
+
+
+class SlowProvider(FrameProvider):
+    def __init__(self, statements, constituents, latency):
+        super().__init__(statements, constituents)
+        self.latency = latency
+
+    def constituents(self):
+        time.sleep(self.latency)
+        return super().constituents()
+
+    def statement(self, ticker, name):
+        time.sleep(self.latency)
+        return super().statement(ticker, name)
+
+
+def make_statements(n_tickers, seed=0):
+    rng = np.random.default_rng(seed)
+    periods = pd.DatetimeIndex(['2023-09-30', '2022-09-30', '2021-09-30', '2020-09-30'])
+    statements = {}
+    tickers = [f'T{i:03d}' for i in range(n_tickers)]
+    for ticker in tickers:
+        statements[ticker, 'financials'] = pd.DataFrame(rng.uniform(1e8, 1e10, (len(INCOME_ITEMS), 4)),
+                                                        index=INCOME_ITEMS, columns=periods)
+        statements[ticker, 'balance_sheet'] = pd.DataFrame(rng.uniform(1e8, 1e10, (len(BALANCE_ITEMS), 4)),
+                                                           index=BALANCE_ITEMS, columns=periods)
+    return statements, tickers
+
+
+def load_all(store):
+    def load(ticker):
+        return store.statement(ticker, 'financials'), store.statement(ticker, 'balance_sheet')
+
+    with ThreadPoolExecutor(max_workers=10) as executor:
+        return list(executor.map(load, store.constituents()))
+
+
+def main(n_tickers=500, latency_ms=200):
+    statements, tickers = make_statements(n_tickers)
+    provider = SlowProvider(statements, tickers, latency_ms / 1000)
+    directory = tempfile.mkdtemp()
+    try:
+        path = os.path.join(directory, 'fundamentals.sqlite')
+        for label, offline in (("cold", False), ("warm", False), ("offline", True)):
+            store = FundamentalsStore(path, provider, offline=offline)
+            before = len(provider.calls)
+            start = time.perf_counter()
+            loaded = load_all(store)
+            elapsed = time.perf_counter() - start
+            store.close()
+            print(f"{label:<8}{elapsed:>8.2f} s {len(provider.calls) - before:>5} provider calls, "
+                  f"{len(loaded)} tickers")
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:]))
@@ -0,0 +1,59 @@
+"""Batched implied-vol solver against a per-contract scipy.optimize loop.
+
+Run from the repository root:  python -m benchmarks.implied_vol [n_quotes]
+"""
+import sys
+import time
+
+import numpy as np
+from scipy.optimize import brentq
+
+from finance_scripts.options.implied_vol import implied_volatility
+from finance_scripts.options.pricing import black_scholes
+
+
+def make_chain(n, seed=0):
+    rng = np.random.default_rng(seed)
+    S = np.full(n, 100.0)
+    K = rng.uniform(60.0, 140.0, n)
+    T = rng.uniform(0.02, 2.0, n)
+    r = np.full(n, 0.03)
+    sigma = rng.uniform(0.05, 1.0, n)
+    kind = np.where(rng.random(n) < 0.5, 'call', 'put')
+    price = black_scholes(S, K, T, r, sigma, kind)
+    return price, S, K, T, r, kind, sigma
+
+
+def scipy_loop(price, S, K, T, r, kind):
+    out = np.full(price.shape, np.nan)
+    for i in range(price.size):
+        f = lambda s: black_scholes(S[i], K[i], T[i], r[i], s, kind[i]) - price[i]
+        try:
+            out[i] = brentq(f, 1e-6, 5.0, xtol=1e-10)
+        except ValueError:
+            pass
+    return out
+
+
+def main(n=100_000, loop_n=2_000):
+    price, S, K, T, r, kind, sigma = make_chain(n)
+
+    start = time.perf_counter()
+    result = implied_volatility(price, S, K, T, r, kind)
+    batched = time.perf_counter() - start
+    ok = result.converged & ~result.arbitrage
+    err = np.abs(result.sigma[ok] - sigma[ok])
+    print(f"batched : {n:>7} quotes in {batched * 1e3:8.1f} ms  "
+          f"converged {ok.mean():.2%}  max |d sigma| {err.max():.2e}  "
+          f"max iterations {result.iterations.max()}")
+
+    start = time.perf_counter()
+    scipy_loop(price[:loop_n], S[:loop_n], K[:loop_n], T[:loop_n], r[:loop_n], kind[:loop_n])
+    looped = time.perf_counter() - start
+    print(f"brentq  : {loop_n:>7} quotes in {looped * 1e3:8.1f} ms  "
+          f"(~{looped / loop_n * n:.1f} s extrapolated to {n})")
+    print(f"speed-up: ~{looped / loop_n * n / batched:.0f}x")
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:]))
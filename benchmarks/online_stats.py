@@ -0,0 +1,42 @@
+"""Rolling covariance by online updates against recomputing each window.
+
+Run from the repository root:
+    python -m benchmarks.online_stats [n_assets] [window]
+
+Walks 3500 synthetic days of n_assets returns (default 18) with a window
+of 252 days, once recomputing the mean and covariance of every window
+with numpy and once through RollingCovariance, and reports the time per
+date and the largest difference between the two.
+"""
+import sys
+import time
+
+import numpy as np
+
+from benchmarks.portfolio_simulation import make_returns
+from finance_scripts.portfolio.online import RollingCovariance, walk_forward
+
+
+def main(n_assets=18, window=252):
+    daily_returns = make_returns(n_assets)
+    values = daily_returns.to_numpy()
+    n_dates = len(values) - window + 1
+
+    start = time.perf_counter()
+    recomputed = [np.cov(values[i:i + window], rowvar=False) for i in range(n_dates)]
+    batch = time.perf_counter() - start
+
+    start = time.perf_counter()
+    online = [cov for _, _, cov in walk_forward(daily_returns, RollingCovariance(n_assets, window))]
+    streaming = time.perf_counter() - start
+
+    error = max(np.abs(a - b).max() for a, b in zip(recomputed, online))
+    scale = max(np.abs(a).max() for a in recomputed)
+    print(f"{n_dates} dates x {n_assets} assets, window {window}")
+    print(f"recompute each window: {batch / n_dates * 1e6:>8.1f} us/date")
+    print(f"online updates:        {streaming / n_dates * 1e6:>8.1f} us/date ({batch / streaming:.1f}x)")
+    print(f"max abs difference {error:.2e} (relative {error / scale:.1e})")
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:]))
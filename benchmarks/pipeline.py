@@ -0,0 +1,84 @@
+"""The cockpit's statement loading against a throttled, flaky provider.
+
+Run from the repository root:
+    python -m benchmarks.pipeline [n_tickers] [latency_ms] [capacity] [error_pct]
+
+Serves synthetic statements for n_tickers tickers (default 300) through a
+ThrottledProvider: latency_ms per call (default 50), rate-limited above
+capacity calls in flight (default 8), and error_pct percent of calls failing
+(default 5). Every run starts from an empty store. It loads the metrics with
+the old fixed pool of 10 threads, where every error loses its ticker, then
+with the FetchPipeline, and finally cancels a pipeline run halfway.
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from benchmarks.fundamentals import make_statements
+from finance_scripts.data.fundamentals import FrameProvider, FundamentalsStore, ThrottledProvider
+from finance_scripts.data.pipeline import DONE, FAILURE, FetchPipeline
+from finance_scripts.screener import load_metrics, ticker_metrics
+
+
+def outcomes(provider):
+    return {kind: sum(call[2] == kind for call in provider.calls) for kind in ('ok', 'throttled', 'failed')}
+
+
+def main(n_tickers=300, latency_ms=50, capacity=8, error_pct=5):
+    statements, tickers = make_statements(n_tickers)
+    directory = tempfile.mkdtemp()
+
+    def run(label, load):
+        provider = ThrottledProvider(FrameProvider(statements, tickers), latency_ms / 1000, capacity,
+                                     error_pct / 100, seed=0)
+        store = FundamentalsStore(os.path.join(directory, f'{label}.sqlite'), provider)
+        start = time.perf_counter()
+        loaded, extra = load(store)
+        elapsed = time.perf_counter() - start
+        store.close()
+        calls = outcomes(provider)
+        print(f"{label:<10}{elapsed:>7.2f} s {loaded:>5}/{n_tickers} tickers  {calls['ok']:>5} ok "
+              f"{calls['throttled']:>5} throttled {calls['failed']:>4} failed calls  {extra}")
+
+    def fixed(store):
+        errors = {}
+        metrics = load_metrics(store, tickers, errors=errors)
+        return len(metrics), f"{len(errors)} tickers lost"
+
+    def fetcher(store):
+        return lambda ticker: ticker_metrics(store.statement(ticker, 'financials'),
+                                             store.statement(ticker, 'balance_sheet'))
+
+    def pipelined(store):
+        pipeline = FetchPipeline(fetcher(store), backoff=0.1).start(tickers)
+        start, first, limits = time.perf_counter(), None, []
+        for event in pipeline:
+            first = time.perf_counter() - start if first is None else first
+            limits.append(pipeline.limit)
+        return pipeline.done, (f"{pipeline.n_failed} failed, first row after {first * 1e3:.0f} ms, "
+                               f"concurrency {min(limits):.1f}-{max(limits):.1f}")
+
+    def cancelled(store):
+        pipeline = FetchPipeline(fetcher(store), backoff=0.1).start(tickers)
+        for event in pipeline:
+            if event.kind != FAILURE and pipeline.done >= n_tickers // 2:
+                break
+        start = time.perf_counter()
+        pipeline.cancel()
+        while pipeline.events.get().kind != DONE:
+            pass
+        return pipeline.done, (f"cancelled in {(time.perf_counter() - start) * 1e3:.0f} ms, "
+                               f"{len(pipeline.unfinished)} left for later")
+
+    try:
+        run("fixed 10", fixed)
+        run("pipeline", pipelined)
+        run("cancel", cancelled)
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:]))
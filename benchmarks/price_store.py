@@ -0,0 +1,57 @@
+"""Cold, warm and incremental runs of fetch_data against a local price store.
+
+Run from the repository root:
+    python -m benchmarks.price_store [n_tickers]
+
+Serves synthetic daily closes for n_tickers tickers (default 18, the
+notebook's universe) from a FrameSource, so no network is needed, into a
+store in a temporary directory. Reports time, source calls and rows
+requested for the first run, a re-run over the same range, a run with the
+end date moved forward a month, and an offline run.
+"""
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from finance_scripts.data.prices import FrameSource, PriceStore, fetch_data
+
+START, END, LATER = '2010-01-01', '2024-02-05', '2024-03-05'
+
+
+def make_prices(n_tickers, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(START, LATER, name='Date')
+    walks = 100.0 * np.exp(np.cumsum(rng.normal(0.0, 0.01, (len(dates), n_tickers)), axis=0))
+    return pd.DataFrame(walks, index=dates, columns=[f'TICKER{i}' for i in range(n_tickers)])
+
+
+def requested_rows(source, calls):
+    dates = source.prices.index.values.astype('datetime64[D]')
+    return sum(len(tickers) * int(((dates >= start) & (dates < end)).sum()) for tickers, start, end in calls)
+
+
+def main(n_tickers=18):
+    source = FrameSource(make_prices(n_tickers))
+    tickers = list(source.prices.columns)
+    root = tempfile.mkdtemp()
+    try:
+        for label, end, offline in (("cold", END, False), ("re-run", END, False),
+                                    ("one month later", LATER, False), ("offline", LATER, True)):
+            store = PriceStore(root, source, offline=offline)
+            before = len(source.calls)
+            start = time.perf_counter()
+            data = fetch_data(tickers, START, end, store=store)
+            elapsed = time.perf_counter() - start
+            calls = source.calls[before:]
+            print(f"{label:<16}{elapsed * 1e3:>8.1f} ms {len(calls):>3} source calls "
+                  f"{requested_rows(source, calls):>8} rows requested, {len(data)} dates returned")
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:]))
@@ -0,0 +1,64 @@
+"""Render time and size of the portfolio PDF report.
+
+Run from the repository root:
+    python -m benchmarks.report [processes]
+
+Writes the report for 5k, 100k and 1M sampled portfolios of 18 synthetic
+assets (with the exact frontier) into a temporary directory and prints the
+time and bytes of every page plus the merged file size. For comparison,
+the original vector scatter page is saved on its own for the two smaller
+counts.
+"""
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from benchmarks.portfolio_simulation import make_returns
+from finance_scripts.portfolio.frontier import efficient_frontier
+from finance_scripts.portfolio.report import plot_results
+from finance_scripts.portfolio.simulation import simulate_portfolios
+
+
+def vector_scatter(df):
+    """Size and time of the notebook's original, all-vector scatter page."""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    start = time.perf_counter()
+    fig = plt.figure(figsize=(12, 8))
+    sns.scatterplot(x='Volatility', y='Returns', hue='Sharpe Ratio', data=df, palette='viridis', edgecolor=None,
+                    alpha=0.7)
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='pdf')
+    plt.close(fig)
+    return time.perf_counter() - start, len(buffer.getvalue())
+
+
+def main(processes=None):
+    daily_returns = make_returns(18)
+    frontier = efficient_frontier(daily_returns.mean(), daily_returns.cov(), risk_free=0.02)
+    directory = tempfile.mkdtemp()
+    try:
+        for n_portfolios in (5_000, 100_000, 1_000_000):
+            df = simulate_portfolios(daily_returns, n_portfolios, seed=0, risk_free=0.02)
+            start = time.perf_counter()
+            report = plot_results(df, daily_returns.columns, frontier,
+                                  path=os.path.join(directory, f'report_{n_portfolios}.pdf'), processes=processes)
+            elapsed = time.perf_counter() - start
+            print(f"{n_portfolios} portfolios: {elapsed:.2f} s, {report.size / 1024:.0f} KB")
+            print(report.pages.to_string(index=False))
+            if n_portfolios <= 100_000:
+                seconds, size = vector_scatter(df)
+                print(f"original vector scatter page: {seconds:.2f} s, {size / 1024:.0f} KB")
+            print()
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:]))
@@ -0,0 +1,57 @@
+"""Re-screening cost of the columnar screener.
+
+Run from the repository root:
+    python -m benchmarks.screener [n_tickers]
+
+Builds the metrics table of n_tickers synthetic tickers (default 500) once,
+then times screening it with every one of the 31 combinations of the
+cockpit's checkboxes, and a composite ranking. For comparison, it also times
+the cockpit's old way of collecting results with
+``criteria_df.loc[len(criteria_df)] = row``.
+"""
+from itertools import combinations
+import sys
+import time
+
+import pandas as pd
+
+from benchmarks.fundamentals import make_statements
+from finance_scripts.screener import CRITERIA, load_metrics, rank, screen
+
+
+class Statements:
+    def __init__(self, statements):
+        self.statements = statements
+
+    def statement(self, ticker, name):
+        return self.statements[ticker, name]
+
+
+def main(n_tickers=500):
+    statements, tickers = make_statements(n_tickers)
+    start = time.perf_counter()
+    metrics = load_metrics(Statements(statements), tickers)
+    print(f"metrics of {len(metrics)} tickers built once in {time.perf_counter() - start:.2f} s")
+
+    selections = [list(c) for k in range(1, len(CRITERIA) + 1) for c in combinations(CRITERIA, k)]
+    start = time.perf_counter()
+    for names in selections:
+        screen(metrics, [CRITERIA[name] for name in names], sort_by=names[0])
+    elapsed = time.perf_counter() - start
+    print(f"{len(selections)} re-screens: {elapsed / len(selections) * 1e3:.2f} ms each")
+
+    start = time.perf_counter()
+    rank(metrics, ['Revenue Growth', 'Gross Margin', 'Net Margin', 'Current Ratio'])
+    print(f"composite rank: {(time.perf_counter() - start) * 1e3:.2f} ms")
+
+    rows = metrics.reset_index().iloc[:, :6].values.tolist()
+    start = time.perf_counter()
+    criteria_df = pd.DataFrame(columns=['Ticker', 'Revenue Growth', 'Gross Margin', 'Operating Margin', 'Net Margin',
+                                        'Current Ratio'])
+    for row in rows:
+        criteria_df.loc[len(criteria_df)] = row
+    print(f"old row-by-row result table of {len(rows)} rows: {(time.perf_counter() - start) * 1e3:.0f} ms")
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:]))
@@ -0,0 +1,98 @@
+"""Speed and peak memory of the bulk screening report and exports.
+
+Run from the repository root:
+    python -m benchmarks.screener_report [n_tickers]
+
+Writes the summary PDF of n_tickers synthetic screening results (default
+5000) from the whole table and from 500-row chunks, then the CSV, Parquet
+and JSON exports, all into a temporary directory. It prints the pages and
+rows per second, the tracemalloc peak and the file size of each. For
+comparison, the cockpit's old report is built for the first 500 rows: one
+platypus Table and TableStyle per ticker through SimpleDocTemplate.
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from finance_scripts.screener_report import COLUMNS, PERCENT_COLUMNS, export, write_pdf
+
+
+def make_results(n_tickers, seed=0):
+    rng = np.random.default_rng(seed)
+    table = pd.DataFrame(rng.uniform(-0.2, 0.8, (n_tickers, 4)), columns=COLUMNS[1:5])
+    table['Current Ratio'] = rng.uniform(0.5, 4.0, n_tickers)
+    table.index = pd.Index([f'T{i:04d}' for i in range(n_tickers)], name='Ticker')
+    return table
+
+
+def old_report(results, path):
+    """The cockpit's original generate_pdf, minus the intro page."""
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+    criteria_df = results.reset_index()
+    criteria_df[PERCENT_COLUMNS] *= 100
+    doc = SimpleDocTemplate(path, pagesize=letter)
+    styles = getSampleStyleSheet()
+    flowables = []
+    for idx, row in criteria_df.iterrows():
+        ticker_data = row.tolist()
+        data = [[name, f'{value:.2f}', '✔'] for name, value in zip(COLUMNS[1:], ticker_data[1:])]
+        flowables.append(Paragraph(f'Performance of {ticker_data[0]} on Key Criteria', styles['Title']))
+        flowables.append(Spacer(1, 12))
+        table = Table(data, colWidths=[200, 100, 50])
+        table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.beige),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ]))
+        flowables.append(table)
+        flowables.append(Spacer(1, 24))
+    doc.build(flowables)
+    return doc.page
+
+
+def measure(label, write, path, pages=None, rows=None):
+    """Time one run, then trace the allocations of a second (tracemalloc slows it several times over)."""
+    start = time.perf_counter()
+    result = write()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    write()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    pages = getattr(result, 'pages', pages if pages is not None else result)
+    rows = getattr(result, 'rows', rows)
+    rate = f"{pages / elapsed:>7.1f} pages/s" if isinstance(pages, int) else " " * 15
+    rate += f"{rows / elapsed:>8.0f} rows/s"
+    print(f"{label:<22}{elapsed:>7.2f} s {rate} peak {peak / 2**20:>6.1f} MB {os.path.getsize(path) / 1024:>7.0f} KB")
+
+
+def main(n_tickers=5000):
+    results = make_results(n_tickers)
+    directory = tempfile.mkdtemp()
+    try:
+        path = os.path.join(directory, 'report.pdf')
+        measure(f"pdf, {n_tickers} rows", lambda: write_pdf(results, path), path)
+        measure("pdf, 500-row chunks",
+                lambda: write_pdf((results.iloc[i:i + 500] for i in range(0, n_tickers, 500)), path), path)
+        for extension in ('.csv', '.parquet', '.json'):
+            target = os.path.join(directory, 'results' + extension)
+            measure(extension[1:], lambda: export(results, target), target, pages='', rows=n_tickers)
+        old = os.path.join(directory, 'old.pdf')
+        measure("old pdf, 500 rows", lambda: old_report(results.iloc[:500].copy(), old), old, rows=500)
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:]))
@@ -0,0 +1,87 @@
+"""Cold-start import time of the core modules, the CLI and the three tools.
+
+Run from the repository root:
+    python -m benchmarks.startup [runs]
+
+Imports every target in a fresh interpreter, runs times (default 5), and
+prints the fastest import time, its budget and which heavy optional
+dependencies the import pulled in. A target fails when it is over budget
+or imports a dependency it must leave to first use. The exit status is 1
+if any target fails. The scripts are imported by path, as a test or
+another tool would import them: they must not open a window, log in or
+download anything.
+
+The budgets are for a small single-core machine: numpy alone takes about
+0.1 s there and pandas about 0.5 s.
+"""
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# numba imports the scipy package itself, which is cheap; its submodules are what costs.
+SCIPY = ['scipy.special', 'scipy.signal', 'scipy.linalg', 'scipy.optimize']
+HEAVY = SCIPY + ['pandas', 'numba', 'matplotlib', 'reportlab', 'yfinance', 'talib', 'MetaTrader5', 'pyarrow']
+
+# target: (budget in seconds, heavy modules it must not import)
+TARGETS = {
+    'finance_scripts.cli': (0.05, HEAVY + ['numpy']),
+    'finance_scripts.options.pricing': (0.25, HEAVY),
+    'finance_scripts.ta': (0.25, HEAVY),
+    'finance_scripts.mt5bot.indicators': (0.25, HEAVY),
+    'finance_scripts.screener': (1.0, SCIPY + ['numba', 'reportlab', 'yfinance']),
+    'finance_scripts.portfolio.frontier': (1.0, SCIPY + ['numba', 'matplotlib', 'yfinance']),
+    'finance_scripts.backtest.follow_the_line': (1.5, SCIPY + ['matplotlib', 'talib']),
+    'Black scholes option pricing calculator.py': (0.3, HEAVY),
+    'Fundamental Analysis cockpit.py': (1.2, SCIPY + ['numba', 'reportlab', 'yfinance', 'matplotlib']),
+    'mt5 trading bot.py': (1.2, SCIPY + ['MetaTrader5', 'talib', 'matplotlib', 'reportlab']),
+}
+
+PROBE = """
+import importlib, importlib.util, json, sys, time
+target, heavy = sys.argv[1], sys.argv[2:]
+start = time.perf_counter()
+if target.endswith('.py'):
+    spec = importlib.util.spec_from_file_location('_startup_probe', target)
+    spec.loader.exec_module(importlib.util.module_from_spec(spec))
+else:
+    importlib.import_module(target)
+print(json.dumps([time.perf_counter() - start, [name for name in heavy if name in sys.modules]]))
+"""
+
+
+def probe(target):
+    """Import time and loaded heavy modules, or None when the import fails."""
+    env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get('PYTHONPATH', ''))
+    process = subprocess.run([sys.executable, '-c', PROBE, target, *HEAVY, 'numpy'], cwd=ROOT, env=env,
+                             capture_output=True, text=True)
+    if process.returncode:
+        return None
+    return json.loads(process.stdout.splitlines()[-1])
+
+
+def main(runs=5):
+    failed = 0
+    print(f"{'target':<45}{'import':>9}{'budget':>9}  loaded")
+    for target, (budget, forbidden) in TARGETS.items():
+        results = [probe(target) for _ in range(runs)]
+        if None in results:
+            failed += 1
+            print(f"{target:<45}{'-':>9}{budget:>8.2f}s  -  FAIL: cannot be imported")
+            continue
+        seconds = min(seconds for seconds, _ in results)
+        loaded = results[0][1]
+        problems = [name for name in loaded if name in forbidden]
+        status = "ok"
+        if seconds > budget or problems:
+            failed += 1
+            status = "OVER BUDGET" if seconds > budget else "FAIL"
+            if problems:
+                status += f": imports {', '.join(problems)}"
+        print(f"{target:<45}{seconds:>8.3f}s{budget:>8.2f}s  {', '.join(loaded) or '-'}  {status}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(*(int(a) for a in sys.argv[1:])))
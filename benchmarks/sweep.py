@@ -0,0 +1,44 @@
+"""Parameter-sweep throughput of the follow-the-line strategy.
+
+Run from the repository root:
+    python -m benchmarks.sweep [n_bars] [processes]
+
+Defaults to 500k random-walk bars and 4 processes. Times a
+144-combination grid backtested one by one with ``backtest`` (every
+indicator recomputed), with ``sweep`` in this process (shared indicator
+cache) and on the process pool, then a successive-halving run.
+"""
+import sys
+import time
+
+from benchmarks.follow_the_line import make_bars
+from finance_scripts.backtest.follow_the_line import backtest
+from finance_scripts.backtest.sweep import grid, successive_halving, sweep
+
+
+def timed(label, func, *args, n=None, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<22}{elapsed:>8.2f} s {n / elapsed:>10.1f} combinations/s")
+    return result
+
+
+def main(n_bars=500_000, processes=4):
+    bars = make_bars(n_bars)
+    combinations = grid(atr_period=[10, 12, 14, 20], atr_multiplier=[2.0, 3.0, 4.0],
+                        hull_mode=['Hma', 'Ehma', 'Thma'], line_fast=[4, 7], signal_length=[9, 50])
+    n = len(combinations)
+    print(f"{n} combinations x {n_bars} bars")
+    backtest(make_bars(2_000))  # compile outside the timings
+
+    timed("backtest one by one", lambda: [backtest(bars, p) for p in combinations], n=n)
+    timed("sweep, in process", sweep, bars, combinations, n=n)
+    table = timed(f"sweep, {processes} processes", sweep, bars, combinations, processes=processes, n=n)
+    timed("successive halving", successive_halving, bars, combinations, processes=processes, n=n)
+    print(table.head(5)[['atr_period', 'atr_multiplier', 'hull_mode', 'line_fast', 'signal_length',
+                         'sharpe', 'max_drawdown', 'profit_factor', 'trades']].to_string(index=False))
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:]))
@@ -0,0 +1,65 @@
+"""Overhead of the MT5 bot's telemetry and sampling profiler on its decision cycle.
+
+Run from the repository root:
+    python -m benchmarks.telemetry [n_bars]
+
+Replays the bot's strategy on a random walk of n_bars H1 bars (default
+20000) three times: bare, with every stage and broker call timed, and
+timed with the sampling profiler running. It prints the cost per cycle of
+each, the p50/p99 table read back from the metrics file, and the functions
+the profiler saw most often.
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from finance_scripts.mt5bot.bar_store import RATES_DTYPE
+from finance_scripts.mt5bot.replay import replay
+from finance_scripts.mt5bot.telemetry import SamplingProfiler, Telemetry, read_prometheus, report
+
+
+def make_bars(n_bars, seed=0):
+    rng = np.random.default_rng(seed)
+    bars = np.zeros(n_bars, dtype=RATES_DTYPE)
+    bars['close'] = 4000.0 + np.cumsum(rng.normal(0.0, 5.0, n_bars))
+    bars['open'] = np.concatenate([bars['close'][:1], bars['close'][:-1]])
+    bars['high'] = np.maximum(bars['open'], bars['close']) + rng.uniform(0.0, 5.0, n_bars)
+    bars['low'] = np.minimum(bars['open'], bars['close']) - rng.uniform(0.0, 5.0, n_bars)
+    bars['time'] = 1_500_000_000 + 3600 * np.arange(n_bars)
+    bars['spread'] = 50
+    return bars
+
+
+def main(n_bars=20_000):
+    bars = make_bars(n_bars)
+    replay(bars[:2_000])  # warm the imports and caches
+
+    def run(label, telemetry=None, baseline=None):
+        start = time.perf_counter()
+        result = replay(bars, cci_period=200, telemetry=telemetry)
+        per_cycle = (time.perf_counter() - start) / (n_bars - 1)
+        overhead = '' if baseline is None else f"  +{(per_cycle - baseline) * 1e6:.1f} us ({per_cycle / baseline - 1:.1%})"
+        print(f"{label:<22}{per_cycle * 1e6:>8.1f} us/cycle {len(result.trades):>6} trades{overhead}")
+        return per_cycle
+
+    bare = run("bare")
+    telemetry = Telemetry()
+    run("telemetry", telemetry, bare)
+    with SamplingProfiler() as profiler:
+        run("telemetry + profiler", Telemetry(), bare)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'metrics.prom')
+        telemetry.write(path)
+        print(f"\nmetrics file: {os.path.getsize(path)} bytes")
+        print(report(*read_prometheus(path)))
+    print(f"\nprofiler: {profiler.samples} samples, {len(profiler.stacks)} distinct stacks")
+    for name, share in profiler.top(8):
+        print(f"{share:>7.1%}  {name}")
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:]))
@@ -0,0 +1,96 @@
+"""Read speed and memory of TradingView xlsx exports.
+
+Run from the repository root:
+    python -m benchmarks.tradingview [n_trades] [n_exports]
+
+Writes a synthetic export with n_trades trades (default 50k, i.e. 100k rows
+in the list of trades) in the layout of the Nov 21 - Jul 24 export, reads
+it with the streaming XML engine, with openpyxl's read-only mode and with
+pandas.read_excel, reporting time and peak Python memory, then analyzes
+n_exports copies (default 200) in one compare_exports batch.
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from finance_scripts.backtest.tradingview import compare_exports, read_export
+
+HEADER = ['Trade #', 'Type', 'Signal', 'Date/Time', 'Price USD', 'Contracts', 'Profit USD', 'Profit %',
+          'Cum. Profit USD', 'Cum. Profit %', 'Run-up USD', 'Run-up %', 'Drawdown USD', 'Drawdown %']
+
+
+def write_export(path, n_trades, seed=0):
+    from openpyxl import Workbook
+
+    rng = np.random.default_rng(seed)
+    workbook = Workbook(write_only=True)
+    summary = workbook.create_sheet('Performance summary')
+    summary.append([None, 'All USD', 'All %'])
+    summary.append(['Net Profit', 0.0, 0.0])
+    properties = workbook.create_sheet('Properties')
+    properties.append(['Title', 'Value'])
+    properties.append(['Initial capital', '100000 USD'])
+    trades = workbook.create_sheet('List of trades')
+    trades.append(HEADER)
+
+    start = pd.Timestamp('2015-01-01')
+    entry_hours = np.cumsum(rng.integers(1, 10, n_trades))
+    exit_hours = entry_hours + rng.integers(1, 5, n_trades)
+    profit = np.round(rng.normal(50.0, 500.0, n_trades), 2)
+    cumulative = np.cumsum(profit)
+    for i in range(n_trades - 1, -1, -1):
+        side = 'Long' if i % 2 else 'Short'
+        figures = [20.0, profit[i], 0.5, cumulative[i], 0.3, 300.0, 0.3, 200.0, 0.2]
+        trades.append([i + 1, f'Exit {side}', f'{side.lower()} exit',
+                       (start + pd.Timedelta(hours=int(exit_hours[i]))).to_pydatetime(), 4500.0, *figures])
+        trades.append([i + 1, f'Entry {side}', f'{side.lower()} entry',
+                       (start + pd.Timedelta(hours=int(entry_hours[i]))).to_pydatetime(), 4500.0, *figures])
+    workbook.save(path)
+
+
+def measure(label, func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    elapsed = time.perf_counter() - start
+    # A second, traced run for memory: tracing slows the reader down a lot.
+    tracemalloc.start()
+    func(*args, **kwargs)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"{label:<18}{elapsed:>8.2f} s {peak / 2 ** 20:>9.1f} MB peak")
+    return result
+
+
+def main(n_trades=50_000, n_exports=200):
+    directory = tempfile.mkdtemp()
+    try:
+        path = os.path.join(directory, 'export.xlsx')
+        write_export(path, n_trades)
+        print(f"{n_trades} trades, {os.path.getsize(path) / 2 ** 20:.1f} MB xlsx")
+        xml = measure("xml stream", read_export, path)
+        opx = measure("openpyxl", read_export, path, engine='openpyxl')
+        measure("pandas.read_excel", pd.read_excel, path, sheet_name='List of trades')
+        print(f"engines agree: {xml.trades.equals(opx.trades)}; "
+              f"trade log {xml.trades.memory_usage(deep=True).sum() / 2 ** 20:.1f} MB in memory")
+
+        small = os.path.join(directory, 'small.xlsx')
+        write_export(small, 500)
+        copies = []
+        for i in range(n_exports):
+            copies.append(os.path.join(directory, f'export_{i}.xlsx'))
+            shutil.copyfile(small, copies[-1])
+        start = time.perf_counter()
+        table = compare_exports(copies)
+        print(f"compare_exports: {len(table)} exports of 500 trades in {time.perf_counter() - start:.2f} s")
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:]))
@@ -0,0 +1 @@
+"""Importable building blocks behind the Finance-scripts tools."""
@@ -0,0 +1,6 @@
+"""``python -m finance_scripts``: the batch command line, see ``finance_scripts.cli``."""
+import sys
+
+from finance_scripts.cli import main
+
+sys.exit(main())
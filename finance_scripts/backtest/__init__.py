@@ -0,0 +1 @@
+"""Offline backtests of the TradingView strategies kept in this repository."""
@@ -0,0 +1,382 @@
+"""Backtest of the "follow the line + MACD + Hull suite + ATR trailing stop" strategy.
+
+Python port of the Pine Script strategy of the same name. The rolling
+indicators (MACD, follow-the-line curve, Hull variants, ATR) are computed
+for the whole series at once with ``finance_scripts.ta``; the two recursive
+parts, the ATR trailing stop and the order/position state machine, are
+plain loops compiled with numba when it is installed.
+
+Orders follow TradingView's broker emulator with default settings: the
+script runs on bar closes, market orders (entries and ``strategy.close``)
+fill at the next bar's open, and the stop-loss/take-profit exit is active
+from the bar the entry fills. Within a bar the emulator assumes the price
+went open -> high -> low -> close when the open is nearer the high, and
+open -> low -> high -> close otherwise; a stop or limit already crossed at
+the open fills at the open. Order size is a percentage of equity at the
+signal bar's close, rounded down to ``qty_step``. Pyramiding is 1, so a
+repeated short signal while short only moves the exit prices, as
+re-issuing ``strategy.exit`` does in Pine.
+"""
+import math
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from finance_scripts import ta
+
+try:
+    from numba import njit
+except ImportError:  # same loops, interpreted
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+
+class StrategyParams(NamedTuple):
+    """Inputs of the Pine script, with the script's defaults."""
+    fast_length: int = 100
+    slow_length: int = 200
+    signal_length: int = 50
+    oscillator_ma: str = 'EMA'
+    signal_ma: str = 'EMA'
+    atr_period: int = 14
+    atr_multiplier: float = 3.0
+    line_fast: int = 7
+    line_slow: int = 551
+    line_curve: int = 8
+    hull_mode: str = 'Hma'
+    hull_length: int = 55
+    hull_length_mult: float = 1.0
+    long_reward: float = 4.0
+    short_reward: float = 1.5
+    initial_capital: float = 100_000.0
+    equity_percent: float = 80.0
+    qty_step: float = 0.01
+    # Stop and limit prices are rounded to this tick when set.
+    tick_size: float = 0.0
+
+
+class Signals(NamedTuple):
+    trailing_stop: np.ndarray
+    go_long: np.ndarray
+    exit_long: np.ndarray
+    go_short: np.ndarray
+    exit_short: np.ndarray
+
+
+class BacktestResult(NamedTuple):
+    trades: pd.DataFrame
+    equity: pd.Series
+
+
+# Exit reasons written by the simulation loop.
+SIGNAL, STOP, TAKE_PROFIT, REVERSAL, OPEN = range(5)
+_EXIT_LABELS = {
+    (1, SIGNAL): 'long exit', (-1, SIGNAL): 'short exit',
+    (1, STOP): 'Stoploss long', (-1, STOP): 'Stoploss short',
+    (1, TAKE_PROFIT): 'Takeprofit long', (-1, TAKE_PROFIT): 'Takeprofit short',
+    (1, REVERSAL): 'short entry', (-1, REVERSAL): 'long entry',
+    (1, OPEN): 'Open', (-1, OPEN): 'Open',
+}
+_TRADE_FIELDS = ('direction', 'entry_bar', 'entry_price', 'exit_bar', 'exit_price', 'reason', 'contracts', 'profit')
+
+
+def _moving_average(kind, x, period):
+    if kind == 'SMA':
+        return ta.sma(x, period)
+    if kind == 'EMA':
+        return ta.ema(x, period)
+    raise ValueError("moving average type must be 'SMA' or 'EMA'")
+
+
+def _hull(mode, x, length):
+    if mode == 'Hma':
+        return ta.hma(x, length)
+    if mode == 'Ehma':
+        return ta.ehma(x, length)
+    if mode == 'Thma':
+        return ta.thma(x, length // 2)
+    raise ValueError("hull_mode must be 'Hma', 'Ehma' or 'Thma'")
+
+
+def _shift(x, k):
+    out = np.full_like(x, np.nan)
+    out[..., k:] = x[..., :-k]
+    return out
+
+
+def macd_histogram(close, params=StrategyParams()):
+    macd = (_moving_average(params.oscillator_ma, close, params.fast_length)
+            - _moving_average(params.oscillator_ma, close, params.slow_length))
+    return macd - _moving_average(params.signal_ma, macd, params.signal_length)
+
+
+def follow_the_line(close, params=StrategyParams()):
+    """The script's curve: SMA of the fast SMA plus the slow SMA."""
+    return ta.sma(ta.sma(close, params.line_fast) + ta.sma(close, params.line_slow), params.line_curve)
+
+
+def hull(close, params=StrategyParams()):
+    return _hull(params.hull_mode, close, int(params.hull_length * params.hull_length_mult))
+
+
+@njit(cache=True)
+def atr_trailing_stop(close, stop):
+    """Recursive ATR trail and its colour (1 green, -1 red, 0 before the first cross).
+
+    ``stop`` is the ATR times the multiplier. Comparisons against NaN are
+    false, like comparisons against ``na`` in Pine, so the warm-up behaves
+    as in the script.
+    """
+    n = len(close)
+    trail = np.empty(n)
+    position = np.empty(n)
+    prev_trail = np.nan
+    prev_close = np.nan
+    prev_position = 0.0
+    for i in range(n):
+        c = close[i]
+        if c > prev_trail and prev_close > prev_trail:
+            t = max(prev_trail, c - stop[i])
+        elif c < prev_trail and prev_close < prev_trail:
+            t = min(prev_trail, c + stop[i])
+        elif c > prev_trail:
+            t = c - stop[i]
+        else:
+            t = c + stop[i]
+        if prev_close < prev_trail and c > prev_trail:
+            p = 1.0
+        elif prev_close > prev_trail and c < prev_trail:
+            p = -1.0
+        else:
+            p = prev_position
+        trail[i] = t
+        position[i] = p
+        prev_trail = t
+        prev_close = c
+        prev_position = p
+    return trail, position
+
+
+def signals(high, low, close, params=StrategyParams()):
+    """Entry and exit conditions of every bar, evaluated at its close."""
+    high, low, close = (np.ascontiguousarray(a, dtype=float) for a in (high, low, close))
+    stop = params.atr_multiplier * ta.atr(high, low, close, params.atr_period)
+    return combine_signals(macd_histogram(close, params), follow_the_line(close, params), hull(close, params),
+                           *atr_trailing_stop(close, stop))
+
+
+def combine_signals(hist, curve, hull_line, trail, position):
+    """The script's conditions from its indicator series."""
+    h1, h2, h3 = _shift(hist, 1), _shift(hist, 2), _shift(hist, 3)
+    macd_green = (hist >= 0) & (h1 < hist) & (h1 >= 0) & (h2 < h1) & (h2 >= 0) & (h3 < h2)
+    macd_red = (hist <= 0) & (h1 > hist) & (h1 <= 0) & (h2 > h1) & (h2 <= 0) & (h3 > h2)
+    line_green = curve > _shift(curve, 1)
+    hull_green = hull_line > _shift(hull_line, 2)
+    # Both colours are "red" while the curves are still na.
+    line_red, hull_red = ~line_green, ~hull_green
+
+    green = line_green.astype(int) + hull_green + macd_green
+    red = line_red.astype(int) + hull_red + macd_red
+    return Signals(
+        trailing_stop=trail,
+        go_long=line_green & hull_green & macd_green & (position == 1),
+        exit_long=red >= 2,
+        go_short=line_red & hull_red & macd_red & (position == -1),
+        exit_short=green >= 2,
+    )
+
+
+@njit(cache=True)
+def _round_tick(price, tick):
+    if tick > 0.0:
+        return round(price / tick) * tick
+    return price
+
+
+@njit(cache=True)
+def _record(trades, count, direction, entry_bar, entry_price, exit_bar, exit_price, reason, qty):
+    if count == trades.shape[0]:
+        grown = np.empty((2 * count, trades.shape[1]))
+        grown[:count] = trades
+        trades = grown
+    trades[count, 0] = direction
+    trades[count, 1] = entry_bar
+    trades[count, 2] = entry_price
+    trades[count, 3] = exit_bar
+    trades[count, 4] = exit_price
+    trades[count, 5] = reason
+    trades[count, 6] = qty
+    trades[count, 7] = direction * qty * (exit_price - entry_price)
+    return trades
+
+
+@njit(cache=True)
+def _simulate(open_, high, low, close, trail, go_long, exit_long, go_short, exit_short,
+              capital, equity_fraction, qty_step, long_reward, short_reward, tick):
+    n = len(close)
+    trades = np.empty((max(n // 64, 16), 8))
+    count = 0
+    equity = np.empty(n)
+    realized = 0.0
+    position, qty, entry_price, entry_bar = 0, 0.0, 0.0, 0
+    stop, limit = np.nan, np.nan
+    pending_entry, pending_qty, pending_stop, pending_limit = 0, 0.0, np.nan, np.nan
+    pending_close = 0
+
+    for i in range(n):
+        o = open_[i]
+        # Market orders from the previous close fill at this open.
+        if pending_close != 0 and position == pending_close:
+            trades = _record(trades, count, position, entry_bar, entry_price, i, o, SIGNAL, qty)
+            count += 1
+            realized += position * qty * (o - entry_price)
+            position = 0
+        if pending_entry != 0 and position != pending_entry:
+            if position != 0:
+                trades = _record(trades, count, position, entry_bar, entry_price, i, o, REVERSAL, qty)
+                count += 1
+                realized += position * qty * (o - entry_price)
+            if pending_qty > 0.0:
+                position, qty, entry_price, entry_bar = pending_entry, pending_qty, o, i
+                stop, limit = pending_stop, pending_limit
+            else:
+                position = 0
+        pending_entry = 0
+        pending_close = 0
+
+        # Stop-loss / take-profit along the assumed intrabar path.
+        if position != 0:
+            exit_price, reason = np.nan, -1
+            if position == 1:
+                if o <= stop:
+                    exit_price, reason = o, STOP
+                elif o >= limit:
+                    exit_price, reason = o, TAKE_PROFIT
+                elif high[i] - o <= o - low[i]:
+                    if high[i] >= limit:
+                        exit_price, reason = limit, TAKE_PROFIT
+                    elif low[i] <= stop:
+                        exit_price, reason = stop, STOP
+                else:
+                    if low[i] <= stop:
+                        exit_price, reason = stop, STOP
+                    elif high[i] >= limit:
+                        exit_price, reason = limit, TAKE_PROFIT
+            else:
+                if o >= stop:
+                    exit_price, reason = o, STOP
+                elif o <= limit:
+                    exit_price, reason = o, TAKE_PROFIT
+                elif high[i] - o <= o - low[i]:
+                    if high[i] >= stop:
+                        exit_price, reason = stop, STOP
+                    elif low[i] <= limit:
+                        exit_price, reason = limit, TAKE_PROFIT
+                else:
+                    if low[i] <= limit:
+                        exit_price, reason = limit, TAKE_PROFIT
+                    elif high[i] >= stop:
+                        exit_price, reason = stop, STOP
+            if reason >= 0:
+                trades = _record(trades, count, position, entry_bar, entry_price, i, exit_price, reason, qty)
+                count += 1
+                realized += position * qty * (exit_price - entry_price)
+                position = 0
+
+        c = close[i]
+        equity[i] = capital + realized + (position * qty * (c - entry_price) if position != 0 else 0.0)
+
+        # The script body, run on the bar close.
+        if position <= 0 and (go_long[i] or go_short[i]):
+            direction = 1 if go_long[i] else -1
+            new_stop = _round_tick(trail[i], tick)
+            if direction == 1:
+                new_limit = _round_tick(c + long_reward * (c - trail[i]), tick)
+            else:
+                new_limit = _round_tick(c - short_reward * (trail[i] - c), tick)
+            if position == direction:
+                stop, limit = new_stop, new_limit
+            else:
+                pending_entry = direction
+                pending_qty = math.floor(equity_fraction * equity[i] / c / qty_step) * qty_step
+                pending_stop, pending_limit = new_stop, new_limit
+        if exit_long[i] and position == 1:
+            pending_close = 1
+        elif exit_short[i] and position == -1:
+            pending_close = -1
+
+    if position != 0:
+        trades = _record(trades, count, position, entry_bar, entry_price, n - 1, close[n - 1], OPEN, qty)
+        count += 1
+    return trades[:count], equity
+
+
+def _field(bars, name):
+    return np.ascontiguousarray(bars[name], dtype=float)
+
+
+def _times(bars, n):
+    try:
+        times = np.asarray(bars['time'])
+    except (KeyError, ValueError, IndexError):
+        index = getattr(bars, 'index', None)
+        return pd.DatetimeIndex(index) if isinstance(index, pd.DatetimeIndex) else pd.RangeIndex(n)
+    if np.issubdtype(times.dtype, np.number):
+        return pd.to_datetime(times, unit='s')
+    return pd.DatetimeIndex(times)
+
+
+def simulate(open_, high, low, close, sig, params=StrategyParams()):
+    """Run the order state machine over precomputed ``signals``.
+
+    Returns the raw trade matrix (one row per trade, columns as in
+    ``_TRADE_FIELDS``, the last row being the open position if any) and
+    the bar-close equity.
+    """
+    arrays = [np.ascontiguousarray(a, dtype=float) for a in (open_, high, low, close, sig.trailing_stop)]
+    flags = [np.ascontiguousarray(a, dtype=np.bool_) for a in sig[1:]]
+    return _simulate(*arrays, *flags, float(params.initial_capital), params.equity_percent / 100.0,
+                     float(params.qty_step), float(params.long_reward), float(params.short_reward),
+                     float(params.tick_size))
+
+
+def backtest(bars, params=StrategyParams(), trade_from=None):
+    """Backtest the strategy on ``bars`` and return the trade list and equity.
+
+    ``bars`` is anything indexable by ``'open'``, ``'high'``, ``'low'`` and
+    ``'close'`` (a structured array in the ``BarStore`` layout, a
+    DataFrame, a dict of arrays). Bar times come from a ``'time'`` field in
+    epoch seconds or datetimes, else from a DatetimeIndex, else bar numbers.
+    Entries are only taken on bars from ``trade_from`` on (TradingView's
+    backtesting range); earlier bars still warm the indicators up.
+    """
+    open_, high, low, close = (_field(bars, name) for name in ('open', 'high', 'low', 'close'))
+    times = _times(bars, len(close))
+    sig = signals(high, low, close, params)
+    if trade_from is not None:
+        before = times < pd.Timestamp(trade_from)
+        sig = sig._replace(go_long=sig.go_long & ~before, go_short=sig.go_short & ~before)
+    raw, equity = simulate(open_, high, low, close, sig, params)
+
+    trades = pd.DataFrame(raw, columns=_TRADE_FIELDS)
+    direction = trades['direction'].astype(int).to_numpy()
+    reason = trades['reason'].astype(int).to_numpy()
+    entry_bar = trades['entry_bar'].astype(np.int64).to_numpy()
+    exit_bar = trades['exit_bar'].astype(np.int64).to_numpy()
+    result = pd.DataFrame({
+        'direction': np.where(direction == 1, 'long', 'short'),
+        'entry_time': times[entry_bar],
+        'entry_price': trades['entry_price'],
+        'entry_signal': np.where(direction == 1, 'long entry', 'short entry'),
+        'exit_time': times[exit_bar],
+        'exit_price': trades['exit_price'],
+        'exit_signal': [_EXIT_LABELS[d, r] for d, r in zip(direction, reason)],
+        'contracts': trades['contracts'],
+        'profit': trades['profit'],
+        'entry_bar': entry_bar,
+        'exit_bar': exit_bar,
+    })
+    return BacktestResult(trades=result, equity=pd.Series(equity, index=times, name='equity'))
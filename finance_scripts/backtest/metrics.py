@@ -0,0 +1,49 @@
+"""Performance statistics of backtest equity curves and trade lists.
+
+Every function works along the last axis, so one curve and a matrix with
+one curve per row go through the same code.
+"""
+import numpy as np
+
+SECONDS_PER_YEAR = 365.25 * 86400
+
+
+def periods_per_year(times):
+    """Bars per year implied by a series of bar times (epoch seconds or datetimes)."""
+    times = np.asarray(times)
+    if np.issubdtype(times.dtype, np.datetime64):
+        times = times.astype('datetime64[s]').astype(np.int64)
+    span = float(times[-1] - times[0]) if len(times) > 1 else 0.0
+    return (len(times) - 1) * SECONDS_PER_YEAR / span if span > 0 else 252.0
+
+
+def returns(equity):
+    equity = np.asarray(equity, dtype=float)
+    return np.diff(equity, axis=-1) / equity[..., :-1]
+
+
+def sharpe_ratio(equity, periods=252.0):
+    """Annualized mean over standard deviation of the per-bar returns."""
+    r = returns(equity)
+    std = r.std(axis=-1, ddof=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(std > 0, r.mean(axis=-1) / std * np.sqrt(periods), np.nan)
+
+
+def drawdown(equity):
+    """Fraction below the running peak at every bar."""
+    equity = np.asarray(equity, dtype=float)
+    return 1.0 - equity / np.maximum.accumulate(equity, axis=-1)
+
+
+def max_drawdown(equity):
+    return drawdown(equity).max(axis=-1)
+
+
+def profit_factor(profits):
+    """Gross profit over gross loss; inf without losing trades."""
+    profits = np.asarray(profits, dtype=float)
+    gross_profit = np.where(profits > 0, profits, 0.0).sum(axis=-1)
+    gross_loss = -np.where(profits < 0, profits, 0.0).sum(axis=-1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(gross_loss > 0, gross_profit / gross_loss, np.where(gross_profit > 0, np.inf, np.nan))
@@ -0,0 +1,227 @@
+"""Parameter sweeps of the follow-the-line strategy over a process pool.
+
+Combinations come from ``grid`` or ``random_combinations`` and are scored
+by ``sweep`` (every combination on the full history) or
+``successive_halving`` (all combinations on a short prefix of the history,
+the best ``1/eta`` on a ``eta`` times longer one, and so on up to the full
+history).
+
+The OHLC arrays are copied once into a ``multiprocessing.shared_memory``
+block that the workers map, so nothing but parameters and result rows
+crosses the process boundary. Each worker keeps an ``IndicatorCache``:
+indicator series depend on a few inputs only (the ATR on ``atr_period``,
+the Hull on its mode and length, ...) and are computed once per worker for
+every combination sharing those inputs. Combinations are sorted by those
+inputs before being handed out in contiguous chunks, so neighbours in a
+chunk mostly hit the cache. The indicators are causal, so a prefix of the
+history reuses the prefix of the cached full-length series.
+"""
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product, repeat
+import math
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from finance_scripts import ta
+from finance_scripts.backtest import metrics
+from finance_scripts.backtest.follow_the_line import (
+    OPEN, StrategyParams, atr_trailing_stop, combine_signals, follow_the_line, hull, macd_histogram, simulate, _times,
+)
+
+# Inputs each cached series depends on.
+COMPONENTS = {
+    'macd': ('oscillator_ma', 'fast_length', 'slow_length', 'signal_ma', 'signal_length'),
+    'line': ('line_fast', 'line_slow', 'line_curve'),
+    'hull': ('hull_mode', 'hull_length', 'hull_length_mult'),
+    'atr': ('atr_period',),
+    'trail': ('atr_period', 'atr_multiplier'),
+}
+METRICS = ('net_profit', 'sharpe', 'max_drawdown', 'profit_factor', 'trades', 'win_rate')
+
+
+def grid(base=StrategyParams(), **space):
+    """Every combination of the values listed per input, e.g. ``grid(atr_period=[10, 14])``."""
+    names = list(space)
+    return [base._replace(**dict(zip(names, values))) for values in product(*space.values())]
+
+
+def random_combinations(n, base=StrategyParams(), seed=None, **space):
+    """Up to ``n`` distinct combinations drawn uniformly from the listed values."""
+    rng = np.random.default_rng(seed)
+    names = list(space)
+    choices = [list(values) for values in space.values()]
+    total = math.prod(len(c) for c in choices)
+    combinations = {}
+    while len(combinations) < min(n, total):
+        values = tuple(c[rng.integers(len(c))] for c in choices)
+        combinations.setdefault(values, base._replace(**dict(zip(names, values))))
+    return list(combinations.values())
+
+
+def _key(params, component):
+    return tuple(getattr(params, name) for name in COMPONENTS[component])
+
+
+class IndicatorCache:
+    """Least-recently-used indicator series of one price history, per component."""
+
+    def __init__(self, high, low, close, maxsize=16):
+        self.high, self.low, self.close = high, low, close
+        self.maxsize = maxsize
+        self._series = {component: OrderedDict() for component in COMPONENTS}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, component, params):
+        cache = self._series[component]
+        key = _key(params, component)
+        if key in cache:
+            self.hits += 1
+            cache.move_to_end(key)
+            return cache[key]
+        self.misses += 1
+        value = self._compute(component, params)
+        cache[key] = value
+        if len(cache) > self.maxsize:
+            cache.popitem(last=False)
+        return value
+
+    def _compute(self, component, params):
+        if component == 'macd':
+            return macd_histogram(self.close, params)
+        if component == 'line':
+            return follow_the_line(self.close, params)
+        if component == 'hull':
+            return hull(self.close, params)
+        if component == 'atr':
+            return ta.atr(self.high, self.low, self.close, params.atr_period)
+        return atr_trailing_stop(self.close, params.atr_multiplier * self.get('atr', params))
+
+    def signals(self, params, n_bars=None):
+        trail, position = self.get('trail', params)
+        series = (self.get('macd', params), self.get('line', params), self.get('hull', params), trail, position)
+        return combine_signals(*(s[:n_bars] for s in series))
+
+
+# Per-process state: the mapped price block and its indicator cache.
+_worker = {}
+
+
+def _attach(name, shape, first_trade_bar, periods):
+    block = shared_memory.SharedMemory(name=name)
+    _use(np.ndarray(shape, dtype=float, buffer=block.buf), first_trade_bar, periods, block)
+
+
+def _use(prices, first_trade_bar, periods, block=None):
+    _worker.update(prices=prices, block=block, first_trade_bar=first_trade_bar, periods=periods,
+                   cache=IndicatorCache(prices[1], prices[2], prices[3]))
+
+
+def _evaluate(params, n_bars):
+    prices, cache = _worker['prices'][:, :n_bars], _worker['cache']
+    sig = cache.signals(params, n_bars)
+    first = _worker['first_trade_bar']
+    if first:
+        go_long, go_short = sig.go_long.copy(), sig.go_short.copy()
+        go_long[:first] = go_short[:first] = False
+        sig = sig._replace(go_long=go_long, go_short=go_short)
+    trades, equity = simulate(*prices, sig, params)
+    profits = trades[trades[:, 5] != OPEN, 7]
+    return {
+        'net_profit': equity[-1] - params.initial_capital,
+        'sharpe': float(metrics.sharpe_ratio(equity, _worker['periods'])),
+        'max_drawdown': float(metrics.max_drawdown(equity)),
+        'profit_factor': float(metrics.profit_factor(profits)),
+        'trades': len(profits),
+        'win_rate': float((profits > 0).mean()) if len(profits) else np.nan,
+    }
+
+
+class _Evaluator:
+    """Scores combinations in-process or on a pool sharing one price block."""
+
+    def __init__(self, bars, processes, trade_from, periods):
+        self.prices = np.stack([np.asarray(bars[name], dtype=float) for name in ('open', 'high', 'low', 'close')])
+        times = _times(bars, self.prices.shape[1])
+        first_trade_bar = int(np.searchsorted(times, pd.Timestamp(trade_from))) if trade_from is not None else 0
+        if periods is None:
+            periods = metrics.periods_per_year(times) if isinstance(times, pd.DatetimeIndex) else 252.0
+        self.processes = processes
+        self.block = self.executor = None
+        if processes:
+            self.block = shared_memory.SharedMemory(create=True, size=self.prices.nbytes)
+            shared = np.ndarray(self.prices.shape, dtype=float, buffer=self.block.buf)
+            shared[:] = self.prices
+            self.executor = ProcessPoolExecutor(
+                max_workers=processes, initializer=_attach,
+                initargs=(self.block.name, self.prices.shape, first_trade_bar, periods))
+        else:
+            _use(self.prices, first_trade_bar, periods)
+
+    def __call__(self, combinations, n_bars=None):
+        n_bars = n_bars or self.prices.shape[1]
+        ordered = sorted(combinations, key=lambda p: tuple(repr(_key(p, c)) for c in COMPONENTS))
+        if self.executor is None:
+            rows = [_evaluate(p, n_bars) for p in ordered]
+        else:
+            chunk = max(len(ordered) // (4 * self.processes), 1)
+            rows = list(self.executor.map(_evaluate, ordered, repeat(n_bars), chunksize=chunk))
+        table = pd.DataFrame([p._asdict() for p in ordered])
+        table[list(METRICS)] = pd.DataFrame(rows, columns=METRICS)
+        table['bars'] = n_bars
+        return table
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        if self.executor is not None:
+            self.executor.shutdown()
+        if self.block is not None:
+            self.block.close()
+            self.block.unlink()
+        _worker.clear()
+
+
+def _ranked(table, sort_by):
+    return table.sort_values(sort_by, ascending=sort_by == 'max_drawdown', na_position='last',
+                             ignore_index=True)
+
+
+def sweep(bars, combinations, processes=None, sort_by='sharpe', trade_from=None, periods=None):
+    """Backtest every combination on the full history; one row each, best first.
+
+    ``bars`` is in any layout ``backtest`` accepts. ``processes`` workers
+    share the prices (None or 0 runs in this process). Sharpe ratios are
+    annualized with ``periods`` bars per year, by default inferred from the
+    bar times. Rows hold every input plus ``METRICS``.
+    """
+    with _Evaluator(bars, processes, trade_from, periods) as evaluate:
+        return _ranked(evaluate(combinations), sort_by)
+
+
+def successive_halving(bars, combinations, eta=3, min_bars=5_000, processes=None, sort_by='sharpe',
+                       trade_from=None, periods=None):
+    """Successive halving over history length; returns every rung, final rung first.
+
+    The first rung scores all combinations on a prefix of the history of
+    at least ``min_bars`` bars, each later rung keeps the best ``1/eta`` on ``eta`` times as
+    many bars, and the last rung runs on the whole history. The ``bars``
+    column tells the rungs apart.
+    """
+    combinations = list(combinations)
+    with _Evaluator(bars, processes, trade_from, periods) as evaluate:
+        n = evaluate.prices.shape[1]
+        rungs = max(min(math.ceil(math.log(max(len(combinations), 1), eta)),
+                        math.floor(math.log(max(n / min_bars, 1), eta)) + 1), 1)
+        budgets = [math.ceil(n / eta ** (rungs - 1 - k)) for k in range(rungs)]
+        tables = []
+        for budget in budgets:
+            table = _ranked(evaluate(combinations, budget), sort_by)
+            tables.append(table)
+            keep = table.head(max(math.ceil(len(table) / eta), 1))
+            combinations = [StrategyParams(**row) for row in keep[list(StrategyParams._fields)].to_dict('records')]
+    return pd.concat(tables[::-1], ignore_index=True)
@@ -0,0 +1,365 @@
+"""Reader and analytics for TradingView strategy-tester xlsx exports.
+
+An export has three sheets: the performance summary, the strategy
+properties and the list of trades, with one entry row and one exit row per
+trade. ``read_export`` turns the list into a typed columnar trade log, one
+row per trade, with categorical directions/signals, datetime64 times and
+float columns.
+
+The default engine streams the sheet XML straight out of the zip archive
+through an expat parser and appends each cell value to its column list,
+so no spreadsheet cell objects are created and memory stays proportional
+to the columns being built; ``engine='openpyxl'`` reads through openpyxl's
+read-only mode instead. ``analyze`` computes the equity curve statistics of
+a trade log, and ``compare_exports`` reads and analyzes any number of
+exports into one table, optionally over a process pool.
+"""
+from concurrent.futures import ProcessPoolExecutor
+import os
+from typing import NamedTuple
+from xml.etree import ElementTree
+from xml.parsers import expat
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+from finance_scripts.backtest import metrics
+
+_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+_REL_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+# Day zero of Excel's 1900 date system (serial 1 = 1900-01-01, after the leap-year bug).
+_EXCEL_EPOCH = np.datetime64('1899-12-30T00:00:00', 's')
+
+
+class TradingViewExport(NamedTuple):
+    trades: pd.DataFrame
+    summary: pd.DataFrame
+    properties: dict
+
+
+# ----------------------------------------------------------------------------
+# Streaming xlsx access
+# ----------------------------------------------------------------------------
+
+def _sheet_paths(archive):
+    """Sheet name -> XML member path, from the workbook and its relationships."""
+    workbook = ElementTree.fromstring(archive.read('xl/workbook.xml'))
+    relationships = ElementTree.fromstring(archive.read('xl/_rels/workbook.xml.rels'))
+    targets = {rel.get('Id'): rel.get('Target') for rel in relationships}
+    paths = {}
+    for sheet in workbook.iter(_NS + 'sheet'):
+        target = targets[sheet.get(_REL_NS + 'id')]
+        paths[sheet.get('name')] = target.lstrip('/') if target.startswith('/') else 'xl/' + target
+    return paths
+
+
+def _shared_strings(archive):
+    if 'xl/sharedStrings.xml' not in archive.namelist():
+        return []
+    strings = []
+    with archive.open('xl/sharedStrings.xml') as handle:
+        for _, element in ElementTree.iterparse(handle):
+            if element.tag == _NS + 'si':
+                strings.append(''.join(t.text or '' for t in element.iter(_NS + 't')))
+                element.clear()
+    return strings
+
+
+def _column_index(reference):
+    index = 0
+    for char in reference:
+        if char.isdigit():
+            break
+        index = index * 26 + ord(char) - 64
+    return index - 1
+
+
+def _number(text):
+    return int(text) if text.lstrip('-').isdigit() else float(text)
+
+
+def _iter_xml_rows(archive, member, strings, chunk_size=1 << 16):
+    """Rows of one sheet as lists of values.
+
+    An expat parser is fed the compressed member chunk by chunk and its
+    callbacks build each row straight from the cell attributes and text,
+    so neither element trees nor cell objects are created.
+    """
+    main = _NS[1:-1] + ' '
+    row_tag, cell_tag, value_tag, text_tag = (main + name for name in ('row', 'c', 'v', 't'))
+    done = []
+    state = {'row': None, 'column': 0, 'kind': 'n', 'text': None}
+
+    def start(name, attributes):
+        if name == cell_tag:
+            reference = attributes.get('r')
+            state['column'] = _column_index(reference) if reference else len(state['row'])
+            state['kind'] = attributes.get('t', 'n')
+            state['text'] = None
+        elif name == value_tag or (name == text_tag and state['kind'] == 'inlineStr'):
+            state['text'] = state['text'] or []
+            parser.CharacterDataHandler = state['text'].append
+        elif name == row_tag:
+            state['row'] = []
+
+    def end(name):
+        if name == value_tag or name == text_tag:
+            parser.CharacterDataHandler = None
+        elif name == cell_tag:
+            row = state['row']
+            row.extend([None] * (state['column'] - len(row)))
+            row.append(_cell_value(state['kind'], state['text'], strings))
+        elif name == row_tag:
+            done.append(state['row'])
+
+    parser = expat.ParserCreate(namespace_separator=' ')
+    parser.buffer_text = True
+    parser.StartElementHandler = start
+    parser.EndElementHandler = end
+    with archive.open(member) as handle:
+        while True:
+            chunk = handle.read(chunk_size)
+            parser.Parse(chunk, not chunk)
+            yield from done
+            done.clear()
+            if not chunk:
+                break
+
+
+def _cell_value(kind, text, strings):
+    if text is None:
+        return None
+    text = ''.join(text)
+    if kind == 's':
+        return strings[int(text)]
+    if kind in ('str', 'e', 'inlineStr'):
+        return text
+    if kind == 'b':
+        return text == '1'
+    return _number(text)
+
+
+def _find_sheet(names, prefix):
+    for name in names:
+        if name.lower().startswith(prefix):
+            return name
+    raise ValueError(f"no sheet starting with {prefix!r} in the export")
+
+
+def _read_sheets(path, engine):
+    """{'summary': rows, 'properties': rows, 'trades': rows iterator} for one export."""
+    prefixes = {'summary': 'perf', 'properties': 'propert', 'trades': 'list of trades'}
+    if engine == 'xml':
+        archive = zipfile.ZipFile(path)
+        paths = _sheet_paths(archive)
+        strings = _shared_strings(archive)
+        return archive, {key: _iter_xml_rows(archive, paths[_find_sheet(paths, prefix)], strings)
+                         for key, prefix in prefixes.items()}
+    if engine == 'openpyxl':
+        from openpyxl import load_workbook
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        return workbook, {key: workbook[_find_sheet(workbook.sheetnames, prefix)].iter_rows(values_only=True)
+                          for key, prefix in prefixes.items()}
+    raise ValueError("engine must be 'xml' or 'openpyxl'")
+
+
+# ----------------------------------------------------------------------------
+# Trade log
+# ----------------------------------------------------------------------------
+
+_TRADE_COLUMNS = {
+    # export header (currency suffix stripped) -> trade log column
+    'Price': 'price',
+    'Contracts': 'contracts',
+    'Profit': 'profit',
+    'Profit %': 'profit_pct',
+    'Cum. Profit': 'cum_profit',
+    'Cum. Profit %': 'cum_profit_pct',
+    'Run-up': 'run_up',
+    'Run-up %': 'run_up_pct',
+    'Drawdown': 'drawdown',
+    'Drawdown %': 'drawdown_pct',
+}
+
+
+def _header_name(header):
+    """'Price USD' -> 'Price'; percent headers are kept as they are."""
+    header = str(header)
+    if header.endswith('%'):
+        return header
+    head, _, tail = header.rpartition(' ')
+    return head if head and tail.isupper() and tail.isalpha() else header
+
+
+def _to_datetime(values):
+    """Excel serial dates (xml engine) or datetimes (openpyxl) as datetime64[s]."""
+    serial = np.array([v if isinstance(v, (int, float)) and not isinstance(v, bool) else np.nan for v in values],
+                      dtype=float)
+    is_serial = ~np.isnan(serial)
+    out = _EXCEL_EPOCH + np.where(is_serial, np.round(serial * 86400), 0).astype(np.int64).astype('timedelta64[s]')
+    others = np.flatnonzero(~is_serial)
+    out[others] = pd.to_datetime([values[i] for i in others]).to_numpy(dtype='datetime64[s]')
+    return out
+
+
+def _float(values):
+    return np.array([np.nan if v is None or v == '' else float(v) for v in values])
+
+
+def _trade_log(rows):
+    """Pair the entry and exit rows of the "List of trades" sheet by trade number."""
+    header = [_header_name(h) for h in next(rows)]
+    columns = [[] for _ in header]
+    for row in rows:
+        if not row or row[0] is None:
+            continue
+        row = list(row) + [None] * (len(header) - len(row))
+        for values, value in zip(columns, row):
+            values.append(value)
+    data = {_TRADE_COLUMNS.get(name, name): values for name, values in zip(header, columns)}
+
+    trade = np.array(data['Trade #'], dtype=np.int64)
+    kind = np.array([str(v) for v in data['Type']])
+    is_entry = np.char.startswith(kind, 'Entry')
+    entries = np.flatnonzero(is_entry)[np.argsort(trade[is_entry], kind='stable')]
+    exits = np.flatnonzero(~is_entry)[np.argsort(trade[~is_entry], kind='stable')]
+    if not np.array_equal(trade[entries], trade[exits]):
+        raise ValueError("every trade needs exactly one entry and one exit row")
+
+    signal = np.array([v if v is not None else '' for v in data['Signal']], dtype=object)
+    times = _to_datetime(data['Date/Time'])
+    prices = _float(data['price'])
+    log = pd.DataFrame({
+        'trade': trade[entries].astype(np.int32),
+        'direction': pd.Categorical(np.where(np.char.endswith(kind[entries], 'Long'), 'long', 'short'),
+                                    categories=['long', 'short']),
+        'entry_time': times[entries],
+        'entry_price': prices[entries],
+        'entry_signal': pd.Categorical(signal[entries]),
+        'exit_time': times[exits],
+        'exit_price': prices[exits],
+        'exit_signal': pd.Categorical(signal[exits]),
+    })
+    # Trade figures are repeated on both rows; the exit row has them for open trades too.
+    for column in _TRADE_COLUMNS.values():
+        if column != 'price' and column in data:
+            values = _float(data[column])[exits]
+            log[column] = values.astype(np.float32) if column.endswith('_pct') else values
+    return log
+
+
+def _summary(rows):
+    rows = [list(row) for row in rows if row and any(v is not None for v in row)]
+    table = pd.DataFrame(rows[1:], columns=['metric'] + [str(h) for h in rows[0][1:]]).set_index('metric')
+    return table.apply(pd.to_numeric, errors='coerce').astype(float)
+
+
+def _properties(rows):
+    next(rows)
+    return {row[0]: row[1] for row in rows if row and row[0] is not None}
+
+
+def read_export(path, engine='xml'):
+    """Trade log, performance summary and properties of one xlsx export."""
+    source, sheets = _read_sheets(path, engine)
+    try:
+        return TradingViewExport(trades=_trade_log(iter(sheets['trades'])),
+                                 summary=_summary(sheets['summary']),
+                                 properties=_properties(iter(sheets['properties'])))
+    finally:
+        source.close()
+
+
+def initial_capital(properties, default=100_000.0):
+    """'100000 USD' on the Properties sheet -> 100000.0."""
+    value = properties.get('Initial capital')
+    if value is None:
+        return default
+    return float(str(value).split()[0].replace(',', ''))
+
+
+# ----------------------------------------------------------------------------
+# Analytics
+# ----------------------------------------------------------------------------
+
+def closed_trades(trades):
+    closed = trades[trades['exit_time'].notna() & trades['profit'].notna()]
+    return closed.sort_values('exit_time', kind='stable')
+
+
+def equity_curve(trades, capital=100_000.0):
+    """Closed-trade equity: the capital at the first entry, then after each exit."""
+    closed = closed_trades(trades)
+    start = trades['entry_time'].min()
+    index = pd.DatetimeIndex(np.concatenate([[start], closed['exit_time'].to_numpy()]))
+    values = capital + np.concatenate([[0.0], np.cumsum(closed['profit'].to_numpy())])
+    return pd.Series(values, index=index, name='equity')
+
+
+def r_multiples(trades, risk=None):
+    """Profit of each closed trade in units of the risk taken.
+
+    ``risk`` is the amount at risk per trade (scalar or per closed trade).
+    The export does not record stops, so by default 1R is the average
+    losing trade.
+    """
+    profits = closed_trades(trades)['profit'].to_numpy()
+    if risk is None:
+        losses = profits[profits < 0]
+        risk = -losses.mean() if len(losses) else np.nan
+    return profits / np.asarray(risk, dtype=float)
+
+
+def monthly_returns(equity, capital):
+    month_end = equity.resample('ME').last().ffill().to_numpy()
+    values = np.concatenate([[capital], month_end])
+    return values[1:] / values[:-1] - 1.0
+
+
+def analyze(trades, capital=100_000.0, risk_free=0.02, risk=None):
+    """Summary statistics of a trade log.
+
+    Sharpe and Sortino follow the strategy tester: monthly returns of the
+    equity against a ``risk_free`` annual rate, not annualized. The
+    drawdown is measured on closed-trade equity, whereas TradingView also
+    marks open positions, so it reads lower than the export's figure.
+    """
+    closed = closed_trades(trades)
+    profits = closed['profit'].to_numpy()
+    equity = equity_curve(trades, capital)
+    returns = monthly_returns(equity, capital)
+    excess = returns - risk_free / 12
+    volatility = returns.std() if len(returns) > 1 else np.nan
+    downside = np.sqrt(np.mean(np.minimum(excess, 0.0) ** 2)) if len(excess) else np.nan
+    r = r_multiples(trades, risk)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return {
+            'net_profit': profits.sum(),
+            'trades': len(profits),
+            'win_rate': (profits > 0).mean() if len(profits) else np.nan,
+            'profit_factor': float(metrics.profit_factor(profits)),
+            'max_drawdown': float(metrics.max_drawdown(equity.to_numpy())),
+            'sharpe': excess.mean() / volatility,
+            'sortino': excess.mean() / downside,
+            'avg_r': r.mean() if len(r) else np.nan,
+            'avg_win_r': r[r > 0].mean() if (r > 0).any() else np.nan,
+            'avg_loss_r': r[r < 0].mean() if (r < 0).any() else np.nan,
+        }
+
+
+def _analyze_file(path, engine, risk_free):
+    export = read_export(path, engine)
+    return analyze(export.trades, initial_capital(export.properties), risk_free)
+
+
+def compare_exports(paths, engine='xml', risk_free=0.02, processes=None):
+    """One row of ``analyze`` statistics per export, indexed by file name."""
+    paths = list(paths)
+    if processes:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            rows = list(executor.map(_analyze_file, paths, [engine] * len(paths), [risk_free] * len(paths)))
+    else:
+        rows = [_analyze_file(path, engine, risk_free) for path in paths]
+    index = [os.path.splitext(os.path.basename(path))[0] for path in paths]
+    return pd.DataFrame(rows, index=pd.Index(index, name='export'))
@@ -0,0 +1,229 @@
+"""Batch command line over the core modules, for scripts and headless servers.
+
+    python -m finance_scripts price options.csv -o priced.csv
+    python -m finance_scripts screen --criteria "Gross Margin" "Current Ratio" -o screened.pdf
+    python -m finance_scripts indicators bars.csv -o indicators.parquet
+    python -m finance_scripts backtest bars.csv --from 2021-11-01 -o trades.csv
+    python -m finance_scripts replay bars.csv -o trades.json
+    python -m finance_scripts mt5-report ~/mt5_bars/metrics.prom
+
+Tables are read from CSV, Parquet or JSON files by extension ('-' reads
+CSV from stdin) and written the same way to ``-o``, or as CSV to stdout.
+Summaries and errors go to stderr. Each command imports what it needs
+when it runs, so ``--help`` starts without pandas or scipy and no command
+pays for another's dependencies.
+"""
+import argparse
+import os
+import sys
+
+BAR_COLUMNS = ['open', 'high', 'low', 'close']
+OPTION_COLUMNS = ['S', 'K', 'T', 'r', 'sigma']
+
+
+def read_table(path):
+    import pandas as pd
+
+    if path == '-':
+        return pd.read_csv(sys.stdin)
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.parquet':
+        return pd.read_parquet(path)
+    if extension in ('.json', '.jsonl'):
+        return pd.read_json(path, orient='records', lines=extension == '.jsonl')
+    return pd.read_csv(path)
+
+
+def write_table(table, path=None):
+    if path in (None, '-'):
+        table.to_csv(sys.stdout, index=False)
+        return
+    extension = os.path.splitext(path)[1].lower()
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    if extension == '.parquet':
+        table.to_parquet(path, index=False)
+    elif extension in ('.json', '.jsonl'):
+        table.to_json(path, orient='records', lines=extension == '.jsonl', date_format='iso')
+    else:
+        table.to_csv(path, index=False)
+
+
+def _require(table, columns, what):
+    missing = [column for column in columns if column not in table.columns]
+    if missing:
+        raise ValueError(f"{what} need the columns {', '.join(missing)}")
+
+
+def read_bars(path):
+    """OHLC bars with an optional 'time' column (epoch seconds or dates), which becomes epoch seconds."""
+    import numpy as np
+    import pandas as pd
+
+    bars = read_table(path)
+    bars.columns = [str(column).lower() for column in bars.columns]
+    _require(bars, BAR_COLUMNS, "bars")
+    if 'time' in bars.columns and not pd.api.types.is_numeric_dtype(bars['time']):
+        bars['time'] = pd.to_datetime(bars['time']).astype('datetime64[s]').astype(np.int64)
+    return bars
+
+
+def _summary(trades, equity):
+    from finance_scripts.backtest import metrics
+
+    times = equity.index.to_numpy() if len(equity) > 1 else [0]
+    return (f"{len(trades)} trades, net profit {equity.iloc[-1] - equity.iloc[0]:.2f}, "
+            f"final equity {equity.iloc[-1]:.2f}, "
+            f"sharpe {float(metrics.sharpe_ratio(equity, metrics.periods_per_year(times))):.2f}, "
+            f"max drawdown {float(metrics.max_drawdown(equity)):.2%}")
+
+
+def price(args):
+    import numpy as np
+
+    from finance_scripts.options.pricing import black_scholes_greeks
+
+    options = read_table(args.input)
+    _require(options, OPTION_COLUMNS, "options")
+    kinds = options['option_type'].str.lower() if 'option_type' in options.columns else args.option_type
+    valuation = black_scholes_greeks(*(options[column].to_numpy(dtype=float) for column in OPTION_COLUMNS),
+                                     option_type=np.asarray(kinds))
+    write_table(options.assign(**valuation._asdict()), args.output)
+
+
+def screen(args):
+    from finance_scripts import screener
+    from finance_scripts.data.fundamentals import DEFAULT_PATH, FundamentalsStore
+    from finance_scripts.data.pipeline import FAILURE, RESULT, FetchPipeline
+    from finance_scripts.screener import CRITERIA, metrics_table, ticker_metrics
+
+    unknown = [name for name in args.criteria if name not in CRITERIA]
+    if unknown:
+        raise ValueError(f"unknown criteria {', '.join(unknown)}; expected some of {', '.join(CRITERIA)}")
+    store = FundamentalsStore(args.store or DEFAULT_PATH, offline=args.offline)
+    try:
+        if args.tickers:
+            table = read_table(args.tickers)
+            tickers = table['Ticker' if 'Ticker' in table.columns else table.columns[0]].astype(str).tolist()
+        else:
+            tickers = store.constituents()
+        pipeline = FetchPipeline(lambda ticker: ticker_metrics(store.statement(ticker, 'financials'),
+                                                               store.statement(ticker, 'balance_sheet')))
+        rows = {}
+        for event in pipeline.start(tickers):
+            if event.kind == FAILURE:
+                print(f"Error processing {event.item}: {event.value}", file=sys.stderr)
+            elif event.kind == RESULT:
+                rows[event.item] = event.value
+    finally:
+        store.close()
+
+    selected = screener.screen(metrics_table(rows, tickers), [CRITERIA[name] for name in args.criteria],
+                               sort_by=args.sort_by)
+    print(f"{len(selected)} of {len(tickers)} tickers meet {', '.join(args.criteria)}", file=sys.stderr)
+    if args.output and args.output.lower().endswith('.pdf'):
+        from finance_scripts.screener_report import write_pdf
+
+        write_pdf(selected, args.output)
+    else:
+        write_table(selected.reset_index(), args.output)
+
+
+def indicators(args):
+    from finance_scripts.mt5bot.indicators import IndicatorState
+
+    bars = read_bars(args.input)
+    state = IndicatorState(adx_period=args.adx_period, cci_period=args.cci_period)
+    write_table(bars.assign(**state.warm_up(bars['high'], bars['low'], bars['close'])), args.output)
+
+
+def backtest(args):
+    from finance_scripts.backtest import follow_the_line
+
+    bars = read_bars(args.input)
+    result = follow_the_line.backtest(bars, trade_from=args.trade_from)
+    print(_summary(result.trades, result.equity), file=sys.stderr)
+    write_table(result.trades, args.output)
+
+
+def replay(args):
+    from finance_scripts.mt5bot.replay import replay as replay_strategy
+
+    bars = read_bars(args.input)
+    if 'time' not in bars.columns:
+        raise ValueError("replayed bars need a 'time' column")
+    telemetry = None
+    if args.metrics:
+        from finance_scripts.mt5bot.telemetry import Telemetry
+
+        telemetry = Telemetry()
+    result = replay_strategy(bars.to_records(index=False), symbol=args.symbol, adx_period=args.adx_period,
+                             cci_period=args.cci_period, telemetry=telemetry)
+    print(_summary(result.trades, result.equity), file=sys.stderr)
+    if telemetry is not None:
+        telemetry.write(args.metrics)
+    write_table(result.trades, args.output)
+
+
+def mt5_report(args):
+    from finance_scripts.mt5bot.telemetry import read_prometheus, report
+
+    print(report(*read_prometheus(args.input)))
+
+
+def parser():
+    main_parser = argparse.ArgumentParser(prog='python -m finance_scripts', description=__doc__.split('\n')[0])
+    commands = main_parser.add_subparsers(dest='command', required=True)
+
+    command = commands.add_parser('price', help="Black-Scholes prices and Greeks of a table of options")
+    command.add_argument('input', help="table with S, K, T, r, sigma and optionally option_type columns")
+    command.add_argument('--option-type', default='call', choices=['call', 'put'],
+                         help="side of options without an option_type column")
+    command.set_defaults(run=price)
+
+    command = commands.add_parser('screen', help="screen fundamentals of the S&P 500 or a ticker list")
+    command.add_argument('--tickers', help="table whose Ticker (or first) column lists the tickers")
+    command.add_argument('--criteria', nargs='+', default=['Revenue Growth', 'Gross Margin', 'Operating Margin',
+                                                           'Net Margin', 'Current Ratio'])
+    command.add_argument('--sort-by', help="metric column to sort the results by, highest first")
+    command.add_argument('--store', help="fundamentals database (default ~/.finance_scripts/fundamentals.sqlite)")
+    command.add_argument('--offline', action='store_true', help="only use statements already in the store")
+    command.set_defaults(run=screen)
+
+    command = commands.add_parser('indicators', help="the MT5 bot's ADX, DI, CCI and Royal Scalping columns")
+    command.add_argument('input', help="table of open, high, low, close bars")
+    command.set_defaults(run=indicators)
+
+    command = commands.add_parser('backtest', help="backtest the follow-the-line strategy on bars")
+    command.add_argument('input', help="table of open, high, low, close bars, with an optional time column")
+    command.add_argument('--from', dest='trade_from', help="first date on which entries are taken")
+    command.set_defaults(run=backtest)
+
+    command = commands.add_parser('replay', help="replay the MT5 bot's strategy on bars")
+    command.add_argument('input', help="table of time, open, high, low, close and optional spread bars")
+    command.add_argument('--symbol', default='SP500')
+    command.add_argument('--metrics', help="also time every stage and broker call into this file (see mt5-report)")
+    command.set_defaults(run=replay)
+
+    command = commands.add_parser('mt5-report', help="p50/p99 latency per stage and broker call of the MT5 bot")
+    command.add_argument('input', help="metrics file the bot writes (~/mt5_bars/metrics.prom)")
+    command.set_defaults(run=mt5_report)
+
+    for name in ('indicators', 'replay'):
+        commands.choices[name].add_argument('--adx-period', type=int, default=21)
+        commands.choices[name].add_argument('--cci-period', type=int, default=1000)
+    for name, command in commands.choices.items():
+        if name == 'mt5-report':
+            continue
+        command.add_argument('-o', '--output', help="output file (.csv, .parquet, .json, .jsonl; screen also .pdf); "
+                                                    "CSV on stdout by default")
+    return main_parser
+
+
+def main(argv=None):
+    args = parser().parse_args(argv)
+    try:
+        args.run(args)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    return 0
@@ -0,0 +1 @@
+"""Market data access with local caching for the Finance-scripts tools."""
@@ -0,0 +1,212 @@
+"""Local SQLite store of financial statements and index constituents.
+
+Every (ticker, statement) pair is kept as one snapshot row: the statement
+frame (line items x period end dates, as yfinance returns it) in JSON
+'split' form, when it was fetched and its latest period. A snapshot is
+refreshed from the provider when it is older than ``ttl``, or once its next
+filing is due: one statement period plus ``filing_lag`` after the latest
+period end, rechecked at most every ``recheck`` until the new period shows
+up. With the default ``ttl`` of 90 days a statement thus goes back to the
+network about once a quarter, and soon after each new filing is due,
+instead of on every run.
+
+A provider is anything with ``statement(ticker, name)`` returning such a
+frame (empty when there is none) and ``constituents()`` returning the
+index's ticker list. ``YahooProvider`` scrapes the S&P 500 table from
+Wikipedia and reads statements through yfinance; ``FrameProvider`` serves
+prepared frames, for offline runs and tests, and ``ThrottledProvider``
+makes any provider slow and rate-limited on purpose. With ``offline=True`` the
+store never calls its provider and answers from whatever it holds, stale
+or not.
+"""
+from datetime import datetime, timedelta, timezone
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+
+from finance_scripts.data.pipeline import RateLimited
+
+DEFAULT_PATH = os.path.join(os.path.expanduser('~'), '.finance_scripts', 'fundamentals.sqlite')
+SP500_URL = 'https://en.wikipedia.org/wiki/List_of_S%26P_500_companies'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS statements (
+    ticker TEXT NOT NULL,
+    name TEXT NOT NULL,
+    fetched REAL NOT NULL,
+    latest_period TEXT,
+    frame TEXT NOT NULL,
+    PRIMARY KEY (ticker, name)
+);
+CREATE TABLE IF NOT EXISTS lists (
+    name TEXT PRIMARY KEY,
+    fetched REAL NOT NULL,
+    symbols TEXT NOT NULL
+);
+"""
+
+
+class YahooProvider:
+    """S&P 500 constituents from Wikipedia, statements from yfinance."""
+
+    def constituents(self):
+        return pd.read_html(SP500_URL)[0]['Symbol'].tolist()
+
+    def statement(self, ticker, name):
+        import yfinance as yf
+
+        return getattr(yf.Ticker(ticker), name)
+
+
+class FrameProvider:
+    """Serves ``{(ticker, name): frame}`` and a constituents list, recording each call."""
+
+    def __init__(self, statements, constituents=()):
+        self.statements = statements
+        self.symbols = list(constituents)
+        self.calls = []
+
+    def constituents(self):
+        self.calls.append(('constituents',))
+        return list(self.symbols)
+
+    def statement(self, ticker, name):
+        self.calls.append((ticker, name))
+        return self.statements.get((ticker, name), pd.DataFrame())
+
+
+class ThrottledProvider:
+    """Wraps a provider to behave like a busy remote service, for tests and benchmarks.
+
+    Each statement call sleeps ``latency`` seconds, and longer once more
+    than half of ``capacity`` calls are in flight, as a queueing server
+    would. A call beyond ``capacity`` raises ``RateLimited`` at once, and
+    any other call fails with ``ConnectionError`` with probability
+    ``error_rate``. ``calls`` records the outcome of each call.
+    """
+
+    def __init__(self, provider, latency=0.2, capacity=8, error_rate=0.0, seed=None):
+        self.provider = provider
+        self.latency, self.capacity, self.error_rate = latency, capacity, error_rate
+        self.calls = []
+        self.active = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def constituents(self):
+        return self.provider.constituents()
+
+    def statement(self, ticker, name):
+        with self._lock:
+            if self.active >= self.capacity:
+                self.calls.append((ticker, name, 'throttled'))
+                raise RateLimited(f"429 Too Many Requests: {ticker} {name}")
+            self.active += 1
+            load = self.active
+            failed = self._rng.random() < self.error_rate
+        try:
+            time.sleep(self.latency * max(1.0, 2.0 * load / self.capacity))
+            if failed:
+                raise ConnectionError(f"connection reset fetching {ticker} {name}")
+            return self.provider.statement(ticker, name)
+        finally:
+            with self._lock:
+                self.active -= 1
+                self.calls.append((ticker, name, 'failed' if failed else 'ok'))
+
+
+def period_length(name):
+    """Days between the period ends of a statement: quarterly or annual."""
+    return timedelta(days=91 if name.startswith('quarterly') else 365)
+
+
+def _encode(frame):
+    return json.dumps({
+        'index': [str(item) for item in frame.index],
+        'columns': [pd.Timestamp(column).isoformat() for column in frame.columns],
+        'data': frame.to_numpy(dtype=float, na_value=float('nan')).tolist(),
+    })
+
+
+def _decode(text):
+    data = json.loads(text)
+    return pd.DataFrame(data['data'], index=data['index'], columns=pd.DatetimeIndex(data['columns']), dtype=float)
+
+
+class FundamentalsStore:
+    """Statement snapshots and constituent lists in one SQLite file, safe to share across threads."""
+
+    def __init__(self, path=DEFAULT_PATH, provider=None, ttl=timedelta(days=90), filing_lag=timedelta(days=90),
+                 recheck=timedelta(days=1), offline=False):
+        self.path = path
+        self.provider = YahooProvider() if provider is None else provider
+        self.ttl, self.filing_lag, self.recheck = ttl, filing_lag, recheck
+        self.offline = offline
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._db:
+            self._db.executescript(_SCHEMA)
+
+    def close(self):
+        self._db.close()
+
+    def _now(self):
+        return datetime.now(timezone.utc)
+
+    def stale(self, fetched, latest_period, name, now=None):
+        """Whether a snapshot fetched at ``fetched`` (epoch seconds) needs refreshing."""
+        now = self._now() if now is None else now
+        age = now - datetime.fromtimestamp(fetched, timezone.utc)
+        if age > self.ttl:
+            return True
+        if latest_period is None:
+            return False
+        due = pd.Timestamp(latest_period).tz_localize('UTC').to_pydatetime() + period_length(name) + self.filing_lag
+        return now >= due and age > self.recheck
+
+    def statement(self, ticker, name):
+        """The ``name`` statement of ``ticker`` (e.g. 'financials', 'balance_sheet')."""
+        with self._lock:
+            row = self._db.execute('SELECT fetched, latest_period, frame FROM statements WHERE ticker = ? AND name = ?',
+                                   (ticker, name)).fetchone()
+        if row is not None and (self.offline or not self.stale(row[0], row[1], name)):
+            return _decode(row[2])
+        if self.offline:
+            return pd.DataFrame()
+
+        frame = self.provider.statement(ticker, name)
+        frame = pd.DataFrame() if frame is None else frame
+        if frame.empty and row is not None:
+            # Nothing came back: keep serving the old snapshot and ask again after ``recheck``.
+            with self._lock, self._db:
+                self._db.execute('UPDATE statements SET fetched = ? WHERE ticker = ? AND name = ?',
+                                 (self._now().timestamp(), ticker, name))
+            return _decode(row[2])
+        # Empty statements are stored too, so tickers without data wait for the ttl.
+        latest = max(pd.to_datetime(frame.columns), default=None)
+        with self._lock, self._db:
+            self._db.execute('INSERT OR REPLACE INTO statements VALUES (?, ?, ?, ?, ?)',
+                             (ticker, name, self._now().timestamp(),
+                              None if latest is None or pd.isna(latest) else latest.isoformat(), _encode(frame)))
+        return frame
+
+    def constituents(self, name='sp500', ttl=timedelta(days=1)):
+        """The provider's constituent list, cached for ``ttl``."""
+        with self._lock:
+            row = self._db.execute('SELECT fetched, symbols FROM lists WHERE name = ?', (name,)).fetchone()
+        fresh = row is not None and self._now() - datetime.fromtimestamp(row[0], timezone.utc) <= ttl
+        if row is not None and (fresh or self.offline):
+            return json.loads(row[1])
+        if self.offline:
+            return []
+        symbols = list(self.provider.constituents())
+        with self._lock, self._db:
+            self._db.execute('INSERT OR REPLACE INTO lists VALUES (?, ?, ?)',
+                             (name, self._now().timestamp(), json.dumps(symbols)))
+        return symbols
@@ -0,0 +1,229 @@
+"""Local daily price store with incremental refresh, and ``fetch_data``.
+
+Adjusted closes are kept one file per ticker (``<root>/<ticker>.bin``) as
+raw records of ``PRICE_DTYPE``, next to a small ``<ticker>.json`` holding
+the date range that has already been asked of the source. A refresh only
+requests the parts of a range outside that coverage: the head before it
+and the tail after it. Each reaches all the way to the coverage, even for
+a range that does not overlap it, so the coverage stays one unbroken
+range and never claims a gap nothing was fetched for. Coverage never reaches past yesterday, whose bar
+may still have been forming somewhere in the world when it was fetched,
+so the newest days are asked for again. Tickers missing the same range
+are fetched in one call.
+
+Adjusted closes are rescaled back to the first bar on every split and
+dividend, so a stored series can only be extended with closes adjusted
+the same way. Each head or tail request therefore overlaps the coverage by
+``OVERLAP`` days. When the overlapping closes disagree with the stored ones,
+the history has been re-adjusted since it was stored. The ticker's whole
+range is then fetched again and replaces the file, rather than leaving a
+jump at the seam.
+
+A source is anything with ``download(tickers, start, end)`` returning a
+(dates x tickers) frame of adjusted closes, ``end`` exclusive and NaN
+where a ticker has no price. ``YahooSource`` is the yfinance one and
+``FrameSource`` serves a prepared frame, for offline runs and tests. With
+``offline=True`` the store never calls its source and answers from disk.
+"""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+PRICE_DTYPE = np.dtype([
+    ('date', '<M8[D]'),
+    ('close', '<f8'),
+])
+DEFAULT_ROOT = os.path.join(os.path.expanduser('~'), '.finance_scripts', 'prices')
+# Stored days fetched again with each head or tail, to detect re-adjusted history.
+OVERLAP = np.timedelta64(7, 'D')
+# Relative difference between a stored and a refetched close that means the history was re-adjusted.
+ADJUSTMENT_TOLERANCE = 1e-6
+
+
+class YahooSource:
+    """Adjusted daily closes from Yahoo Finance through yfinance."""
+
+    def download(self, tickers, start, end):
+        import yfinance as yf
+
+        data = yf.download(list(tickers), start=str(start), end=str(end), auto_adjust=False,
+                           progress=False)['Adj Close']
+        return data.to_frame(tickers[0]) if isinstance(data, pd.Series) else data
+
+
+class FrameSource:
+    """Serves slices of a (dates x tickers) price frame and records each call."""
+
+    def __init__(self, prices):
+        self.prices = prices
+        self.calls = []
+
+    def download(self, tickers, start, end):
+        self.calls.append((tuple(tickers), start, end))
+        dates = self.prices.index.values.astype('datetime64[D]')
+        rows = (dates >= start) & (dates < end)
+        return self.prices.loc[rows, [t for t in tickers if t in self.prices.columns]]
+
+
+def _day(value):
+    return np.datetime64(pd.Timestamp(value).date(), 'D')
+
+
+class PriceStore:
+    """Adjusted closes of any number of tickers under one directory."""
+
+    def __init__(self, root=DEFAULT_ROOT, source=None, offline=False):
+        self.root = root
+        self.source = YahooSource() if source is None else source
+        self.offline = offline
+
+    def path(self, ticker):
+        return os.path.join(self.root, f'{ticker}.bin')
+
+    def prices(self, ticker):
+        """Every stored record of ``ticker``, oldest first."""
+        path = self.path(ticker)
+        if not os.path.exists(path):
+            return np.empty(0, dtype=PRICE_DTYPE)
+        return np.fromfile(path, dtype=PRICE_DTYPE)
+
+    def coverage(self, ticker):
+        """The ``(start, end)`` range already requested for ``ticker``, or None."""
+        path = os.path.join(self.root, f'{ticker}.json')
+        if not os.path.exists(path):
+            return None
+        with open(path) as handle:
+            meta = json.load(handle)
+        return np.datetime64(meta['start'], 'D'), np.datetime64(meta['end'], 'D')
+
+    def missing(self, ticker, start, end):
+        """Date ranges the source still has to be asked for to cover ``[start, end)``.
+
+        They join onto the existing coverage: a range entirely before or
+        after it is extended up to it, and both reach ``OVERLAP`` days into
+        it.
+        """
+        start, end = _day(start), _day(end)
+        covered = self.coverage(ticker)
+        if covered is None:
+            return [(start, end)] if start < end else []
+        covered_start, covered_end = covered
+        ranges = []
+        if start < covered_start:
+            ranges.append((start, min(covered_start + OVERLAP, covered_end)))
+        if end > covered_end:
+            ranges.append((max(covered_end - OVERLAP, covered_start), end))
+        return ranges
+
+    def refresh(self, tickers, start, end):
+        """Fetch what the store lacks of ``[start, end)``; return ``{ticker: error}``.
+
+        A ticker whose fetch fails, or that comes back without a single
+        price while nothing is stored for it, is not marked as covered and
+        will be asked for again next time. A ticker whose history was
+        re-adjusted is fetched again over its whole range.
+        """
+        if self.offline:
+            return {}
+        groups = {}
+        for ticker in dict.fromkeys(tickers):
+            for window in self.missing(ticker, start, end):
+                groups.setdefault(window, []).append(ticker)
+
+        errors = {}
+        readjusted = {}
+        for (first, stop), group in groups.items():
+            for ticker in self._fetch(group, first, stop, errors):
+                covered = self.coverage(ticker)
+                previous = readjusted.get(ticker, (first, stop))
+                readjusted[ticker] = (min(first, covered[0], previous[0]), max(stop, covered[1], previous[1]))
+        groups = {}
+        for ticker, window in readjusted.items():
+            groups.setdefault(window, []).append(ticker)
+        for (first, stop), group in groups.items():
+            self._fetch(group, first, stop, errors, replace=True)
+        return errors
+
+    def _fetch(self, group, first, stop, errors, replace=False):
+        """Download ``[first, stop)`` for ``group`` and store it; return the tickers found re-adjusted."""
+        try:
+            data = self.source.download(group, first, stop)
+        except Exception as e:
+            errors.update(dict.fromkeys(group, e))
+            return []
+        readjusted = []
+        for ticker in group:
+            column = data[ticker].dropna() if ticker in data.columns else pd.Series(dtype=float)
+            if not self._write(ticker, column, first, stop, replace):
+                readjusted.append(ticker)
+        return readjusted
+
+    def _write(self, ticker, column, first, stop, replace=False):
+        """Merge fetched closes into the store, or with ``replace`` overwrite it.
+
+        Returns False, storing nothing, when closes on covered dates differ
+        from the stored ones.
+        """
+        stored = np.empty(0, dtype=PRICE_DTYPE) if replace else self.prices(ticker)
+        covered = None if replace else self.coverage(ticker)
+        if column.empty and not len(stored):
+            return True
+        fetched = np.empty(len(column), dtype=PRICE_DTYPE)
+        fetched['date'] = column.index.values.astype('datetime64[D]')
+        fetched['close'] = column.to_numpy(dtype=float)
+        if covered is not None:
+            _, new, old = np.intersect1d(fetched['date'], stored['date'], return_indices=True)
+            inside = (stored['date'][old] >= covered[0]) & (stored['date'][old] < covered[1])
+            if not np.allclose(fetched['close'][new[inside]], stored['close'][old[inside]],
+                               rtol=ADJUSTMENT_TOLERANCE, atol=0.0):
+                return False
+        kept = stored[(stored['date'] < first) | (stored['date'] >= stop)]
+        merged = np.concatenate([kept, fetched])
+        merged = merged[np.argsort(merged['date'], kind='stable')]
+
+        stop = min(stop, np.datetime64('today', 'D') - 1)
+        if covered is not None:
+            first, stop = min(first, covered[0]), max(stop, covered[1])
+
+        os.makedirs(self.root, exist_ok=True)
+        path = self.path(ticker)
+        merged.tofile(path + '.tmp')
+        os.replace(path + '.tmp', path)
+        with open(os.path.join(self.root, f'{ticker}.json'), 'w') as handle:
+            json.dump({'start': str(first), 'end': str(stop)}, handle)
+        return True
+
+    def load(self, tickers, start, end):
+        """Stored closes in ``[start, end)`` as a (dates x tickers) frame, NaN where missing."""
+        start, end = _day(start), _day(end)
+        columns = {}
+        for ticker in tickers:
+            stored = self.prices(ticker)
+            stored = stored[(stored['date'] >= start) & (stored['date'] < end)]
+            columns[ticker] = pd.Series(stored['close'], index=pd.DatetimeIndex(stored['date'], name='Date'))
+        frame = pd.DataFrame(columns, columns=list(tickers))
+        frame.index.name = 'Date'
+        return frame
+
+
+def fetch_data(tickers, start_date="2010-01-01", end_date="2024-02-05", store=None):
+    """Adjusted closes of the valid ``tickers``, on the dates where all of them trade.
+
+    Prices come from ``store`` (a ``PriceStore`` under ``DEFAULT_ROOT`` by
+    default), which is refreshed first. Stored series hold no NaN, so a
+    ticker is valid when the store has any price for it in the range.
+    """
+    store = PriceStore() if store is None else store
+    for ticker, e in store.refresh(tickers, start_date, end_date).items():
+        print(f"Error downloading {ticker}: {e}")
+    prices = store.load(tickers, start_date, end_date)
+    valid_tickers = [ticker for ticker in prices.columns if prices[ticker].notna().any()]
+    if not valid_tickers:
+        raise ValueError("No valid tickers available for the specified date range.")
+    data = prices[valid_tickers]
+    if data.isnull().sum().sum() > 0:
+        print("Warning: NaN values found and are being dropped.")
+        data = data.dropna()
+    return data
@@ -0,0 +1 @@
+"""Indicators and plumbing behind the MetaTrader5 trading bot."""
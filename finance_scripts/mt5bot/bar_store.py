@@ -0,0 +1,81 @@
+"""On-disk OHLC bar store with incremental refresh from MetaTrader5.
+
+Bars are kept as raw records of the MT5 rates dtype, one file per symbol and
+timeframe (``<root>/<symbol>/<timeframe>.bin``), and read back through
+``np.memmap`` so the indicator code works on views of the file instead of
+copies. A refresh asks the terminal only for bars from the last stored bar
+onwards. That bar is always fetched again: it may have been the forming bar
+when it was stored, or the broker may have rewritten it, so everything from
+the first fetched bar on replaces what the store held.
+"""
+from datetime import datetime, timedelta, timezone
+import os
+
+import numpy as np
+
+RATES_DTYPE = np.dtype([
+    ('time', '<i8'),
+    ('open', '<f8'),
+    ('high', '<f8'),
+    ('low', '<f8'),
+    ('close', '<f8'),
+    ('tick_volume', '<u8'),
+    ('spread', '<i4'),
+    ('real_volume', '<u8'),
+])
+
+
+class BarStore:
+    """Bars of any number of symbols/timeframes under one directory.
+
+    ``source`` is the ``MetaTrader5`` module or anything exposing the same
+    ``copy_rates_range`` call.
+    """
+
+    def __init__(self, root, source):
+        self.root = root
+        self.source = source
+
+    def path(self, symbol, timeframe):
+        return os.path.join(self.root, symbol, f'{timeframe}.bin')
+
+    def bars(self, symbol, timeframe):
+        """Read-only memory-mapped view of every stored bar, oldest first."""
+        path = self.path(symbol, timeframe)
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            return np.empty(0, dtype=RATES_DTYPE)
+        return np.memmap(path, dtype=RATES_DTYPE, mode='r')
+
+    def closed_bars(self, symbol, timeframe):
+        """Stored bars minus the newest one, which may still be forming."""
+        return self.bars(symbol, timeframe)[:-1]
+
+    def update(self, symbol, timeframe, start=datetime(2017, 9, 18, tzinfo=timezone.utc)):
+        """Fetch bars newer than the store holds; return the first changed index.
+
+        ``start`` only matters for an empty store. The returned index is where
+        the rewritten tail begins, i.e. every stored bar before it is
+        unchanged; it equals the number of stored bars when nothing arrived.
+        """
+        stored = self.bars(symbol, timeframe)
+        if len(stored):
+            start = datetime.fromtimestamp(int(stored['time'][-1]), tz=timezone.utc)
+        # Bar times are broker server time, which can run hours ahead of UTC,
+        # so the request window is left open a day into the future.
+        end = datetime.now(timezone.utc) + timedelta(days=1)
+        rates = self.source.copy_rates_range(symbol, timeframe, start, end)
+        if rates is None or len(rates) == 0:
+            return len(stored)
+
+        fetched = np.empty(len(rates), dtype=RATES_DTYPE)
+        for name in RATES_DTYPE.names:
+            fetched[name] = rates[name]
+        first_changed = int(np.searchsorted(stored['time'], fetched['time'][0]))
+        del stored  # release the map before the file is truncated
+
+        path = self.path(symbol, timeframe)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'ab') as handle:
+            handle.truncate(first_changed * RATES_DTYPE.itemsize)
+            handle.write(fetched.tobytes())
+        return first_changed
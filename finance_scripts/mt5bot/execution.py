@@ -0,0 +1,161 @@
+"""Order execution for one decision cycle of the MT5 bot.
+
+A ``DecisionCycle`` takes a single positions snapshot and a single tick
+snapshot when it starts, so the strategy can inspect positions and price
+orders as often as it likes without another broker round-trip. Orders are
+queued while the strategy runs and sent together by ``submit``: closes
+first, grouped by direction and de-duplicated by ticket, then new orders in
+the order they were queued so paired orders leave back to back. Every
+``order_send`` is timed and its slippage recorded in ``ExecutionStats``.
+"""
+from collections import deque
+import time
+from typing import NamedTuple
+
+
+class OrderRecord(NamedTuple):
+    symbol: str
+    comment: str
+    order_type: int
+    volume: float
+    requested_price: float
+    fill_price: float
+    # Price difference against us, in price units (positive = worse fill).
+    slippage: float
+    # Seconds from order_send to its return.
+    latency: float
+    retcode: int
+
+
+class ExecutionStats:
+    """Rolling log of sent orders with latency and slippage summaries."""
+
+    def __init__(self, maxlen=10_000):
+        self.records = deque(maxlen=maxlen)
+        self.broker_calls = 0
+
+    def record(self, record):
+        self.records.append(record)
+
+    def summary(self):
+        if not self.records:
+            return {'orders': 0, 'broker_calls': self.broker_calls}
+        latencies = sorted(r.latency for r in self.records)
+        filled = [r for r in self.records if r.fill_price is not None]
+
+        def quantile(q):
+            return latencies[min(int(q * len(latencies)), len(latencies) - 1)]
+
+        return {
+            'orders': len(self.records),
+            'filled': len(filled),
+            'broker_calls': self.broker_calls,
+            'latency_p50': quantile(0.50),
+            'latency_p99': quantile(0.99),
+            'latency_max': latencies[-1],
+            'mean_slippage': sum(r.slippage for r in filled) / len(filled) if filled else 0.0,
+        }
+
+
+class OrderExecutor:
+    """Entry point of the execution layer for one ``mt`` module."""
+
+    def __init__(self, mt, stats=None, timer=time.perf_counter):
+        self.mt = mt
+        self.stats = stats or ExecutionStats()
+        self.timer = timer
+
+    def cycle(self, symbol):
+        return DecisionCycle(self, symbol)
+
+    def send(self, request, comment):
+        mt = self.mt
+        start = self.timer()
+        result = mt.order_send(request)
+        latency = self.timer() - start
+        self.stats.broker_calls += 1
+
+        requested = request['price']
+        fill = getattr(result, 'price', None) or None
+        if fill is None:
+            slippage = 0.0
+        elif request['type'] == mt.ORDER_TYPE_BUY:
+            slippage = fill - requested
+        else:
+            slippage = requested - fill
+        self.stats.record(OrderRecord(
+            symbol=request['symbol'], comment=comment, order_type=request['type'],
+            volume=request['volume'], requested_price=requested, fill_price=fill,
+            slippage=slippage, latency=latency, retcode=getattr(result, 'retcode', None),
+        ))
+        return result
+
+
+class DecisionCycle:
+    """Snapshots and queued orders of one pass of a strategy over a symbol."""
+
+    def __init__(self, executor, symbol):
+        self.executor = executor
+        self.symbol = symbol
+        mt = executor.mt
+        self.positions = tuple(mt.positions_get(symbol=symbol) or ())
+        self.tick = mt.symbol_info_tick(symbol)
+        executor.stats.broker_calls += 2
+        self._opens = []
+        self._closes = {}
+
+    def _price(self, order_type):
+        mt = self.executor.mt
+        return self.tick.ask if order_type == mt.ORDER_TYPE_BUY else self.tick.bid
+
+    def buy(self, volume, comment, sl=None, tp=None):
+        self._opens.append((self.executor.mt.ORDER_TYPE_BUY, volume, comment, sl, tp))
+
+    def sell(self, volume, comment, sl=None, tp=None):
+        self._opens.append((self.executor.mt.ORDER_TYPE_SELL, volume, comment, sl, tp))
+
+    def close(self, position, comment):
+        """Queue a full close of ``position``; repeated closes of a ticket are dropped."""
+        self._closes.setdefault(position.ticket, (position, comment))
+
+    def open_positions(self, order_type=None):
+        """Snapshot positions not already queued for closing, optionally by type."""
+        return [p for p in self.positions
+                if p.ticket not in self._closes and (order_type is None or p.type == order_type)]
+
+    def submit(self):
+        """Send queued closes (grouped by direction), then queued opens."""
+        mt = self.executor.mt
+        results = []
+        closes = sorted(self._closes.values(), key=lambda item: item[0].type)
+        for position, comment in closes:
+            order_type = mt.ORDER_TYPE_SELL if position.type == mt.ORDER_TYPE_BUY else mt.ORDER_TYPE_BUY
+            request = {
+                "action": mt.TRADE_ACTION_DEAL,
+                "symbol": self.symbol,
+                "volume": position.volume,
+                "type": order_type,
+                "position": position.ticket,
+                "price": self._price(order_type),
+                "comment": comment,
+                "type_time": mt.ORDER_TIME_GTC,
+                "type_filling": mt.ORDER_FILLING_IOC,
+            }
+            results.append(self.executor.send(request, comment))
+        for order_type, volume, comment, sl, tp in self._opens:
+            request = {
+                "action": mt.TRADE_ACTION_DEAL,
+                "symbol": self.symbol,
+                "volume": volume,
+                "type": order_type,
+                "price": self._price(order_type),
+                "sl": sl,
+                "tp": tp,
+                "comment": comment,
+                "type_time": mt.ORDER_TIME_GTC,
+                "type_filling": mt.ORDER_FILLING_IOC,
+            }
+            results.append(self.executor.send(request, comment))
+        self._opens.clear()
+        self._closes.clear()
+        return results
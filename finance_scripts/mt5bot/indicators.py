@@ -0,0 +1,179 @@
+"""Incremental indicator state for the MT5 bot.
+
+Each indicator is an object that is fed one closed bar at a time. Warming it
+up on the history once and then calling ``update`` for every new bar yields
+the same values as recomputing over the whole history, at a per-bar cost
+that does not grow with the length of that history.
+"""
+from collections import deque
+import math
+
+import numpy as np
+
+COLUMNS = ('ADX', '+DI', '-DI', 'CCI', 'Royal_Scalping')
+
+
+class ADXState:
+    """ADX with +DI/-DI, as computed by the bot's ``calculate_adx``.
+
+    Directional movement is smoothed with an EMA of ``alpha = 2 / (period + 1)``
+    and the first bar yields zeros, exactly like the original buffers.
+    """
+
+    def __init__(self, period=21):
+        self.period = period
+        self.alpha = 2 / (period + 1)
+        self.adx = self.pdi = self.ndi = 0.0
+        self._previous_bar = None
+
+    def update(self, high, low, close):
+        if self._previous_bar is None:
+            self._previous_bar = (high, low, close)
+            return self.adx, self.pdi, self.ndi
+        prev_high, prev_low, prev_close = self._previous_bar
+        self._previous_bar = (high, low, close)
+
+        tmp_pos = high - prev_high
+        tmp_neg = prev_low - low
+        if tmp_pos < 0.0:
+            tmp_pos = 0.0
+        if tmp_neg < 0.0:
+            tmp_neg = 0.0
+        if tmp_pos > tmp_neg:
+            tmp_neg = 0.0
+        elif tmp_pos < tmp_neg:
+            tmp_pos = 0.0
+        else:
+            tmp_pos = tmp_neg = 0.0
+
+        tr = max(max(abs(high - low), abs(high - prev_close)), abs(low - prev_close))
+        if tr != 0.0:
+            pos_dm = 100.0 * tmp_pos / tr
+            neg_dm = 100.0 * tmp_neg / tr
+        else:
+            pos_dm = neg_dm = 0.0
+
+        alpha = self.alpha
+        self.pdi = alpha * pos_dm + (1 - alpha) * self.pdi
+        self.ndi = alpha * neg_dm + (1 - alpha) * self.ndi
+
+        total = self.pdi + self.ndi
+        dx = 100.0 * abs((self.pdi - self.ndi) / total) if total != 0.0 else 0.0
+        self.adx = alpha * dx + (1 - alpha) * self.adx
+        return self.adx, self.pdi, self.ndi
+
+
+class CCIState:
+    """Commodity Channel Index over the typical price, TA-Lib conventions.
+
+    The mean deviation has no running form, so each bar reduces the last
+    ``period`` typical prices; the cost is fixed by ``period`` and does not
+    depend on how much history has been seen. Values are NaN until ``period``
+    bars have arrived.
+    """
+
+    def __init__(self, period=1000):
+        self.period = period
+        self.value = math.nan
+        # Twice the window so the live window stays contiguous; it is moved
+        # back to the front once every ``period`` bars.
+        self._buffer = np.empty(2 * period)
+        self._size = 0
+
+    def update(self, high, low, close):
+        if self._size == self._buffer.size:
+            keep = self.period - 1
+            self._buffer[:keep] = self._buffer[self._size - keep:self._size]
+            self._size = keep
+        typical = (high + low + close) / 3.0
+        self._buffer[self._size] = typical
+        self._size += 1
+        if self._size < self.period:
+            return self.value
+
+        window = self._buffer[self._size - self.period:self._size]
+        mean = window.mean()
+        mean_deviation = np.abs(window - mean).mean()
+        deviation = typical - mean
+        if deviation != 0.0 and mean_deviation != 0.0:
+            self.value = float(deviation / (0.015 * mean_deviation))
+        else:
+            self.value = 0.0
+        return self.value
+
+
+class RoyalScalpingState:
+    """Oscillator behind the ``Royal_Scalping`` column read by the strategy.
+
+    The bot only ever left a placeholder for this indicator, and the strategy
+    treats it as a 0-100 oscillator with 80/20 bands, so it is implemented as
+    a smoothed stochastic %K. Rolling extremes are kept in monotonic deques,
+    so each bar costs amortized O(1).
+    """
+
+    def __init__(self, period=14, smoothing=3):
+        self.period = period
+        self.value = math.nan
+        self._index = 0
+        self._highs = deque()
+        self._lows = deque()
+        self._raw = deque(maxlen=smoothing)
+
+    def update(self, high, low, close):
+        index = self._index
+        self._index += 1
+        while self._highs and self._highs[-1][1] <= high:
+            self._highs.pop()
+        self._highs.append((index, high))
+        while self._lows and self._lows[-1][1] >= low:
+            self._lows.pop()
+        self._lows.append((index, low))
+        oldest = index - self.period + 1
+        if self._highs[0][0] < oldest:
+            self._highs.popleft()
+        if self._lows[0][0] < oldest:
+            self._lows.popleft()
+        if oldest < 0:
+            return self.value
+
+        highest, lowest = self._highs[0][1], self._lows[0][1]
+        self._raw.append(100.0 * (close - lowest) / (highest - lowest) if highest != lowest else 50.0)
+        if len(self._raw) == self._raw.maxlen:
+            self.value = sum(self._raw) / len(self._raw)
+        return self.value
+
+
+class IndicatorState:
+    """All indicators the strategy reads, with the last two closed-bar rows.
+
+    ``current`` and ``previous`` map each name in ``COLUMNS`` to its value on
+    the latest and the one-before-latest closed bar.
+    """
+
+    def __init__(self, adx_period=21, cci_period=1000, royal_scalping_period=14):
+        self.adx = ADXState(adx_period)
+        self.cci = CCIState(cci_period)
+        self.royal_scalping = RoyalScalpingState(royal_scalping_period)
+        self.current = dict.fromkeys(COLUMNS, math.nan)
+        self.previous = dict.fromkeys(COLUMNS, math.nan)
+
+    def update(self, high, low, close):
+        high, low, close = float(high), float(low), float(close)
+        adx, pdi, ndi = self.adx.update(high, low, close)
+        self.previous = self.current
+        self.current = {
+            'ADX': adx,
+            '+DI': pdi,
+            '-DI': ndi,
+            'CCI': self.cci.update(high, low, close),
+            'Royal_Scalping': self.royal_scalping.update(high, low, close),
+        }
+        return self.current
+
+    def warm_up(self, high, low, close):
+        """Feed a block of history and return every column as an array."""
+        history = {name: np.empty(len(close)) for name in COLUMNS}
+        for i, bar in enumerate(zip(high, low, close)):
+            for name, value in self.update(*bar).items():
+                history[name][i] = value
+        return history
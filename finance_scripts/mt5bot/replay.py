@@ -0,0 +1,223 @@
+"""Offline MetaTrader5 stand-in that replays stored bars.
+
+``ReplayMT5`` implements the part of the ``MetaTrader5`` module API the bot
+uses (ticks, rates, positions and ``order_send``) on top of OHLC arrays in
+the ``BarStore`` layout. The replay cursor sits on one bar at a time: that
+bar is "forming", its open is the current bid, every earlier bar is closed.
+Orders fill at the bid/ask (spread from the bar's ``spread`` column or a
+fixed override) plus an adverse slippage, and comments are truncated the
+way the terminal truncates them.
+
+``replay`` drives ``trading_strategy`` bar by bar through the unchanged
+execution layer and indicator state, and returns the trade log and the
+equity curve. Given a ``Telemetry``, it times the stages of every cycle and
+the simulated broker calls the way the live bot does.
+"""
+from collections import namedtuple
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from finance_scripts.mt5bot.bar_store import RATES_DTYPE
+from finance_scripts.mt5bot.execution import OrderExecutor
+from finance_scripts.mt5bot.indicators import IndicatorState
+from finance_scripts.mt5bot.strategy import trading_strategy
+
+Tick = namedtuple('Tick', 'time bid ask last volume')
+TradePosition = namedtuple('TradePosition', 'ticket time type volume price_open sl tp symbol comment')
+OrderSendResult = namedtuple('OrderSendResult', 'retcode deal order volume price bid ask comment request')
+
+
+class ReplayResult(NamedTuple):
+    trades: pd.DataFrame
+    equity: pd.Series
+
+
+class ReplayMT5:
+    """Drop-in for the ``MetaTrader5`` module over stored bars.
+
+    ``bars`` maps symbol to a structured array with at least the ``time``,
+    ``open``, ``high``, ``low``, ``close`` and ``spread`` fields. ``point`` is
+    the price of one spread point, ``spread`` (in points) overrides the bar
+    spreads and ``slippage`` is added against every fill, in price units.
+    Rates calls ignore the timeframe argument: each symbol holds one series.
+    """
+
+    ORDER_TYPE_BUY = 0
+    ORDER_TYPE_SELL = 1
+    TRADE_ACTION_DEAL = 1
+    ORDER_TIME_GTC = 0
+    ORDER_FILLING_IOC = 1
+    TRADE_RETCODE_DONE = 10009
+    TRADE_RETCODE_INVALID = 10013
+    TRADE_RETCODE_POSITION_CLOSED = 10036
+    TIMEFRAME_M1 = 1
+    TIMEFRAME_M5 = 5
+    TIMEFRAME_M15 = 15
+    TIMEFRAME_M30 = 30
+    TIMEFRAME_H1 = 0x4000 | 1
+    TIMEFRAME_H4 = 0x4000 | 4
+    TIMEFRAME_D1 = 0x4000 | 24
+
+    def __init__(self, bars, point=0.01, spread=None, slippage=0.0, contract_size=1.0,
+                 balance=10_000.0, comment_length=31):
+        self.bars = bars
+        self.point = point
+        self.spread = spread
+        self.slippage = slippage
+        self.contract_size = contract_size
+        self.balance = balance
+        self.comment_length = comment_length
+        self.index = 0
+        self.positions = {}
+        self.trades = []
+        self._ticket = 0
+
+    # Terminal / session calls are accepted and ignored.
+    def initialize(self, *args, **kwargs):
+        return True
+
+    def login(self, *args, **kwargs):
+        return True
+
+    def shutdown(self):
+        return None
+
+    def _series(self, symbol):
+        return self.bars[symbol]
+
+    def symbol_info_tick(self, symbol):
+        bar = self._series(symbol)[self.index]
+        spread = self.spread if self.spread is not None else bar['spread']
+        bid = float(bar['open'])
+        return Tick(time=int(bar['time']), bid=bid, ask=bid + spread * self.point, last=bid, volume=0)
+
+    def copy_rates_from_pos(self, symbol, timeframe, start_pos, count):
+        stop = self.index + 1 - start_pos
+        return np.asarray(self._series(symbol)[max(stop - count, 0):max(stop, 0)])
+
+    def copy_rates_range(self, symbol, timeframe, date_from, date_to):
+        series = self._series(symbol)[:self.index + 1]
+        times = series['time']
+        start = np.searchsorted(times, int(date_from.timestamp()), side='left')
+        stop = np.searchsorted(times, int(date_to.timestamp()), side='right')
+        return np.asarray(series[start:stop])
+
+    def positions_get(self, symbol=None):
+        return tuple(p for p in self.positions.values() if symbol is None or p.symbol == symbol)
+
+    def account_info(self):
+        return namedtuple('AccountInfo', 'balance equity')(self.balance, self.equity())
+
+    def _fill_price(self, symbol, order_type):
+        tick = self.symbol_info_tick(symbol)
+        if order_type == self.ORDER_TYPE_BUY:
+            return tick, tick.ask + self.slippage
+        return tick, tick.bid - self.slippage
+
+    def order_send(self, request):
+        symbol = request['symbol']
+        order_type = request['type']
+        tick, price = self._fill_price(symbol, order_type)
+        comment = request.get('comment', '')[:self.comment_length]
+        self._ticket += 1
+        ticket = self._ticket
+
+        def result(retcode, volume=0.0, fill=0.0):
+            return OrderSendResult(retcode=retcode, deal=ticket, order=ticket, volume=volume, price=fill,
+                                   bid=tick.bid, ask=tick.ask, comment=comment, request=request)
+
+        if request.get('position') is None:
+            self.positions[ticket] = TradePosition(
+                ticket=ticket, time=tick.time, type=order_type, volume=request['volume'], price_open=price,
+                sl=request.get('sl'), tp=request.get('tp'), symbol=symbol, comment=comment)
+            return result(self.TRADE_RETCODE_DONE, request['volume'], price)
+
+        position = self.positions.get(request['position'])
+        if position is None:
+            return result(self.TRADE_RETCODE_POSITION_CLOSED)
+        if order_type == position.type or request['volume'] > position.volume:
+            return result(self.TRADE_RETCODE_INVALID)
+        volume = request['volume']
+        direction = 1.0 if position.type == self.ORDER_TYPE_BUY else -1.0
+        profit = direction * (price - position.price_open) * volume * self.contract_size
+        self.balance += profit
+        self.trades.append({
+            'ticket': position.ticket,
+            'symbol': symbol,
+            'type': 'buy' if position.type == self.ORDER_TYPE_BUY else 'sell',
+            'volume': volume,
+            'open_time': position.time,
+            'open_price': position.price_open,
+            'close_time': tick.time,
+            'close_price': price,
+            'profit': profit,
+            'open_comment': position.comment,
+            'close_comment': comment,
+        })
+        remaining = round(position.volume - volume, 8)
+        if remaining > 0:
+            self.positions[position.ticket] = position._replace(volume=remaining)
+        else:
+            del self.positions[position.ticket]
+        return result(self.TRADE_RETCODE_DONE, volume, price)
+
+    def equity(self):
+        """Balance plus open P&L marked at the current bid/ask."""
+        floating = 0.0
+        for position in self.positions.values():
+            tick = self.symbol_info_tick(position.symbol)
+            if position.type == self.ORDER_TYPE_BUY:
+                floating += (tick.bid - position.price_open) * position.volume * self.contract_size
+            else:
+                floating += (position.price_open - tick.ask) * position.volume * self.contract_size
+        return self.balance + floating
+
+
+def replay(bars, symbol='SP500', adx_period=21, cci_period=1000, telemetry=None, **simulator_options):
+    """Backtest ``trading_strategy`` on ``bars`` exactly as the bot runs it live.
+
+    Before each bar opens, the previous bar is fed to the indicators and the
+    strategy runs against a ``ReplayMT5`` positioned on the new bar, so
+    orders fill at its open. Positions still open at the end stay open and
+    are only reflected in the equity curve.
+    """
+    bars = np.asarray(bars)
+    if bars.dtype.names is None or 'spread' not in bars.dtype.names:
+        full = np.zeros(len(bars), dtype=RATES_DTYPE)
+        for name in bars.dtype.names or ():
+            full[name] = bars[name]
+        bars = full
+    simulator = ReplayMT5({symbol: bars}, **simulator_options)
+    mt = simulator if telemetry is None else telemetry.wrap(simulator)
+    executor = OrderExecutor(mt)
+    indicators = IndicatorState(adx_period=adx_period, cci_period=cci_period)
+
+    equity = np.empty(len(bars))
+    equity[0] = simulator.balance
+    high, low, close = bars['high'], bars['low'], bars['close']
+    if telemetry is None:
+        for i in range(1, len(bars)):
+            simulator.index = i
+            indicators.update(high[i - 1], low[i - 1], close[i - 1])
+            trading_strategy(mt, executor, indicators, symbol)
+            equity[i] = simulator.equity()
+    else:
+        telemetry.instrument(indicators)
+        for i in range(1, len(bars)):
+            simulator.index = i
+            with telemetry.stage('cycle'):
+                with telemetry.stage('indicators'):
+                    indicators.update(high[i - 1], low[i - 1], close[i - 1])
+                with telemetry.stage('strategy'):
+                    trading_strategy(mt, executor, indicators, symbol)
+            equity[i] = simulator.equity()
+
+    trades = pd.DataFrame(simulator.trades, columns=[
+        'ticket', 'symbol', 'type', 'volume', 'open_time', 'open_price', 'close_time',
+        'close_price', 'profit', 'open_comment', 'close_comment'])
+    for column in ('open_time', 'close_time'):
+        trades[column] = pd.to_datetime(trades[column], unit='s')
+    index = pd.to_datetime(bars['time'], unit='s')
+    return ReplayResult(trades=trades, equity=pd.Series(equity, index=index, name='equity'))
@@ -0,0 +1,204 @@
+"""Bar-close aligned asyncio scheduler for MT5 strategies.
+
+Every (symbol, timeframe) pair gets one watcher task that sleeps until the
+next bar boundary, polls the newest bar until the bar opening at that
+boundary appears (i.e. the previous one has closed) and then runs all
+strategies registered for the pair concurrently. Blocking MetaTrader5 calls
+and plain-function strategies run in a bounded thread pool so one slow call
+does not hold up the other pairs.
+
+A strategy that raises is logged with its traceback, counted in
+``failures`` and passed to the ``on_error`` callback; the pair keeps being
+watched, so one bad bar does not stop the bot.
+
+Boundaries are multiples of the bar length from the epoch, except weekly
+ones, which fall on Sunday 00:00 server time, where MT5 opens W1 bars.
+
+The clock and the executor are injectable: ``FakeClock`` and
+``InlineExecutor`` run the scheduler in virtual time, deterministically,
+against a fake ``mt`` module.
+"""
+import asyncio
+from collections import defaultdict, deque
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+import heapq
+import inspect
+import logging
+import math
+import time
+
+logger = logging.getLogger(__name__)
+
+# MetaTrader5 encodes hour timeframes with bit 14 and weeks with bit 15.
+_HOUR_FLAG = 0x4000
+_WEEK_FLAG = 0x8000
+# 1970-01-04, the first Sunday after the epoch (a Thursday).
+_WEEK_ORIGIN = 3 * 86400
+
+
+def timeframe_seconds(timeframe):
+    """Length in seconds of an MT5 ``TIMEFRAME_*`` constant."""
+    flags, count = timeframe & 0xC000, timeframe & 0x3FFF
+    if flags == 0:
+        return count * 60
+    if flags == _HOUR_FLAG:
+        return count * 3600
+    if flags == _WEEK_FLAG:
+        return count * 7 * 86400
+    raise ValueError("monthly timeframes have no fixed bar length")
+
+
+def next_boundary(timeframe, now):
+    """Open time of the first bar of ``timeframe`` starting after ``now`` (both server time)."""
+    period = timeframe_seconds(timeframe)
+    origin = _WEEK_ORIGIN if timeframe & 0xC000 == _WEEK_FLAG else 0
+    return origin + (math.floor((now - origin) / period) + 1) * period
+
+
+def server_offset(mt, symbol, now=None):
+    """Broker server time minus UTC, in whole hours, from the latest tick of ``symbol``.
+
+    MT5 stamps ticks and bars in server time (GMT+2/+3 for most brokers).
+    The tick must be recent, so call this while ``symbol`` trades: over a
+    weekend the last tick is too old to round to the right hour.
+    """
+    now = time.time() if now is None else now
+    return round((mt.symbol_info_tick(symbol).time - now) / 3600) * 3600
+
+
+class SystemClock:
+    def time(self):
+        return time.time()
+
+    async def sleep(self, seconds):
+        await asyncio.sleep(max(seconds, 0.0))
+
+
+class FakeClock:
+    """Virtual clock: sleeping tasks wake in order, and time jumps to each
+    wake-up once the event loop has had ``settle`` passes to go idle."""
+
+    def __init__(self, start=0.0, settle=20):
+        self.now = float(start)
+        self.settle = settle
+        self._waiters = []
+        self._sequence = 0
+        self._driver = None
+
+    def time(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (self.now + max(seconds, 0.0), self._sequence, future))
+        self._sequence += 1
+        if self._driver is None or self._driver.done():
+            self._driver = asyncio.ensure_future(self._drive())
+        await future
+
+    async def _drive(self):
+        while self._waiters:
+            for _ in range(self.settle):
+                await asyncio.sleep(0)
+            wake, _, future = heapq.heappop(self._waiters)
+            self.now = max(self.now, wake)
+            if not future.done():
+                future.set_result(None)
+
+
+class InlineExecutor(Executor):
+    """Executor running each call on the submitting thread, for tests."""
+
+    def submit(self, fn, /, *args, **kwargs):
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as exc:
+            future.set_exception(exc)
+        return future
+
+
+class BarCloseScheduler:
+    """Run strategies right after bars close, for any number of pairs.
+
+    ``server_offset`` is the broker server time minus UTC in seconds (see
+    ``server_offset()``); bar times are server time, so boundaries are
+    computed in that frame. Left at 0 on a GMT+2 broker, the bar that just
+    closed already opens after the UTC boundary and would pass for the new
+    one. When
+    no new bar shows up within ``max_wait`` seconds of a boundary (market
+    closed) the boundary is skipped. ``on_error(symbol, timeframe, bar_time,
+    exception)`` is called for every strategy that raises.
+    """
+
+    def __init__(self, mt, clock=None, max_workers=4, executor=None, poll_interval=0.05,
+                 max_wait=60.0, server_offset=0, on_error=None):
+        self.mt = mt
+        self.clock = clock or SystemClock()
+        self.executor = executor or ThreadPoolExecutor(max_workers=max_workers)
+        self.poll_interval = poll_interval
+        self.max_wait = max_wait
+        self.server_offset = server_offset
+        self.on_error = on_error
+        self.strategies = defaultdict(list)
+        # Strategy exceptions per (symbol, timeframe).
+        self.failures = defaultdict(int)
+        # Seconds from bar boundary to strategy start, per (symbol, timeframe).
+        self.latencies = defaultdict(lambda: deque(maxlen=1000))
+
+    def add(self, symbol, timeframe, strategy):
+        """Register ``strategy(symbol, timeframe, bar_time)`` for a pair.
+
+        ``bar_time`` is the open time of the bar that just closed. Coroutine
+        functions are awaited on the loop; plain functions run in the pool.
+        """
+        timeframe_seconds(timeframe)
+        self.strategies[(symbol, timeframe)].append(strategy)
+
+    async def call(self, func, *args, **kwargs):
+        """Run a blocking call, e.g. an ``mt`` function, in the thread pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, lambda: func(*args, **kwargs))
+
+    async def run(self, cycles=None):
+        """Watch every registered pair; stop after ``cycles`` boundaries each."""
+        await asyncio.gather(*(self._watch(symbol, timeframe, strategies, cycles)
+                               for (symbol, timeframe), strategies in self.strategies.items()))
+
+    def server_time(self):
+        return self.clock.time() + self.server_offset
+
+    async def _watch(self, symbol, timeframe, strategies, cycles):
+        period = timeframe_seconds(timeframe)
+        done = 0
+        while cycles is None or done < cycles:
+            now = self.server_time()
+            boundary = next_boundary(timeframe, now)
+            await self.clock.sleep(boundary - now)
+            done += 1
+            if await self._wait_for_bar(symbol, timeframe, boundary):
+                self.latencies[(symbol, timeframe)].append(self.server_time() - boundary)
+                await asyncio.gather(*(self._run_strategy(strategy, symbol, timeframe, boundary - period)
+                                       for strategy in strategies))
+
+    async def _wait_for_bar(self, symbol, timeframe, boundary):
+        """Poll the newest bar until one opens at or after ``boundary``."""
+        while True:
+            rates = await self.call(self.mt.copy_rates_from_pos, symbol, timeframe, 0, 1)
+            if rates is not None and len(rates) and rates[-1]['time'] >= boundary:
+                return True
+            if self.server_time() - boundary >= self.max_wait:
+                return False
+            await self.clock.sleep(self.poll_interval)
+
+    async def _run_strategy(self, strategy, symbol, timeframe, bar_time):
+        try:
+            if inspect.iscoroutinefunction(strategy):
+                await strategy(symbol, timeframe, bar_time)
+            else:
+                await self.call(strategy, symbol, timeframe, bar_time)
+        except Exception as e:
+            self.failures[(symbol, timeframe)] += 1
+            logger.exception("strategy %r failed on the %s bar opening at %d", strategy, symbol, bar_time)
+            if self.on_error is not None:
+                self.on_error(symbol, timeframe, bar_time, e)
@@ -0,0 +1,94 @@
+"""ADX / CCI / Royal Scalping pair-and-single position strategy of the MT5 bot."""
+
+
+def trading_strategy(mt, executor, indicators, ticker):
+    """One decision pass over ``ticker`` on the latest closed bar.
+
+    ``mt`` is the MetaTrader5 module or a stand-in with the same API,
+    ``executor`` an ``OrderExecutor`` on it and ``indicators`` the
+    ``IndicatorState`` fed with every closed bar.
+    """
+    current_adx = indicators.current['ADX']
+    current_cci = indicators.current['CCI']
+    current_royal_scalping = indicators.current['Royal_Scalping']
+    previous_cci = indicators.previous['CCI']
+    previous_royal_scalping = indicators.previous['Royal_Scalping']
+    previous_adx = indicators.previous['ADX']
+
+    #defining position variable
+    cycle = executor.cycle(ticker)
+    positions = cycle.positions
+
+     # Pair of positions logic
+    if current_adx > 20 and current_adx > previous_adx:
+        if current_cci > 0 and current_cci > previous_cci and (current_royal_scalping > 80 or (previous_royal_scalping < 20 and current_royal_scalping > 20)):
+            cycle.buy(0.1, "Buy order - 1/2 pair of positions")
+            cycle.buy(0.1, "Buy order - 2/2 pair of positions")
+        elif current_cci < 0 and current_cci < previous_cci and (current_royal_scalping < 20 or (previous_royal_scalping > 80 and current_royal_scalping < 80)):
+            cycle.sell(0.1, "Sell order - 1/2 pair of positions")
+            cycle.sell(0.1, "Sell order - 2/2 pair of positions")
+     
+     #Single positions logic 
+    if not positions:
+        if current_adx > 20 and current_adx > previous_adx:
+            if previous_cci < 40 and current_cci > 40 and current_royal_scalping > 80:
+                cycle.buy(0.1, "Buy order - single position")
+            elif previous_cci > -40 and current_cci < -40 and current_royal_scalping < 20:
+                cycle.sell(0.1, "Sell order - single position")    
+
+    # Implement stop loss logic for all positions
+    if current_cci < 0 and previous_cci > 0:
+        for position in cycle.open_positions(mt.ORDER_TYPE_BUY):
+            cycle.close(position, "Stop loss for buy")
+
+    if current_cci > 0 and previous_cci < 0:
+        for position in cycle.open_positions(mt.ORDER_TYPE_SELL):
+            cycle.close(position, "Stop loss for sell")
+
+    # Implement take profit logics :
+    positions = cycle.open_positions()
+    buy_positions = [p for p in positions if p.type == mt.ORDER_TYPE_BUY]
+    sell_positions = [p for p in positions if p.type == mt.ORDER_TYPE_SELL]
+    
+ # For 1 position in the pair of buy positions
+    for position in buy_positions:
+     if "1/2 pair of positions" in position.comment:
+        if current_cci < 70 and previous_cci > 70:
+            cycle.close(position, "Take profit for buy - 1/2 pair of positions")
+     elif "2/2 pair of positions" in position.comment:
+        if current_royal_scalping < 80 and previous_royal_scalping > 80:
+            cycle.close(position, "Take profit for buy - 2/2 pair of positions")
+
+ # For 1 position in the pair of sell positions
+    for position in sell_positions:
+     if "1/2 pair of positions" in position.comment:
+        if current_cci > -70 and previous_cci < -70:
+            cycle.close(position, "Take profit for sell - 1/2 pair of positions")
+     elif "2/2 pair of positions" in position.comment:
+        if current_royal_scalping > 20 and previous_royal_scalping < 20:
+            cycle.close(position, "Take profit for sell - 2/2 pair of positions")
+
+ # For all positions in the buy pair
+    if len(buy_positions) > 0:
+     if (current_cci < 70 and current_royal_scalping < 80 and previous_royal_scalping > 80) or (current_royal_scalping < 80 and previous_royal_scalping > 80 and current_cci >= 70):
+        for position in buy_positions:
+            if "single" not in position.comment:
+                cycle.close(position, "Take profit for buy - all pairs positions")
+
+ # For all positions in the sell pair  
+    if len(sell_positions) > 0:
+     if (current_cci > -70 and current_royal_scalping > 20 and previous_royal_scalping < 20) or (current_royal_scalping > 20 and previous_royal_scalping < 20 and current_cci <= -70):
+        for position in sell_positions:
+            if "single" not in position.comment:
+                cycle.close(position, "Take profit for sell - all pairs positions")
+        
+ # For single positions
+    for position in positions:
+        if "single" in position.comment:
+            if position.type == mt.ORDER_TYPE_BUY and current_cci < 70 and previous_cci > 70:
+                cycle.close(position, "Take profit for buy - single position")
+            elif position.type == mt.ORDER_TYPE_SELL and current_cci > -70 and previous_cci < -70:
+                cycle.close(position, "Take profit for sell - single position")
+
+    # Send everything decided this cycle: closes grouped by direction, then the new (paired) orders back to back
+    cycle.submit()
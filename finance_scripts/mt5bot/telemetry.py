@@ -0,0 +1,370 @@
+"""Latency histograms, broker call counters and an opt-in sampling profiler for the MT5 bot.
+
+``Telemetry`` keeps one ``Histogram`` per stage of the bot's cycle
+(``with telemetry.stage('indicators'): ...``) and one per broker call.
+``wrap(mt)`` returns a proxy of the ``MetaTrader5`` module, or of a
+stand-in, that times every function call and counts calls and errors (an
+exception, or None, the terminal's failure value); constants pass
+through. ``timed(fn, name)`` wraps any other function, and ``instrument``
+so wraps the updates of each indicator. A histogram is a fixed array of
+log-spaced buckets, four per doubling, so recording is a bisect and an
+increment under a lock, a microsecond or two, and each histogram stays a
+few KB however long the bot runs.
+
+``prometheus()`` renders everything in the Prometheus text format.
+``write(path)`` replaces a file with it atomically, for the node exporter
+textfile collector or for ``python -m finance_scripts mt5-report``.
+``serve(port)`` answers HTTP scrapes from a daemon thread. ``report()``
+prints the count, p50, p99 and max of every histogram. Quantiles are
+interpolated inside a bucket, within 19% of the true value.
+
+``SamplingProfiler`` is off unless started. It samples the stacks of every
+other thread every ``interval`` seconds and counts folded stacks, which
+``folded()`` writes in the format flamegraph.pl and speedscope read.
+"""
+from bisect import bisect_left
+from collections import Counter
+import math
+import os
+import sys
+import threading
+import time
+
+BUCKETS_PER_DOUBLING = 4
+# Bucket upper bounds: 1 microsecond to about 2 minutes.
+BOUNDS = tuple(1e-6 * 2.0 ** (k / BUCKETS_PER_DOUBLING) for k in range(27 * BUCKETS_PER_DOUBLING + 1))
+PREFIX = 'mt5bot'
+
+
+class Histogram:
+    """Counts of observations per ``BOUNDS`` bucket, plus their sum and maximum."""
+
+    __slots__ = ('counts', 'total', 'count', 'max')
+
+    def __init__(self):
+        self.counts = [0] * (len(BOUNDS) + 1)  # the last bucket is +Inf
+        self.total = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(BOUNDS, value)] += 1
+        self.total += value
+        self.count += 1
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q):
+        """The ``q`` quantile, geometrically interpolated inside its bucket; NaN when empty."""
+        if not self.count:
+            return math.nan
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                if i == len(BOUNDS):
+                    return self.max
+                lower = BOUNDS[i - 1] if i else BOUNDS[0] / 2 ** (1 / BUCKETS_PER_DOUBLING)
+                value = lower * (BOUNDS[i] / lower) ** ((rank - seen) / n)
+                return min(value, self.max)
+            seen += n
+        return self.max
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else math.nan
+
+
+def _label(value):
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+class _Stage:
+    __slots__ = ('observe', 'clock', 'lock', 'start')
+
+    def __init__(self, histogram, clock, lock):
+        self.observe = histogram.observe
+        self.clock = clock
+        self.lock = lock
+
+    def __enter__(self):
+        self.start = self.clock()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        elapsed = self.clock() - self.start
+        with self.lock:
+            self.observe(elapsed)
+        return False
+
+
+class _InstrumentedMT5:
+    """``mt`` with every function call timed and counted; other attributes pass through."""
+
+    def __init__(self, telemetry, mt):
+        self._telemetry = telemetry
+        self._mt = mt
+
+    def __getattr__(self, name):
+        attribute = getattr(self._mt, name)
+        if callable(attribute) and not isinstance(attribute, type):
+            attribute = self._telemetry.timed(attribute, name, kind='broker_call', none_is_error=True)
+        setattr(self, name, attribute)  # later lookups, constants included, skip __getattr__
+        return attribute
+
+
+class Telemetry:
+    """Histograms and counters of one bot process; see the module docstring."""
+
+    def __init__(self, clock=time.perf_counter, prefix=PREFIX):
+        self.clock = clock
+        self.prefix = prefix
+        self.lock = threading.Lock()
+        self.histograms = {}  # (kind, name) -> Histogram
+        self._stages = {}  # name -> the stage's Histogram
+        self.counters = Counter()  # (kind, name) -> count
+        self.started = time.time()
+
+    def histogram(self, kind, name):
+        key = (kind, name)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms.setdefault(key, Histogram())
+        return histogram
+
+    def stage(self, name):
+        """Context manager adding the duration of its block to the ``name`` stage."""
+        histogram = self._stages.get(name)
+        if histogram is None:
+            histogram = self._stages[name] = self.histogram('stage', name)
+        return _Stage(histogram, self.clock, self.lock)
+
+    def observe(self, name, seconds, kind='stage'):
+        histogram = self.histogram(kind, name)
+        with self.lock:
+            histogram.observe(seconds)
+
+    def count(self, name, n=1, kind='event'):
+        with self.lock:
+            self.counters[kind, name] += n
+
+    def timed(self, fn, name, kind='stage', none_is_error=False):
+        """``fn`` recording its duration under ``name``, its calls and, for ``kind='broker_call'``, errors."""
+        histogram = self.histogram(kind, name)
+        counters, lock, clock = self.counters, self.lock, self.clock
+        calls, errors = (kind + 's', name), (kind + '_errors', name)
+
+        def wrapper(*args, **kwargs):
+            start = clock()
+            failed = True
+            try:
+                result = fn(*args, **kwargs)
+                failed = none_is_error and result is None
+                return result
+            finally:
+                elapsed = clock() - start
+                with lock:
+                    histogram.observe(elapsed)
+                    counters[calls] += 1
+                    if failed:
+                        counters[errors] += 1
+
+        wrapper.__wrapped__ = fn
+        return wrapper
+
+    def wrap(self, mt):
+        """Proxy of the ``MetaTrader5`` module (or a stand-in) timing and counting every call."""
+        return _InstrumentedMT5(self, mt)
+
+    def instrument(self, indicators):
+        """Time the ``update`` of each indicator of an ``IndicatorState`` as a stage of its own."""
+        for name in ('adx', 'cci', 'royal_scalping'):
+            state = getattr(indicators, name)
+            state.update = self.timed(state.update, name)
+        return indicators
+
+    def prometheus(self):
+        """Every histogram and counter in the Prometheus text exposition format."""
+        with self.lock:
+            histograms = {key: (list(h.counts), h.total, h.count) for key, h in self.histograms.items()}
+            counters = dict(self.counters)
+        lines = []
+        for kind in sorted({kind for kind, _ in histograms}):
+            metric = f'{self.prefix}_{kind}_seconds'
+            lines.append(f'# TYPE {metric} histogram')
+            for (k, name), (counts, total, count) in sorted(histograms.items()):
+                if k != kind:
+                    continue
+                label = f'{kind}="{_label(name)}"'
+                cumulative = 0
+                for bound, n in zip(BOUNDS, counts):
+                    cumulative += n
+                    lines.append(f'{metric}_bucket{{{label},le="{bound:.9g}"}} {cumulative}')
+                lines.append(f'{metric}_bucket{{{label},le="+Inf"}} {count}')
+                lines.append(f'{metric}_sum{{{label}}} {total:.9g}')
+                lines.append(f'{metric}_count{{{label}}} {count}')
+        for kind in sorted({kind for kind, _ in counters}):
+            metric = f'{self.prefix}_{kind}_total'
+            lines.append(f'# TYPE {metric} counter')
+            label = kind[:-len('_errors')] if kind.endswith('_errors') else kind.rstrip('s')
+            for (k, name), value in sorted(counters.items()):
+                if k == kind:
+                    lines.append(f'{metric}{{{label}="{_label(name)}"}} {value}')
+        lines.append(f'# TYPE {self.prefix}_start_time_seconds gauge')
+        lines.append(f'{self.prefix}_start_time_seconds {self.started:.3f}')
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path):
+        """Atomically replace ``path`` with ``prometheus()``."""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        temporary = f'{path}.{os.getpid()}.tmp'
+        with open(temporary, 'w') as f:
+            f.write(self.prometheus())
+        os.replace(temporary, path)
+
+    def serve(self, port=9464, host='127.0.0.1'):
+        """Serve ``prometheus()`` over HTTP from a daemon thread; returns the server."""
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        telemetry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = telemetry.prometheus().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+    def report(self):
+        return report(self.histograms, self.counters)
+
+
+def report(histograms, counters=()):
+    """Text table of count, mean, p50, p99 and max per histogram, in milliseconds, plus error counts."""
+    counters = dict(counters)
+    lines = [f"{'kind':<12}{'name':<28}{'count':>8}{'errors':>8}{'mean ms':>10}{'p50 ms':>10}{'p99 ms':>10}"
+             f"{'max ms':>10}"]
+    for (kind, name), h in sorted(histograms.items()):
+        errors = counters.get((kind + '_errors', name), '')
+        lines.append(f"{kind:<12}{name:<28}{h.count:>8}{errors:>8}{h.mean * 1e3:>10.3f}{h.quantile(0.5) * 1e3:>10.3f}"
+                     f"{h.quantile(0.99) * 1e3:>10.3f}{h.max * 1e3:>10.3f}")
+    return '\n'.join(lines)
+
+
+def read_prometheus(path, prefix=PREFIX):
+    """Histograms and counters back from a ``Telemetry.write`` file, keyed like ``Telemetry``'s.
+
+    Bucket counts are exact; the maximum is only known to the bucket, so it
+    reads as the upper bound of the highest non-empty one.
+    """
+    histograms, counters = {}, Counter()
+    with open(path) as f:
+        for line in f:
+            if not line.startswith(prefix + '_') or '{' not in line:
+                continue
+            series, value = line.rsplit(' ', 1)
+            metric, labels = series[len(prefix) + 1:].split('{', 1)
+            fields = dict(part.split('=', 1) for part in labels.rstrip('}').split('",'))
+            fields = {key: raw.strip('"') for key, raw in fields.items()}
+            if metric.endswith('_total'):
+                kind = metric[:-len('_total')]
+                counters[kind, next(iter(fields.values()))] = int(float(value))
+                continue
+            kind = metric.split('_seconds')[0]
+            h = histograms.setdefault((kind, fields[kind]), Histogram())
+            if metric.endswith('_bucket'):
+                if fields['le'] != '+Inf':
+                    i = bisect_left(BOUNDS, float(fields['le']) * (1 - 1e-9))
+                    h.counts[i] = int(float(value)) - sum(h.counts[:i])
+                    if h.counts[i]:
+                        h.max = BOUNDS[i]
+            elif metric.endswith('_sum'):
+                h.total = float(value)
+            elif metric.endswith('_count'):
+                h.count = int(float(value))
+    for h in histograms.values():
+        h.counts[-1] = h.count - sum(h.counts[:-1])
+        if h.counts[-1]:
+            h.max = math.inf
+    return histograms, counters
+
+
+class SamplingProfiler:
+    """Samples every other thread's stack every ``interval`` seconds while started."""
+
+    def __init__(self, interval=0.005, max_depth=64):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.stacks = Counter()
+        self.samples = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+    def _run(self):
+        me = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                frames = []
+                while frame is not None and len(frames) < self.max_depth:
+                    code = frame.f_code
+                    key = (code.co_filename, code.co_name)
+                    name = names.get(key)
+                    if name is None:
+                        name = names[key] = f'{os.path.basename(code.co_filename)}:{code.co_name}'
+                    frames.append(name)
+                    frame = frame.f_back
+                with self._lock:
+                    self.stacks[';'.join(reversed(frames))] += 1
+            self.samples += 1
+
+    def folded(self, path=None):
+        """Folded stacks, one ``a;b;c count`` line each; written to ``path`` when given."""
+        with self._lock:
+            stacks = self.stacks.most_common()
+        text = ''.join(f'{stack} {count}\n' for stack, count in stacks)
+        if path is not None:
+            with open(path, 'w') as f:
+                f.write(text)
+        return text
+
+    def top(self, n=15):
+        """The ``n`` functions seen most often on top of a stack, with their share of samples."""
+        leaves = Counter()
+        with self._lock:
+            stacks = list(self.stacks.items())
+        for stack, count in stacks:
+            leaves[stack.rsplit(';', 1)[-1]] += count
+        total = sum(leaves.values()) or 1
+        return [(name, count / total) for name, count in leaves.most_common(n)]
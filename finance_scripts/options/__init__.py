@@ -0,0 +1 @@
+"""Option pricing models used by the Black-Scholes calculator."""
@@ -0,0 +1,182 @@
+"""American option pricing on lattices and by Longstaff-Schwartz Monte Carlo.
+
+Both pricers take the ``black_scholes`` inputs (S, K, T, r, sigma,
+option_type), broadcast them across any number of contracts and add a
+continuous dividend yield ``q``. With q = 0 an American call is never
+exercised early, so both converge to ``black_scholes`` for calls.
+"""
+from typing import NamedTuple
+
+import numpy as np
+
+from finance_scripts.options.pricing import _is_call
+
+
+class MonteCarloResult(NamedTuple):
+    """Monte Carlo price estimate with its standard error, per contract."""
+    price: np.ndarray
+    stderr: np.ndarray
+
+
+def _contracts(S, K, T, r, sigma, option_type, q):
+    is_call = _is_call(option_type)
+    arrays = np.broadcast_arrays(*(np.asarray(x, dtype=float) for x in (S, K, T, r, sigma, q)), is_call)
+    shape = arrays[0].shape
+    # One row per contract so per-node arrays broadcast as (contracts, nodes).
+    return shape, [a.reshape(-1, 1) for a in arrays]
+
+
+def _payoff(spot, K, sign):
+    return np.maximum(sign * (spot - K), 0.0)
+
+
+def lattice_price(S, K, T, r, sigma, option_type='put', q=0.0, steps=200, method='binomial'):
+    """Price American options on a CRR binomial or a trinomial lattice.
+
+    Backward induction runs once over ``steps`` time steps; every step is a
+    single array operation over all nodes of all contracts.
+    """
+    if method not in ('binomial', 'trinomial'):
+        raise ValueError("method must be 'binomial' or 'trinomial'")
+    shape, (S, K, T, r, sigma, q, is_call) = _contracts(S, K, T, r, sigma, option_type, q)
+    sign = np.where(is_call, 1.0, -1.0)
+    # Expired contracts get a dummy tree and are replaced by intrinsic value.
+    dt = np.where(T > 0.0, T, 1.0) / steps
+    discount = np.exp(-r * dt)
+    growth = (r - q) * dt
+
+    if method == 'binomial':
+        log_u = sigma * np.sqrt(dt)
+        p_up = (np.exp(growth) - np.exp(-log_u)) / (np.exp(log_u) - np.exp(-log_u))
+        weights = (discount * (1.0 - p_up), discount * p_up)
+    else:
+        half = sigma * np.sqrt(dt / 2.0)
+        log_u = 2.0 * half
+        denominator = np.exp(half) - np.exp(-half)
+        p_up = ((np.exp(growth / 2.0) - np.exp(-half)) / denominator) ** 2
+        p_down = ((np.exp(half) - np.exp(growth / 2.0)) / denominator) ** 2
+        weights = (discount * p_down, discount * (1.0 - p_up - p_down), discount * p_up)
+
+    # Every node of either lattice sits at S * u**k for k in [-steps, steps];
+    # exercise values are computed once on that grid and sliced per step.
+    exercise = _payoff(S * np.exp(log_u * np.arange(-steps, steps + 1)), K, sign)
+    stride = 2 if method == 'binomial' else 1
+    values = exercise[:, ::stride].copy()
+    for step in range(steps - 1, -1, -1):
+        width = values.shape[1] - len(weights) + 1
+        rolled = weights[0] * values[:, :width]
+        for shift, weight in enumerate(weights[1:], start=1):
+            rolled += weight * values[:, shift:shift + width]
+        values = np.maximum(rolled, exercise[:, steps - step:steps + step + 1:stride], out=rolled)
+
+    price = np.where(T[:, 0] > 0.0, values[:, 0], _payoff(S, K, sign)[:, 0])
+    return price.reshape(shape)[()]
+
+
+def _basis(moneyness, degree):
+    powers = [np.ones_like(moneyness)]
+    for _ in range(degree):
+        powers.append(powers[-1] * moneyness)
+    return np.stack(powers, axis=-1)
+
+
+def _regress(spot, cash, itm, K, degree):
+    """Per-contract least squares of cash on a polynomial of spot, ITM paths only."""
+    x = _basis(spot / K, degree) * itm[..., None]
+    gram = np.einsum('cpi,cpj->cij', x, x)
+    gram += 1e-10 * np.eye(degree + 1)
+    return np.linalg.solve(gram, np.einsum('cpi,cp->ci', x, cash)[..., None])[..., 0]
+
+
+def _continuation(spot, K, sign, coefficients, degree, remaining, r, q):
+    """Regressed continuation value, floored at the European forward bound.
+
+    Holding is always worth at least the discounted forward intrinsic value,
+    so the floor stops regression noise from triggering exercise that can
+    never be optimal (e.g. calls without dividends).
+    """
+    moneyness = spot / K
+    fitted = coefficients[:, degree, None]
+    for power in range(degree - 1, -1, -1):
+        fitted = fitted * moneyness + coefficients[:, power, None]
+    forward_bound = sign * (spot * np.exp(-q * remaining) - K * np.exp(-r * remaining))
+    return np.maximum(fitted, forward_bound)
+
+
+def _normals(rng, n_contracts, n_paths, antithetic):
+    if not antithetic:
+        return rng.standard_normal((n_contracts, n_paths))
+    half = rng.standard_normal((n_contracts, (n_paths + 1) // 2))
+    return np.concatenate([half, -half], axis=1)[:, :n_paths]
+
+
+def longstaff_schwartz(S, K, T, r, sigma, option_type='put', q=0.0, steps=50, paths=100_000,
+                       chunk_paths=10_000, antithetic=True, degree=3, seed=None):
+    """Price American options by Longstaff-Schwartz least-squares Monte Carlo.
+
+    The exercise rule is regressed on one chunk of ``chunk_paths`` stored
+    paths; the price is then estimated on ``paths`` fresh paths generated and
+    consumed ``chunk_paths`` at a time, so memory is bounded by the chunk size
+    rather than the path count. Pricing on independent paths keeps the
+    estimate free of the in-sample foresight bias.
+    """
+    rng = np.random.default_rng(seed)
+    shape, (S, K, T, r, sigma, q, is_call) = _contracts(S, K, T, r, sigma, option_type, q)
+    n_contracts = S.shape[0]
+    sign = np.where(is_call, 1.0, -1.0)
+    dt = T / steps
+    drift = (r - q - 0.5 * sigma ** 2) * dt
+    diffusion = sigma * np.sqrt(dt)
+    discount = np.exp(-r * dt)
+
+    # Training pass: store one chunk of paths and regress backwards in time.
+    log_path = np.empty((steps, n_contracts, chunk_paths))
+    log_spot = np.zeros((n_contracts, chunk_paths))
+    for step in range(steps):
+        log_spot = log_spot + drift + diffusion * _normals(rng, n_contracts, chunk_paths, antithetic)
+        log_path[step] = log_spot
+    spot_path = S[None] * np.exp(log_path)
+
+    coefficients = np.zeros((steps, n_contracts, degree + 1))
+    cash = _payoff(spot_path[-1], K, sign)
+    for step in range(steps - 2, -1, -1):
+        cash = cash * discount
+        spot = spot_path[step]
+        exercise_value = _payoff(spot, K, sign)
+        itm = exercise_value > 0.0
+        coefficients[step] = _regress(spot, cash, itm, K, degree)
+        continuation = _continuation(spot, K, sign, coefficients[step], degree,
+                                     T - (step + 1) * dt, r, q)
+        cash = np.where(itm & (exercise_value > continuation), exercise_value, cash)
+    del log_path, spot_path
+
+    # Pricing pass: fresh chunks, each walked forward under the fitted rule.
+    total = np.zeros(n_contracts)
+    total_sq = np.zeros(n_contracts)
+    for start in range(0, paths, chunk_paths):
+        n = min(chunk_paths, paths - start)
+        log_spot = np.zeros((n_contracts, n))
+        value = np.zeros((n_contracts, n))
+        alive = np.ones((n_contracts, n), dtype=bool)
+        step_discount = np.ones((n_contracts, 1))
+        for step in range(steps):
+            log_spot = log_spot + drift + diffusion * _normals(rng, n_contracts, n, antithetic)
+            step_discount = step_discount * discount
+            spot = S * np.exp(log_spot)
+            exercise_value = _payoff(spot, K, sign)
+            if step == steps - 1:
+                exercise = alive & (exercise_value > 0.0)
+            else:
+                continuation = _continuation(spot, K, sign, coefficients[step], degree,
+                                             T - (step + 1) * dt, r, q)
+                exercise = alive & (exercise_value > 0.0) & (exercise_value > continuation)
+            value = np.where(exercise, step_discount * exercise_value, value)
+            alive &= ~exercise
+        total += value.sum(axis=1)
+        total_sq += (value ** 2).sum(axis=1)
+
+    mean = total / paths
+    stderr = np.sqrt(np.maximum(total_sq / paths - mean ** 2, 0.0) / paths)
+    immediate = _payoff(S, K, sign)[:, 0]
+    price = np.where(T[:, 0] > 0.0, np.maximum(mean, immediate), immediate)
+    return MonteCarloResult(price=price.reshape(shape)[()], stderr=stderr.reshape(shape)[()])
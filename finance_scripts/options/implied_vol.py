@@ -0,0 +1,97 @@
+"""Batched implied volatility from market quotes.
+
+All contracts of a chain are solved together: each iteration runs one
+``black_scholes_greeks`` pass over the still-unconverged quotes and uses the
+vega from that pass for a Newton step on log prices, falling back to
+bisection whenever the step leaves the bracket that the previous iterations
+have established.
+"""
+from typing import NamedTuple
+
+import numpy as np
+
+from finance_scripts.options.pricing import black_scholes_greeks, _is_call
+
+
+class ImpliedVolResult(NamedTuple):
+    """Per-contract solver output.
+
+    ``sigma`` is NaN where the quote violates the no-arbitrage bounds
+    (``arbitrage`` is True there) or the solver did not converge.
+    """
+    sigma: np.ndarray
+    converged: np.ndarray
+    arbitrage: np.ndarray
+    iterations: np.ndarray
+
+
+def _initial_guess(S, K, T, r):
+    # Manaster-Koehler starting point, clipped to a sensible vol range.
+    guess = np.sqrt(2.0 * np.abs(np.log(S / K) + r * T) / T)
+    return np.clip(guess, 0.05, 1.0)
+
+
+def implied_volatility(price, S, K, T, r, option_type='call', tol=1e-8, max_iter=100,
+                       sigma_max=5.0):
+    """Solve ``black_scholes(S, K, T, r, sigma, option_type) == price`` for sigma.
+
+    Inputs broadcast like ``black_scholes``. ``tol`` is in vol units: a
+    contract has converged once its next Newton step or its bracket is smaller
+    than ``tol``, or once the pricing error is at floating-point noise level.
+    """
+    is_call = _is_call(option_type)
+    arrays = np.broadcast_arrays(*(np.asarray(x, dtype=float) for x in (price, S, K, T, r)), is_call)
+    shape = arrays[0].shape
+    price, S, K, T, r, is_call = (a.ravel() for a in arrays)
+
+    discount = np.exp(-r * T)
+    lower_bound = np.where(is_call, np.maximum(S - K * discount, 0.0), np.maximum(K * discount - S, 0.0))
+    upper_bound = np.where(is_call, S, K * discount)
+    arbitrage = ~((price > lower_bound) & (price < upper_bound) & (T > 0.0))
+
+    sigma = np.full(price.shape, np.nan)
+    converged = np.zeros(price.shape, dtype=bool)
+    iterations = np.zeros(price.shape, dtype=np.int64)
+
+    # Rounding noise of the model price, which is the difference of two terms
+    # that are both large in the money; quotes cannot be matched more closely.
+    in_the_money = lower_bound > 0.0
+    noise = 8.0 * np.finfo(float).eps * (price + 2.0 * in_the_money * np.minimum(S, K * discount))
+
+    active = np.flatnonzero(~arbitrage)
+    lo = np.zeros(active.size)
+    hi = np.full(active.size, sigma_max)
+    guess = _initial_guess(S[active], K[active], T[active], r[active])
+    kind = np.where(is_call[active], 'call', 'put')
+
+    for iteration in range(1, max_iter + 1):
+        if active.size == 0:
+            break
+        valuation = black_scholes_greeks(S[active], K[active], T[active], r[active], guess, kind)
+        diff = valuation.price - price[active]
+
+        error = np.abs(diff)
+        done = (error <= tol * valuation.vega) | (error <= noise[active]) | (hi - lo < tol)
+        sigma[active[done]] = guess[done]
+        converged[active[done]] = True
+        iterations[active] = iteration
+
+        # Model price is increasing in sigma, so the sign of diff tightens the bracket.
+        hi = np.where(diff > 0.0, guess, hi)
+        lo = np.where(diff <= 0.0, guess, lo)
+        # Newton on log prices: the price of far out-of-the-money contracts is
+        # exponentially flat in sigma, which plain Newton crawls through.
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            newton = guess - np.log(valuation.price / price[active]) * valuation.price / valuation.vega
+        bisect = 0.5 * (lo + hi)
+        guess = np.where((newton > lo) & (newton < hi), newton, bisect)
+
+        keep = ~done
+        active, lo, hi, guess, kind = active[keep], lo[keep], hi[keep], guess[keep], kind[keep]
+
+    return ImpliedVolResult(
+        sigma=sigma.reshape(shape),
+        converged=converged.reshape(shape),
+        arbitrage=arbitrage.reshape(shape),
+        iterations=iterations.reshape(shape),
+    )
@@ -0,0 +1,110 @@
+"""Vectorized Black-Scholes pricing for whole option chains.
+
+Every function broadcasts its inputs with NumPy rules, so a chain of strikes
+and expiries is priced in one pass. Degenerate contracts (T=0 or sigma=0)
+collapse to their discounted intrinsic value through masks rather than
+Python-level branches.
+"""
+from typing import NamedTuple
+
+import numpy as np
+
+_INV_SQRT_2PI = 1.0 / np.sqrt(2.0 * np.pi)
+
+
+def ndtr(x):
+    """Standard normal CDF; scipy is imported on the first call, not with the module."""
+    from scipy.special import ndtr
+
+    return ndtr(x)
+
+
+class OptionValuation(NamedTuple):
+    """Prices and Greeks of a chain, one array per field.
+
+    ``call`` and ``put`` are always both present; the remaining fields refer to
+    the side selected by ``option_type``. Theta is per year and vega/rho are per
+    unit change of sigma/r.
+    """
+    call: np.ndarray
+    put: np.ndarray
+    price: np.ndarray
+    delta: np.ndarray
+    gamma: np.ndarray
+    vega: np.ndarray
+    theta: np.ndarray
+    rho: np.ndarray
+
+
+def _is_call(option_type):
+    kind = np.asarray(option_type)
+    is_call = kind == 'call'
+    if not np.all(is_call | (kind == 'put')):
+        raise ValueError("option_type must be 'call' or 'put'")
+    return is_call
+
+
+def _intermediates(S, K, T, r, sigma):
+    """Shared d1/d2 terms; degenerate contracts get d1 = d2 = +-inf, or 0 at the money forward."""
+    S, K, T, r, sigma = np.broadcast_arrays(*(np.asarray(x, dtype=float) for x in (S, K, T, r, sigma)))
+    sqrt_T = np.sqrt(T)
+    sig_sqrt_T = sigma * sqrt_T
+    degenerate = sig_sqrt_T <= 0.0
+    safe = np.where(degenerate, 1.0, sig_sqrt_T)
+    discount = np.exp(-r * T)
+    log_moneyness = np.log(S / K)
+    d1 = (log_moneyness + (r + 0.5 * sigma ** 2) * T) / safe
+    d2 = d1 - sig_sqrt_T
+    # Without diffusion the option ends in the money iff the forward is above K
+    # (at the money forward both sides are worth zero, which d = 0 gives).
+    forward_moneyness = log_moneyness + r * T
+    d_limit = np.where(forward_moneyness == 0.0, 0.0, np.copysign(np.inf, forward_moneyness))
+    d1 = np.where(degenerate, d_limit, d1)
+    d2 = np.where(degenerate, d_limit, d2)
+    return S, K, T, r, sigma, sqrt_T, safe, degenerate, discount, d1, d2
+
+
+def black_scholes_greeks(S, K, T, r, sigma, option_type='call'):
+    """Price calls, puts and Greeks for every contract in one broadcast pass."""
+    is_call = _is_call(option_type)
+    S, K, T, r, sigma, sqrt_T, safe, degenerate, discount, d1, d2 = _intermediates(S, K, T, r, sigma)
+
+    nd1 = ndtr(d1)
+    nd2 = ndtr(d2)
+    n_minus_d1 = ndtr(-d1)
+    n_minus_d2 = ndtr(-d2)
+    pdf_d1 = np.where(degenerate, 0.0, _INV_SQRT_2PI * np.exp(-0.5 * d1 ** 2))
+    k_disc = K * discount
+
+    call = S * nd1 - k_disc * nd2
+    put = k_disc * n_minus_d2 - S * n_minus_d1
+
+    gamma = pdf_d1 / (S * safe)
+    vega = S * pdf_d1 * sqrt_T
+    decay = -S * pdf_d1 * sigma / (2.0 * np.where(degenerate, 1.0, sqrt_T))
+    call_theta = decay - r * k_disc * nd2
+    put_theta = decay + r * k_disc * n_minus_d2
+    call_rho = K * T * discount * nd2
+    put_rho = -K * T * discount * n_minus_d2
+
+    return OptionValuation(
+        call=call,
+        put=put,
+        price=np.where(is_call, call, put),
+        delta=np.where(is_call, nd1, -n_minus_d1),
+        gamma=gamma,
+        vega=vega,
+        theta=np.where(is_call, call_theta, put_theta),
+        rho=np.where(is_call, call_rho, put_rho),
+    )
+
+
+def black_scholes(S, K, T, r, sigma, option_type='call'):
+    """Black-Scholes price; scalars in give a scalar out, arrays broadcast."""
+    is_call = _is_call(option_type)
+    S, K, T, r, sigma, _, _, _, discount, d1, d2 = _intermediates(S, K, T, r, sigma)
+    # Evaluate each side with its own N(+-d) so deep out-of-the-money puts
+    # keep their precision instead of going through put-call parity.
+    sign = np.where(is_call, 1.0, -1.0)
+    price = sign * (S * ndtr(sign * d1) - K * discount * ndtr(sign * d2))
+    return price[()] if price.ndim == 0 else price
@@ -0,0 +1,118 @@
+"""Stress-grid revaluation of an options book.
+
+A book is a set of Black-Scholes positions (arrays of S, K, T, r, sigma,
+option_type and quantity). ``revalue_book`` shocks spot, vol and time on a
+full grid and revalues every position in every scenario as one broadcast
+tensor of shape (positions, spot, vol, time). The tensor is built in blocks
+sized to a memory budget, and blocks can be fanned out to a process pool.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple
+
+import numpy as np
+
+from finance_scripts.options.pricing import black_scholes_greeks, _is_call
+
+# Rough peak footprint of one black_scholes_greeks element: inputs, d1/d2,
+# the four normal CDFs, the pdf and the Greek temporaries, all float64.
+BYTES_PER_ELEMENT = 40 * 8
+
+_GREEKS = ('delta', 'gamma', 'vega', 'theta', 'rho')
+
+
+class ScenarioResult(NamedTuple):
+    """Book P&L and quantity-weighted Greeks, each of shape (spot, vol, time)."""
+    spot_shocks: np.ndarray
+    vol_shocks: np.ndarray
+    time_shocks: np.ndarray
+    pnl: np.ndarray
+    delta: np.ndarray
+    gamma: np.ndarray
+    vega: np.ndarray
+    theta: np.ndarray
+    rho: np.ndarray
+
+
+def _revalue_block(S, K, T, r, sigma, is_call, quantity, base_value,
+                   spot_shocks, vol_shocks, time_shocks):
+    """Sum P&L and Greeks of a block of positions over a block of scenarios."""
+    column = (slice(None), None, None, None)
+    shocked = black_scholes_greeks(
+        S[column] * (1.0 + spot_shocks[None, :, None, None]),
+        K[column],
+        np.maximum(T[column] - time_shocks[None, None, None, :], 0.0),
+        r[column],
+        np.maximum(sigma[column] + vol_shocks[None, None, :, None], 0.0),
+        np.where(is_call, 'call', 'put')[column],
+    )
+    weights = quantity[column]
+    totals = {'pnl': np.sum(weights * (shocked.price - base_value[column]), axis=0)}
+    for name in _GREEKS:
+        totals[name] = np.sum(weights * getattr(shocked, name), axis=0)
+    return totals
+
+
+def _blocks(n_positions, n_spot, n_vol, n_time, memory_limit):
+    """Yield (position, spot, vol, time) slices whose tensors fit memory_limit.
+
+    Axes are split from the innermost out: time only when one position's
+    full grid row of vol x time is over budget, and so on.
+    """
+    budget = int(memory_limit // BYTES_PER_ELEMENT)
+    if budget < 1:
+        raise ValueError(f"memory_limit must be at least {BYTES_PER_ELEMENT} bytes, one scenario of one position")
+    time_step = min(n_time, budget)
+    vol_step = min(n_vol, max(budget // time_step, 1))
+    spot_step = min(n_spot, max(budget // (time_step * vol_step), 1))
+    position_step = max(budget // (time_step * vol_step * spot_step), 1)
+    for start in range(0, n_positions, position_step):
+        for spot_start in range(0, n_spot, spot_step):
+            for vol_start in range(0, n_vol, vol_step):
+                for time_start in range(0, n_time, time_step):
+                    yield (slice(start, start + position_step), slice(spot_start, spot_start + spot_step),
+                           slice(vol_start, vol_start + vol_step), slice(time_start, time_start + time_step))
+
+
+def revalue_book(S, K, T, r, sigma, option_type, quantity, spot_shocks, vol_shocks,
+                 time_shocks=(0.0,), memory_limit=256 * 2 ** 20, processes=None):
+    """Revalue a book over the spot x vol x time shock grid.
+
+    ``spot_shocks`` are relative moves of S (0.1 is +10 %), ``vol_shocks``
+    are added to sigma and ``time_shocks`` are years elapsed. P&L is
+    measured against the unshocked book. ``memory_limit`` caps the bytes of
+    one block (per worker when ``processes`` is given), splitting the shock
+    axes too when one position's grid alone is over it; below one element
+    (``BYTES_PER_ELEMENT``) it raises ValueError. With ``processes`` the
+    blocks are evaluated in that many worker processes.
+    """
+    is_call = _is_call(option_type)
+    S, K, T, r, sigma, is_call, quantity = (
+        np.ravel(a) for a in np.broadcast_arrays(
+            *(np.asarray(x, dtype=float) for x in (S, K, T, r, sigma)), is_call,
+            np.asarray(quantity, dtype=float)))
+    spot_shocks, vol_shocks, time_shocks = (
+        np.atleast_1d(np.asarray(x, dtype=float)) for x in (spot_shocks, vol_shocks, time_shocks))
+    base_value = black_scholes_greeks(S, K, T, r, sigma, np.where(is_call, 'call', 'put')).price
+
+    grid_shape = (spot_shocks.size, vol_shocks.size, time_shocks.size)
+    totals = {name: np.zeros(grid_shape) for name in ('pnl',) + _GREEKS}
+    blocks = list(_blocks(S.size, spot_shocks.size, vol_shocks.size, time_shocks.size, memory_limit))
+
+    def block_args(positions, spots, vols, times):
+        return (S[positions], K[positions], T[positions], r[positions], sigma[positions],
+                is_call[positions], quantity[positions], base_value[positions],
+                spot_shocks[spots], vol_shocks[vols], time_shocks[times])
+
+    if processes:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            futures = [(block[1:], executor.submit(_revalue_block, *block_args(*block))) for block in blocks]
+            for scenarios, future in futures:
+                for name, value in future.result().items():
+                    totals[name][scenarios] += value
+    else:
+        for block in blocks:
+            for name, value in _revalue_block(*block_args(*block)).items():
+                totals[name][block[1:]] += value
+
+    return ScenarioResult(spot_shocks=spot_shocks, vol_shocks=vol_shocks,
+                          time_shocks=time_shocks, **totals)
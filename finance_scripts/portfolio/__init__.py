@@ -0,0 +1 @@
+"""Portfolio construction tools behind the Sharpe ratio notebook."""
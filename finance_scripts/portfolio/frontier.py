@@ -0,0 +1,346 @@
+"""Exact mean-variance frontier, minimum-variance and tangency portfolios.
+
+Without weight bounds every portfolio has a closed form through the
+covariance's Cholesky factor. With bounds (long-only by default) the
+frontier is traced by the parametric QP
+
+    minimize  w' cov w / 2 - t * mean' w   subject to  sum(w) = 1, lower <= w <= upper
+
+for a set of risk tolerances ``t``: ``t = 0`` is the global minimum
+variance portfolio (GMVP), and large ``t`` reaches the highest-return
+corner. The constraints do not depend on ``t``, so each solution is a
+feasible start for the next one and the primal active-set solver below
+usually needs a couple of steps per point, each a rank-one extension of
+a Cholesky factor. The tangency portfolio is the frontier point of
+highest Sharpe ratio, found by a bounded scalar search over ``t`` around
+the best traced point, on the same warm-started solves.
+
+Inputs are per-period (daily) means and covariances; outputs are
+annualized with ``periods`` and Sharpe ratios use an annual ``risk_free``.
+scipy is only imported by the functions that solve.
+"""
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from finance_scripts.portfolio.simulation import TRADING_DAYS
+
+LONG_ONLY = (0.0, 1.0)
+
+
+class Portfolio(NamedTuple):
+    weights: np.ndarray
+    returns: float
+    volatility: float
+    sharpe: float
+
+
+def _bounds(bounds, n):
+    lower, upper = bounds
+    lower = np.broadcast_to(np.asarray(-np.inf if lower is None else lower, dtype=float), (n,)).copy()
+    upper = np.broadcast_to(np.asarray(np.inf if upper is None else upper, dtype=float), (n,)).copy()
+    if np.any(lower > upper) or lower.sum() > 1.0 or upper.sum() < 1.0:
+        raise ValueError("no fully invested portfolio satisfies the weight bounds")
+    return lower, upper
+
+
+def _vertex(lower, upper):
+    """A feasible starting point: lower bounds, then fill up to 1 asset by asset."""
+    x = np.where(np.isfinite(lower), lower, np.minimum(upper, 0.0))
+    remaining = 1.0 - x.sum()
+    for i in range(len(x)):
+        step = min(remaining, upper[i] - x[i]) if remaining > 0 else max(remaining, lower[i] - x[i])
+        x[i] += step
+        remaining -= step
+        if abs(remaining) <= 1e-15:
+            break
+    return x
+
+
+class _FreeBlock:
+    """Cholesky factor of the covariance over the free coordinates.
+
+    Freeing a coordinate appends a row to the factor (O(k^2)); fixing one
+    refactors. A singular block falls back to dense KKT solves.
+    """
+
+    def __init__(self, cov, free):
+        self.cov = cov
+        self.index = list(np.flatnonzero(free))
+        self.factor = None
+        self.refactor()
+
+    def refactor(self):
+        block = self.cov[np.ix_(self.index, self.index)]
+        try:
+            self.factor = np.linalg.cholesky(block) if self.index else np.zeros((0, 0))
+        except np.linalg.LinAlgError:
+            self.factor = None
+
+    def release(self, i):
+        from scipy.linalg import solve_triangular
+
+        if self.factor is not None:
+            row = solve_triangular(self.factor, self.cov[self.index, i], lower=True) if self.index else np.zeros(0)
+            pivot = self.cov[i, i] - row @ row
+            if pivot > 1e-12 * self.cov[i, i]:
+                k = len(self.index)
+                factor = np.zeros((k + 1, k + 1))
+                factor[:k, :k], factor[k, :k], factor[k, k] = self.factor, row, np.sqrt(pivot)
+                self.index.append(i)
+                self.factor = factor
+                return
+        self.index.append(i)
+        self.refactor()
+
+    def fix(self, i):
+        self.index.remove(i)
+        self.refactor()
+
+    def step(self, gradient):
+        """Newton step on the free coordinates keeping their sum, and the budget multiplier."""
+        from scipy.linalg import cho_solve
+
+        f = self.index
+        if self.factor is not None:
+            y = cho_solve((self.factor, True), np.column_stack([gradient[f], np.ones(len(f))]))
+            nu = -y[:, 0].sum() / y[:, 1].sum()
+            step = -(y[:, 0] + nu * y[:, 1])
+            # Cancellation leaves noise of the size of the terms, not of the step.
+            if np.abs(step).max() <= 1e-12 * np.abs(y[:, 0]).max():
+                step[:] = 0.0
+            return step, nu
+        kkt = np.zeros((len(f) + 1, len(f) + 1))
+        kkt[:-1, :-1] = self.cov[np.ix_(f, f)]
+        kkt[:-1, -1] = kkt[-1, :-1] = 1.0
+        rhs = np.concatenate([-gradient[f], [0.0]])
+        try:
+            solution = np.linalg.solve(kkt, rhs)
+        except np.linalg.LinAlgError:
+            solution = np.linalg.lstsq(kkt, rhs, rcond=None)[0]
+        return solution[:-1], solution[-1]
+
+
+def solve_qp(cov, linear, lower, upper, x0=None, max_iter=None):
+    """Minimize ``x' cov x / 2 + linear' x`` with ``sum(x) = 1`` and box bounds.
+
+    Primal active-set method. ``x0`` must be feasible; its coordinates at a
+    bound start out fixed there.
+    """
+    n = len(linear)
+    x = _vertex(lower, upper) if x0 is None else np.clip(x0, lower, upper)
+    scale = max(np.abs(np.diag(cov)).max(), np.abs(linear).max(), 1e-300)
+    tol = 1e-12 * scale
+    at_lower = np.isclose(x, lower, rtol=0.0, atol=1e-12)
+    at_upper = np.isclose(x, upper, rtol=0.0, atol=1e-12) & ~at_lower
+    block = _FreeBlock(cov, ~(at_lower | at_upper))
+    for _ in range(max_iter or 10 * n + 100):
+        gradient = cov @ x + linear
+        f = np.array(block.index, dtype=int)
+        if len(f):
+            step, nu = block.step(gradient)
+        else:
+            step = np.zeros(0)
+            nu = -gradient[at_lower].min() if at_lower.any() else -gradient[at_upper].max()
+
+        if np.abs(step).max(initial=0.0) > 1e-14 * max(np.abs(x).max(), 1.0):
+            ratios = np.full(len(f), np.inf)
+            down, up = step < 0, step > 0
+            ratios[down] = (lower[f][down] - x[f][down]) / step[down]
+            ratios[up] = (upper[f][up] - x[f][up]) / step[up]
+            blocking = int(np.argmin(ratios))
+            alpha = min(1.0, max(ratios[blocking], 0.0))
+            x[f] += alpha * step
+            if alpha < 1.0:
+                i = f[blocking]
+                if step[blocking] < 0:
+                    x[i], at_lower[i] = lower[i], True
+                else:
+                    x[i], at_upper[i] = upper[i], True
+                block.fix(i)
+                continue
+            # A full step lands on the minimizer of the free subspace, where
+            # ``nu`` is the budget multiplier: no need to solve again.
+            gradient = cov @ x + linear
+
+        # Bound multipliers: >= 0 at lower bounds, <= 0 at upper bounds.
+        multipliers = gradient + nu
+        violation = np.where(at_lower, -multipliers, 0.0) + np.where(at_upper, multipliers, 0.0)
+        worst = int(np.argmax(violation))
+        if violation[worst] <= tol:
+            return x
+        at_lower[worst] = at_upper[worst] = False
+        block.release(worst)
+    raise RuntimeError("active-set QP did not converge")
+
+
+def _portfolio(weights, mean, cov, periods, risk_free):
+    returns = float(weights @ mean) * periods
+    volatility = float(np.sqrt(max(weights @ cov @ weights, 0.0) * periods))
+    sharpe = (returns - risk_free) / volatility if volatility > 0 else np.nan
+    return Portfolio(weights=weights, returns=returns, volatility=volatility, sharpe=sharpe)
+
+
+def _arrays(mean, cov):
+    return np.asarray(mean, dtype=float), np.asarray(cov, dtype=float)
+
+
+def min_variance(mean, cov, bounds=LONG_ONLY, periods=TRADING_DAYS, risk_free=0.0):
+    """Global minimum variance portfolio; ``bounds=None`` allows any weights."""
+    from scipy.linalg import cho_factor, cho_solve
+
+    mean, cov = _arrays(mean, cov)
+    if bounds is None:
+        weights = cho_solve(cho_factor(cov), np.ones(len(mean)))
+        weights /= weights.sum()
+    else:
+        weights = solve_qp(cov, np.zeros(len(mean)), *_bounds(bounds, len(mean)))
+    return _portfolio(weights, mean, cov, periods, risk_free)
+
+
+class _Tracer:
+    """Solves of the parametric QP along the risk tolerance ``t``.
+
+    Every solution is kept and the next solve starts from a neighbouring
+    ``t``, so a grid or a scalar search only pays for the few active-set
+    changes between neighbours. Of the two neighbours the one with fewer
+    free coordinates is used: freeing a coordinate extends the Cholesky
+    factor, fixing one refactors it.
+    """
+
+    def __init__(self, mean, cov, bounds):
+        self.mean, self.cov = mean, cov
+        self.lower, self.upper = _bounds(bounds, len(mean))
+        self.solutions = {}
+
+    def __call__(self, t, x0=None):
+        t = float(t)
+        if t not in self.solutions:
+            if x0 is None and self.solutions:
+                below = [s for s in self.solutions if s < t]
+                above = [s for s in self.solutions if s > t]
+                neighbours = [self.solutions[s] for s in (max(below, default=None), min(above, default=None))
+                              if s is not None]
+                x0 = min(neighbours, key=self._free)
+            self.solutions[t] = solve_qp(self.cov, -t * self.mean, self.lower, self.upper, x0)
+        return self.solutions[t].copy()
+
+    def _free(self, x):
+        return np.count_nonzero((x > self.lower + 1e-12) & (x < self.upper - 1e-12))
+
+    def corner(self):
+        """The highest-return portfolio: fill the best assets up to their bounds."""
+        x = self.lower.copy()
+        remaining = 1.0 - x.sum()
+        for i in np.argsort(-self.mean, kind='stable'):
+            step = min(remaining, self.upper[i] - x[i])
+            x[i] += step
+            remaining -= step
+        return x
+
+    def t_max(self):
+        """A risk tolerance at which the solution reaches the highest return."""
+        corner = self.corner()
+        target = self.mean @ corner
+        t = 1.0 / max(np.abs(self.mean).max(), 1e-300) * np.abs(np.diag(self.cov)).max()
+        while self.mean @ self(t, corner) < target - 1e-12 * max(abs(target), 1e-300):
+            t *= 2.0
+        return t
+
+    def trace(self, n_points):
+        """Up to ``n_points`` risk tolerances from the GMVP to the highest-return corner.
+
+        Most of the frontier's curvature sits at small ``t`` and the corner is
+        reached long before ``t_max``, so an even grid in ``t`` wastes its
+        points. Instead the segment that is longest in the (volatility,
+        return) plane is halved until there are ``n_points``.
+        """
+        ts = [0.0, self.t_max()]
+        points = [self._point(t) for t in ts]
+        while len(ts) < n_points:
+            (v0, r0), (v1, r1) = points[0], points[-1]
+            scale = np.array([max(abs(v1 - v0), 1e-300), max(abs(r1 - r0), 1e-300)])
+            gaps = np.hypot(*(np.diff(points, axis=0) / scale).T)
+            i = int(np.argmax(gaps))
+            if gaps[i] <= 1e-9:
+                break
+            t = (ts[i] + ts[i + 1]) / 2
+            ts.insert(i + 1, t)
+            points.insert(i + 1, self._point(t))
+        return ts
+
+    def _point(self, t):
+        x = self(t)
+        return np.sqrt(max(x @ self.cov @ x, 0.0)), self.mean @ x
+
+    def tangency(self, ts, periods, risk_free):
+        """The highest Sharpe ratio between the neighbours of the best point of ``ts``.
+
+        The Sharpe ratio is unimodal along the frontier, so the maximum is
+        bracketed by the grid points next to the best one.
+        """
+        from scipy.optimize import minimize_scalar
+
+        def sharpe(t):
+            value = _portfolio(self(t), self.mean, self.cov, periods, risk_free).sharpe
+            return -np.inf if np.isnan(value) else value
+
+        i = int(np.argmax([sharpe(t) for t in ts]))
+        lo, hi = ts[max(i - 1, 0)], ts[min(i + 1, len(ts) - 1)]
+        best = minimize_scalar(lambda t: -sharpe(t), bounds=(lo, hi), method='bounded',
+                               options={'xatol': 1e-10 * ts[-1]})
+        t = best.x if sharpe(best.x) > sharpe(ts[i]) else ts[i]
+        return _portfolio(self(t), self.mean, self.cov, periods, risk_free)
+
+
+def tangency(mean, cov, risk_free=0.0, bounds=LONG_ONLY, periods=TRADING_DAYS):
+    """Portfolio of highest Sharpe ratio against the annual ``risk_free`` rate."""
+    from scipy.linalg import cho_factor, cho_solve
+
+    mean, cov = _arrays(mean, cov)
+    if bounds is None:
+        weights = cho_solve(cho_factor(cov), mean - risk_free / periods)
+        return _portfolio(weights / weights.sum(), mean, cov, periods, risk_free)
+    tracer = _Tracer(mean, cov, bounds)
+    return tracer.tangency(tracer.trace(16), periods, risk_free)
+
+
+def efficient_frontier(mean, cov, n_points=50, bounds=LONG_ONLY, risk_free=0.0, periods=TRADING_DAYS):
+    """``n_points`` frontier portfolios from the GMVP up, plus the tangency portfolio.
+
+    Returns rows sorted by volatility with 'Returns', 'Volatility', 'Sharpe
+    Ratio' and one weight column per asset, like ``simulate_portfolios``.
+    The frontier's max-Sharpe row is the tangency portfolio and its
+    min-volatility row is the GMVP.
+    """
+    from scipy.linalg import cho_factor, cho_solve
+
+    names = list(mean.index) if isinstance(mean, pd.Series) else list(range(len(mean)))
+    mean, cov = _arrays(mean, cov)
+    if bounds is None:
+        # Two-fund closed form of the minimum-variance portfolio of each target return.
+        factor = cho_factor(cov)
+        inv_ones, inv_mean = cho_solve(factor, np.ones(len(mean))), cho_solve(factor, mean)
+        a, b, c = inv_ones.sum(), inv_ones @ mean, inv_mean @ mean
+        d = a * c - b * b
+        targets = np.linspace(b / a, max(mean.max(), b / a), n_points)
+        weights = [((c - r * b) * inv_ones + (r * a - b) * inv_mean) / d if d > 0 else inv_ones / a
+                   for r in targets]
+        weights.append(tangency(mean, cov, risk_free, None, periods).weights)
+    else:
+        tracer = _Tracer(mean, cov, bounds)
+        ts = tracer.trace(n_points)
+        weights = [tracer(t) for t in ts]
+        weights.append(tracer.tangency(ts, periods, risk_free).weights)
+
+    rows = [_portfolio(w, mean, cov, periods, risk_free) for w in weights]
+    table = pd.concat([
+        pd.DataFrame({
+            'Returns': [p.returns for p in rows],
+            'Volatility': [p.volatility for p in rows],
+            'Sharpe Ratio': [p.sharpe for p in rows],
+        }),
+        pd.DataFrame(np.array(weights), columns=names),
+    ], axis=1)
+    return table.sort_values('Volatility', ignore_index=True)
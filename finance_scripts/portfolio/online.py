@@ -0,0 +1,186 @@
+"""Online mean/covariance estimators and rolling risk series.
+
+Each estimator takes one day of asset returns at a time and updates its
+moments in O(assets^2), so a walk-forward study over thousands of dates
+never recomputes a window from scratch:
+
+* ``Welford``: expanding-window mean and sample covariance; ``pop``
+  removes an observation that was pushed earlier.
+* ``RollingCovariance``: the last ``window`` days, as a ``Welford`` that
+  pops the oldest day from a ring buffer once the window is full.
+* ``EWMACovariance``: exponentially weighted, ``alpha`` per day (or from a
+  ``halflife`` in days), the recursion behind pandas'
+  ``ewm(alpha, adjust=False).cov(bias=True)``.
+
+``rolling_risk`` turns any of them into annualized volatility, Sharpe
+ratio and correlation series; ``walk_forward`` yields the moments of each
+date for daily re-optimization.
+"""
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from finance_scripts.portfolio.simulation import TRADING_DAYS
+
+
+class _Moments:
+    """Annualized statistics shared by the estimators, from ``mean`` and ``cov``."""
+
+    def volatility(self, periods=TRADING_DAYS):
+        return np.sqrt(np.maximum(np.diag(self.cov), 0.0) * periods)
+
+    def sharpe(self, periods=TRADING_DAYS, risk_free=0.0):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return (self.mean * periods - risk_free) / self.volatility(periods)
+
+    def correlation(self):
+        cov = self.cov
+        scale = np.sqrt(np.maximum(np.diag(cov), 0.0))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return cov / np.outer(scale, scale)
+
+
+class Welford(_Moments):
+    """Running mean and sample covariance of pushed return vectors."""
+
+    def __init__(self, n_assets):
+        self.count = 0
+        self.mean = np.zeros(n_assets)
+        self._m2 = np.zeros((n_assets, n_assets))
+
+    @property
+    def ready(self):
+        return self.count >= 2
+
+    @property
+    def cov(self):
+        return self._m2 / (self.count - 1) if self.count >= 2 else np.full_like(self._m2, np.nan)
+
+    def push(self, x):
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self._m2 += (self.count - 1) / self.count * np.outer(delta, delta)
+
+    def pop(self, x):
+        """Remove ``x``, which must have been pushed before."""
+        if self.count <= 1:
+            self.count = 0
+            self.mean[:] = 0.0
+            self._m2[:] = 0.0
+            return
+        delta = x - self.mean
+        self._m2 -= self.count / (self.count - 1) * np.outer(delta, delta)
+        self.count -= 1
+        self.mean -= delta / self.count
+
+
+class RollingCovariance(Welford):
+    """Mean and sample covariance of the last ``window`` pushed days."""
+
+    def __init__(self, n_assets, window=TRADING_DAYS):
+        if window < 2:
+            raise ValueError("window must be at least 2 days")
+        super().__init__(n_assets)
+        self.window = window
+        self._buffer = np.empty((window, n_assets))
+        self._pushed = 0
+
+    @property
+    def ready(self):
+        return self.count == self.window
+
+    def push(self, x):
+        slot = self._pushed % self.window
+        if self._pushed >= self.window:
+            super().pop(self._buffer[slot])
+        self._buffer[slot] = x
+        self._pushed += 1
+        super().push(x)
+
+    def pop(self, x):
+        raise TypeError("a rolling window drops its oldest day itself")
+
+
+class EWMACovariance(_Moments):
+    """Exponentially weighted mean and covariance with decay ``alpha`` per day."""
+
+    def __init__(self, n_assets, alpha=None, halflife=None):
+        if (alpha is None) == (halflife is None):
+            raise ValueError("pass exactly one of alpha and halflife")
+        self.alpha = 1.0 - np.exp(-np.log(2.0) / halflife) if alpha is None else alpha
+        if not 0.0 < self.alpha <= 1.0:
+            raise ValueError("alpha must be in (0, 1]")
+        self.count = 0
+        self.mean = np.zeros(n_assets)
+        self.cov = np.zeros((n_assets, n_assets))
+
+    @property
+    def ready(self):
+        return self.count >= 2
+
+    def push(self, x):
+        self.count += 1
+        if self.count == 1:
+            self.mean[:] = x
+            return
+        delta = x - self.mean
+        self.mean += self.alpha * delta
+        self.cov *= 1.0 - self.alpha
+        self.cov += self.alpha * (1.0 - self.alpha) * np.outer(delta, delta)
+
+
+class RollingRisk(NamedTuple):
+    volatility: pd.DataFrame
+    sharpe: pd.DataFrame
+    correlation: pd.DataFrame
+
+
+def walk_forward(daily_returns, estimator=None):
+    """Yield ``(date, mean, cov)`` for every date the estimator is ready on.
+
+    ``estimator`` defaults to a one-year ``RollingCovariance``; the moments
+    of a date include that date's returns. ``mean`` and ``cov`` are
+    per-period arrays in the column order of ``daily_returns``.
+    """
+    values = daily_returns.to_numpy(dtype=float)
+    if np.isnan(values).any():
+        raise ValueError("daily returns contain NaN")
+    estimator = RollingCovariance(values.shape[1]) if estimator is None else estimator
+    for date, x in zip(daily_returns.index, values):
+        estimator.push(x)
+        if estimator.ready:
+            yield date, estimator.mean.copy(), estimator.cov.copy()
+
+
+def rolling_risk(daily_returns, estimator=None, periods=TRADING_DAYS, risk_free=0.0):
+    """Annualized volatility and Sharpe ratio per asset, and correlations, over time.
+
+    Rows start on the first date the estimator is ready. ``correlation`` is
+    laid out like ``daily_returns.rolling(window).corr()``: one block of
+    assets x assets per date, indexed by (date, asset).
+    """
+    columns = daily_returns.columns
+    dates, means, covs = [], [], []
+    for date, mean, cov in walk_forward(daily_returns, estimator):
+        dates.append(date)
+        means.append(mean)
+        covs.append(cov)
+    mean = np.array(means).reshape(len(dates), len(columns))
+    cov = np.array(covs).reshape(len(dates), len(columns), len(columns))
+
+    variance = np.maximum(np.diagonal(cov, axis1=1, axis2=2), 0.0)
+    volatility = np.sqrt(variance * periods)
+    scale = np.sqrt(variance)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe = (mean * periods - risk_free) / volatility
+        correlation = cov / (scale[:, :, None] * scale[:, None, :])
+
+    index = pd.Index(dates, name=daily_returns.index.name)
+    return RollingRisk(
+        volatility=pd.DataFrame(volatility, index=index, columns=columns),
+        sharpe=pd.DataFrame(sharpe, index=index, columns=columns),
+        correlation=pd.DataFrame(correlation.reshape(-1, len(columns)), columns=columns,
+                                 index=pd.MultiIndex.from_product([index, columns])),
+    )
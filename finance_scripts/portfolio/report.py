@@ -0,0 +1,232 @@
+"""PDF report of a portfolio simulation, rendered page by page in worker processes.
+
+``plot_results`` lays the report out as a list of page specs: the
+frontier scatter, the two allocation bar charts and their analysis text
+pages. Each spec is drawn by a worker process on the non-interactive Agg
+backend and saved as a one-page PDF in memory. The pages are then merged,
+in order, into ``path`` with pypdf. Without pypdf the pages are drawn one
+after the other into a single ``PdfPages`` file instead.
+
+The scatter is what grows with the portfolio count. Up to
+``shade_above`` points it is drawn as before, but rasterized, so the PDF
+stores one bitmap instead of a vector marker per portfolio. Above that
+the points are datashaded in the parent process: binned into a
+``SHADE_BINS`` pixel grid coloured by the mean Sharpe ratio of each
+pixel. The worker then only receives the grid and the page size stays
+bounded however many portfolios were simulated.
+"""
+from concurrent.futures import ProcessPoolExecutor
+import io
+import os
+import time
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_PATH = os.path.join(os.path.expanduser('~'), 'Downloads', 'portfolio_optimization_report.pdf')
+SHADE_BINS = (1200, 800)
+
+FRONTIER_ANALYSIS = (
+    "Analysis: The efficient frontier, as visualized in this scatter plot, is foundational in modern "
+    "portfolio theory. It represents a boundary on a risk-return plane where no other portfolios exist "
+    "with a higher expected return for the same level of risk. Each point on the frontier offers the "
+    "highest possible expected return for its level of risk. The red star signifies the portfolio with "
+    "the maximum Sharpe ratio—a key metric in finance that quantifies the risk-adjusted return of an "
+    "investment. The blue circle, on the other hand, marks the Global Minimum Variance Portfolio (GMVP). "
+    "This is the point on the frontier with the absolute lowest risk."
+)
+MAX_SHARPE_ANALYSIS = (
+    "Analysis: This bar chart delves into the portfolio composition of the one with the maximum Sharpe "
+    "ratio, shedding light on the specific weightings of individual stocks. Stock allocation in a "
+    "portfolio is paramount, as it directly influences the portfolio's overall risk and return "
+    "characteristics. The height of each bar signifies the percentage of the portfolio's total value "
+    "that's allocated to a particular stock. A higher allocation to a specific stock suggests that, given "
+    "the historical data and our assumptions, this stock contributes more significantly to enhancing the "
+    "portfolio's risk-adjusted return."
+)
+GMVP_ANALYSIS = (
+    "Analysis: This visualization breaks down the composition of the Global Minimum Variance Portfolio "
+    "(GMVP), emphasizing the diversification strategy that minimizes the total portfolio risk. The GMVP "
+    "is a fascinating construct in portfolio management, as it solely focuses on minimizing risk, "
+    "regardless of the returns. Each bar in the chart represents the proportion of the portfolio invested "
+    "in a specific stock. Diversification is a core principle here: by spreading investments across "
+    "various assets, the GMVP aims to mitigate unsystematic risks associated with individual stocks."
+)
+
+
+class Report(NamedTuple):
+    path: str
+    pages: pd.DataFrame  # title, seconds to draw and save, bytes (NaN without pypdf)
+    size: int
+
+
+def _shade(x, y, values, bins=SHADE_BINS):
+    """Mean of ``values`` per pixel of a ``bins`` grid over the points' extent."""
+    extent = [x.min(), x.max(), y.min(), y.max()]
+    if extent[0] == extent[1]:
+        extent[1] = extent[0] + 1e-12
+    if extent[2] == extent[3]:
+        extent[3] = extent[2] + 1e-12
+    grid_range = [extent[:2], extent[2:]]
+    counts, _, _ = np.histogram2d(x, y, bins=bins, range=grid_range)
+    sums, _, _ = np.histogram2d(x, y, bins=bins, range=grid_range, weights=values)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = sums / counts
+    return mean.T, extent
+
+
+def _frontier_page(samples, frontier, max_sharpe, min_volatility):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    fig = plt.figure(figsize=(12, 8))
+    if samples['kind'] == 'points':
+        sns.scatterplot(x='Volatility', y='Returns', hue='Sharpe Ratio', data=samples['data'], palette='viridis',
+                        edgecolor=None, alpha=0.7, rasterized=True)
+    else:
+        image = plt.imshow(samples['grid'], origin='lower', extent=samples['extent'], aspect='auto',
+                           cmap='viridis', interpolation='nearest')
+        plt.colorbar(image, label='Sharpe Ratio')
+    if frontier is not None:
+        plt.plot(frontier['Volatility'], frontier['Returns'], color='black', linewidth=1.5, label='Efficient Frontier')
+    plt.scatter(max_sharpe['Volatility'], max_sharpe['Returns'], color='red', s=100, marker='*',
+                label=f'Max Sharpe Ratio Portfolio (Sharpe Ratio: {max_sharpe["Sharpe Ratio"]:.2f})')
+    plt.scatter(min_volatility['Volatility'], min_volatility['Returns'], color='blue', s=100, marker='o',
+                label=f'Global Minimum Variance Portfolio (Volatility: {min_volatility["Volatility"]:.2f})')
+    plt.title("Efficient Frontier with Highlighted Optimal and GMVP Portfolios")
+    plt.xlabel("Annualized Volatility")
+    plt.ylabel("Annualized Returns")
+    plt.legend()
+    plt.tight_layout()
+    return fig
+
+
+def _text_page(text):
+    import matplotlib.pyplot as plt
+
+    fig = plt.figure(figsize=(12, 6))
+    plt.axis('off')
+    plt.text(0.05, 0.95, text, wrap=True, horizontalalignment='left', fontsize=10, verticalalignment='top')
+    return fig
+
+
+def _allocation_page(allocation, title, color):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    fig = plt.figure(figsize=(12, 6))
+    sns.barplot(x=allocation.index, y=allocation.values, color=color)
+    plt.title(title)
+    plt.ylabel("Weight")
+    plt.xlabel("Stock")
+    for i, value in enumerate(allocation.values):
+        plt.text(i, value + 0.01, f"{value*100:.2f}%", ha='center', va='bottom', fontsize=12)
+    plt.tight_layout()
+    return fig
+
+
+PAGES = {'frontier': _frontier_page, 'text': _text_page, 'allocation': _allocation_page}
+
+
+def _setup():
+    """Non-interactive backend and the report's seaborn style, once per process."""
+    import matplotlib
+
+    matplotlib.use('Agg')
+    import seaborn as sns
+
+    sns.set_style("whitegrid")
+
+
+def _draw(spec):
+    kind, args = spec
+    return PAGES[kind](*args)
+
+
+def _render(spec):
+    """Draw one page and return it as PDF bytes, with the seconds it took."""
+    import matplotlib.pyplot as plt
+
+    start = time.perf_counter()
+    fig = _draw(spec)
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='pdf')
+    plt.close(fig)
+    return buffer.getvalue(), time.perf_counter() - start
+
+
+def _samples(df, shade_above):
+    if len(df) <= shade_above:
+        return {'kind': 'points', 'data': df[['Volatility', 'Returns', 'Sharpe Ratio']]}
+    grid, extent = _shade(df['Volatility'].to_numpy(), df['Returns'].to_numpy(), df['Sharpe Ratio'].to_numpy())
+    return {'kind': 'shaded', 'grid': grid, 'extent': extent}
+
+
+def report_pages(df, tickers, frontier=None, shade_above=20_000):
+    """Page specs ``(title, (kind, args))`` of the report, in order."""
+    # The exact frontier, when given, supplies the optimal portfolios; the samples are only the cloud.
+    best = df if frontier is None else frontier
+    max_sharpe = best.loc[best['Sharpe Ratio'].idxmax()]
+    min_volatility = best.loc[best['Volatility'].idxmin()]
+    summary = ['Volatility', 'Returns', 'Sharpe Ratio']
+    curve = None if frontier is None else frontier[['Volatility', 'Returns']]
+    return [
+        ("Efficient Frontier", ('frontier', (_samples(df, shade_above), curve, max_sharpe[summary],
+                                             min_volatility[summary]))),
+        ("Efficient Frontier Analysis", ('text', (FRONTIER_ANALYSIS,))),
+        ("Max Sharpe Ratio Allocation", ('allocation', (max_sharpe[tickers].sort_values(ascending=False),
+                                                        "Stock Allocation for Maximum Sharpe Ratio Portfolio",
+                                                        "blue"))),
+        ("Max Sharpe Ratio Analysis", ('text', (MAX_SHARPE_ANALYSIS,))),
+        ("GMVP Allocation", ('allocation', (min_volatility[tickers].sort_values(ascending=False),
+                                            "Stock Allocation for Global Minimum Variance Portfolio", "red"))),
+        ("GMVP Analysis", ('text', (GMVP_ANALYSIS,))),
+    ]
+
+
+def plot_results(df, tickers, frontier=None, path=DEFAULT_PATH, processes=None, shade_above=20_000):
+    """Write the portfolio report to ``path`` and return what each page cost.
+
+    ``df`` holds the sampled portfolios of ``simulate_portfolios`` and
+    ``frontier`` optionally the exact ``efficient_frontier``, which is then
+    drawn and supplies the max-Sharpe and GMVP portfolios. ``processes``
+    caps the render workers (default: one per page, up to the CPU count).
+    """
+    pages = report_pages(df, list(tickers), frontier, shade_above)
+    titles = [title for title, _ in pages]
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    try:
+        from pypdf import PdfWriter
+    except ImportError:
+        PdfWriter = None
+
+    if PdfWriter is None:
+        _setup()
+        import matplotlib.pyplot as plt
+        from matplotlib.backends.backend_pdf import PdfPages
+
+        seconds = []
+        with PdfPages(path) as pdf:
+            for _, spec in pages:
+                start = time.perf_counter()
+                fig = _draw(spec)
+                pdf.savefig(fig)
+                plt.close(fig)
+                seconds.append(time.perf_counter() - start)
+        sizes = [np.nan] * len(pages)
+    else:
+        workers = min(processes or os.cpu_count() or 1, len(pages))
+        with ProcessPoolExecutor(workers, initializer=_setup) as pool:
+            rendered = list(pool.map(_render, [spec for _, spec in pages]))
+        writer = PdfWriter()
+        for page, _ in rendered:
+            writer.append(io.BytesIO(page))
+        with open(path, 'wb') as handle:
+            writer.write(handle)
+        seconds = [elapsed for _, elapsed in rendered]
+        sizes = [len(page) for page, _ in rendered]
+
+    table = pd.DataFrame({'title': titles, 'seconds': seconds, 'bytes': sizes})
+    return Report(path=path, pages=table, size=os.path.getsize(path))
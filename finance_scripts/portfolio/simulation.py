@@ -0,0 +1,112 @@
+"""Random-weight portfolio sampling and Monte Carlo terminal wealth.
+
+``simulate_portfolios`` draws random long-only weightings and scores them
+in batches: one (portfolios x assets) weight block per chunk, annualized
+returns from a single product with the mean vector and variances from the
+row sums of ``(W @ cov) * W``. Results are written into one preallocated
+array that backs the returned DataFrame, so peak memory is the output plus
+one chunk of temporaries.
+
+``terminal_wealth`` is the opt-in path simulation. The covariance is
+factorized once; correlated daily returns are drawn chunk by chunk and
+every portfolio of a block sees the same paths (common random numbers),
+which also makes portfolios comparable with each other. A portfolio's
+daily return is its drift plus the normals times ``L.T @ w``, so asset
+returns are never formed. Path chunks are seeded from one SeedSequence and
+regenerated for each block of portfolios, which keeps memory bounded by
+``memory_limit`` however many portfolios are simulated.
+"""
+import math
+
+import numpy as np
+import pandas as pd
+
+TRADING_DAYS = 252
+WEALTH_COLUMNS = ('Terminal Wealth Mean', 'Terminal Wealth Std', 'Terminal Wealth P5', 'Terminal Wealth P50',
+                  'Terminal Wealth P95', 'Probability of Loss')
+
+
+def covariance_factor(cov):
+    """Matrix ``L`` with ``L @ L.T == cov``; falls back to an eigen-decomposition
+    when the covariance is only positive semi-definite."""
+    try:
+        return np.linalg.cholesky(cov)
+    except np.linalg.LinAlgError:
+        eigenvalues, eigenvectors = np.linalg.eigh(cov)
+        return eigenvectors * np.sqrt(np.clip(eigenvalues, 0.0, None))
+
+
+def portfolio_stats(weights, mean_returns, cov_matrix):
+    """Annualized return and volatility of each row of ``weights``."""
+    returns = weights @ mean_returns * TRADING_DAYS
+    variance = np.einsum('ij,ij->i', weights @ cov_matrix, weights)
+    return returns, np.sqrt(np.maximum(variance, 0.0) * TRADING_DAYS)
+
+
+def simulate_portfolios(daily_returns, num_portfolios=5000, num_days=TRADING_DAYS * 5, num_paths=0, seed=None,
+                        memory_limit=64 * 2 ** 20, risk_free=0.0):
+    """Score ``num_portfolios`` random weightings of the columns of ``daily_returns``.
+
+    Returns one row per portfolio with 'Returns', 'Volatility', 'Sharpe
+    Ratio' (against the annual ``risk_free`` rate) and a weight column per
+    asset. With ``num_paths`` > 0 the
+    ``terminal_wealth`` columns over ``num_days`` are added as well.
+    """
+    rng = np.random.default_rng(seed)
+    mean_returns = daily_returns.mean().to_numpy()
+    cov_matrix = daily_returns.cov().to_numpy()
+    n_assets = len(mean_returns)
+
+    out = np.empty((num_portfolios, 3 + n_assets))
+    chunk = max(int(memory_limit // (8 * 3 * n_assets)), 1)
+    for start in range(0, num_portfolios, chunk):
+        stop = min(start + chunk, num_portfolios)
+        weights = out[start:stop, 3:]
+        weights[:] = rng.random((stop - start, n_assets))
+        weights /= weights.sum(axis=1, keepdims=True)
+        returns, volatility = portfolio_stats(weights, mean_returns, cov_matrix)
+        out[start:stop, 0] = returns
+        out[start:stop, 1] = volatility
+        out[start:stop, 2] = (returns - risk_free) / volatility
+
+    df = pd.DataFrame(out, columns=['Returns', 'Volatility', 'Sharpe Ratio', *daily_returns.columns], copy=False)
+    if num_paths:
+        wealth = terminal_wealth(daily_returns, out[:, 3:], num_days, num_paths, seed=rng.integers(2 ** 63),
+                                 memory_limit=memory_limit)
+        df = pd.concat([df, wealth], axis=1)
+    return df
+
+
+def terminal_wealth(daily_returns, weights, num_days=TRADING_DAYS * 5, num_paths=1000, seed=None,
+                    memory_limit=64 * 2 ** 20):
+    """Distribution of the growth of 1 over ``num_days`` for each row of ``weights``.
+
+    Daily asset returns are multivariate normal with the sample mean and
+    covariance of ``daily_returns``. Returns one row per portfolio with the
+    mean, standard deviation, 5th/50th/95th percentiles of terminal wealth
+    and the probability of ending below 1.
+    """
+    mean_returns = daily_returns.mean().to_numpy()
+    factor = covariance_factor(daily_returns.cov().to_numpy())
+    weights = np.atleast_2d(np.asarray(weights, dtype=float))
+    n_portfolios, n_assets = weights.shape
+
+    block = min(n_portfolios, 256)
+    # Normals plus portfolio returns of one path, per byte budget.
+    paths_per_chunk = max(int(memory_limit // (8 * num_days * (n_assets + block))), 1)
+    path_seeds = np.random.SeedSequence(seed).spawn(math.ceil(num_paths / paths_per_chunk))
+
+    stats = np.empty((n_portfolios, len(WEALTH_COLUMNS)))
+    for start in range(0, n_portfolios, block):
+        w = weights[start:start + block]
+        drift = mean_returns @ w.T
+        loadings = factor.T @ w.T
+        wealth = np.empty((num_paths, len(w)))
+        for j, path_seed in enumerate(path_seeds):
+            lo, hi = j * paths_per_chunk, min((j + 1) * paths_per_chunk, num_paths)
+            normals = np.random.default_rng(path_seed).standard_normal((hi - lo, num_days, n_assets))
+            wealth[lo:hi] = np.prod(1.0 + drift + normals @ loadings, axis=1)
+        p5, p50, p95 = np.percentile(wealth, [5, 50, 95], axis=0)
+        stats[start:start + len(w)] = np.column_stack([
+            wealth.mean(axis=0), wealth.std(axis=0, ddof=1), p5, p50, p95, (wealth < 1.0).mean(axis=0)])
+    return pd.DataFrame(stats, columns=WEALTH_COLUMNS)
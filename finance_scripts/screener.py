@@ -0,0 +1,151 @@
+"""Columnar fundamental screening.
+
+Statements are turned into metrics once: ``load_metrics`` reads the
+income statement and balance sheet of every ticker (through a
+``FundamentalsStore`` or anything with its ``statement`` call) and keeps
+one row of ratios per ticker. Screening is then a matter of boolean masks
+over that table. A criterion is a ``DataFrame.eval`` expression over the
+metric columns and threshold names, e.g.
+``"`Gross Margin` > GROSS_MARGIN_THRESHOLD and `Current Ratio` > 1.5"``,
+so changing a criterion re-screens the whole universe without touching
+the statements again.
+
+Ratios are plain fractions (0.25 is a 25% margin). Tickers lacking a
+statement or one of the required line items are left out of the table,
+as the cockpit always did; a ratio that cannot be computed is NaN, which
+fails every comparison.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+REVENUE_GROWTH_THRESHOLD = 0.10
+GROSS_MARGIN_THRESHOLD = 0.40
+OPERATING_MARGIN_THRESHOLD = 0.15
+NET_MARGIN_THRESHOLD = 0.10
+CURRENT_RATIO_THRESHOLD = 2.0
+
+THRESHOLDS = {
+    'REVENUE_GROWTH_THRESHOLD': REVENUE_GROWTH_THRESHOLD,
+    'GROSS_MARGIN_THRESHOLD': GROSS_MARGIN_THRESHOLD,
+    'OPERATING_MARGIN_THRESHOLD': OPERATING_MARGIN_THRESHOLD,
+    'NET_MARGIN_THRESHOLD': NET_MARGIN_THRESHOLD,
+    'CURRENT_RATIO_THRESHOLD': CURRENT_RATIO_THRESHOLD,
+}
+# The cockpit's checkboxes.
+CRITERIA = {
+    'Revenue Growth': '`Revenue Growth` > REVENUE_GROWTH_THRESHOLD',
+    'Gross Margin': '`Gross Margin` > GROSS_MARGIN_THRESHOLD',
+    'Operating Margin': '`Operating Margin` > OPERATING_MARGIN_THRESHOLD',
+    'Net Margin': '`Net Margin` > NET_MARGIN_THRESHOLD',
+    'Current Ratio': '`Current Ratio` > CURRENT_RATIO_THRESHOLD',
+}
+METRICS = ['Revenue Growth', 'Gross Margin', 'Operating Margin', 'Net Margin', 'Current Ratio', 'Revenue',
+           'Net Income Growth', 'Current Assets', 'Current Liabilities']
+
+INCOME_ITEMS = ['Total Revenue', 'Gross Profit', 'Operating Income', 'Net Income']
+CURRENT_ASSETS_ITEMS = ['Total Current Assets', 'Current Assets']
+CURRENT_LIABILITIES_ITEMS = ['Total Current Liabilities', 'Current Liabilities']
+
+
+def _growth(row):
+    return (row[0] - row[1]) / row[1] if len(row) > 1 else np.nan
+
+
+def ticker_metrics(income_stmt, balance_sheet):
+    """``METRICS`` of one ticker from its statements (latest period first), or None."""
+    if income_stmt.empty or balance_sheet.empty:
+        return None
+    income_stmt = income_stmt.fillna(0)
+    balance_sheet = balance_sheet.fillna(0)
+    if not all(item in income_stmt.index for item in INCOME_ITEMS):
+        return None
+    assets = next((item for item in CURRENT_ASSETS_ITEMS if item in balance_sheet.index), None)
+    liabilities = next((item for item in CURRENT_LIABILITIES_ITEMS if item in balance_sheet.index), None)
+    if not assets or not liabilities:
+        return None
+
+    income = {item: income_stmt.loc[item].to_numpy(dtype=float) for item in INCOME_ITEMS}
+    current = balance_sheet.loc[[assets, liabilities]].to_numpy(dtype=float)[:, 0]
+    revenue = income['Total Revenue']
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return {
+            'Revenue Growth': _growth(revenue),
+            'Gross Margin': income['Gross Profit'][0] / revenue[0],
+            'Operating Margin': income['Operating Income'][0] / revenue[0],
+            'Net Margin': income['Net Income'][0] / revenue[0],
+            'Current Ratio': current[0] / current[1],
+            'Revenue': revenue[0],
+            'Net Income Growth': _growth(income['Net Income']),
+            'Current Assets': current[0],
+            'Current Liabilities': current[1],
+        }
+
+
+def load_metrics(store, tickers, max_workers=10, errors=None):
+    """One row of ``METRICS`` per ticker with usable statements, in ``tickers`` order.
+
+    Statements are read on ``max_workers`` threads. A ticker whose
+    statements raise is skipped; its exception goes into ``errors`` when a
+    dict is passed.
+    """
+    def read(ticker):
+        try:
+            return ticker_metrics(store.statement(ticker, 'financials'), store.statement(ticker, 'balance_sheet'))
+        except Exception as e:
+            if errors is not None:
+                errors[ticker] = e
+            return None
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        rows = list(executor.map(read, tickers))
+    return metrics_table(dict(zip(tickers, rows)), tickers)
+
+
+def metrics_table(rows, tickers=None):
+    """The metrics table of ``{ticker: ticker_metrics(...)}``, in ``tickers`` order (default: the dict's).
+
+    Tickers missing from ``rows`` or mapped to None are left out, so a
+    table can be rebuilt from rows as they stream in.
+    """
+    kept = [(ticker, rows[ticker]) for ticker in (rows if tickers is None else tickers)
+            if rows.get(ticker) is not None]
+    table = pd.DataFrame([row for _, row in kept], columns=METRICS,
+                         index=pd.Index([ticker for ticker, _ in kept], name='Ticker'))
+    return table.astype(float)
+
+
+def mask(metrics, criteria, thresholds=THRESHOLDS):
+    """Rows of ``metrics`` meeting every criterion, as a boolean Series.
+
+    Each criterion is an expression for ``DataFrame.eval`` over the metric
+    columns (backquoted when they contain spaces) and the names in
+    ``thresholds``, or a boolean Series aligned with ``metrics``.
+    """
+    keep = pd.Series(True, index=metrics.index)
+    for criterion in criteria:
+        if isinstance(criterion, str):
+            criterion = metrics.eval(criterion, resolvers=[thresholds])
+        keep &= criterion.fillna(False).astype(bool)
+    return keep
+
+
+def screen(metrics, criteria, thresholds=THRESHOLDS, sort_by=None, ascending=False):
+    """The rows of ``metrics`` meeting every criterion, optionally sorted by ``sort_by``."""
+    selected = metrics[mask(metrics, criteria, thresholds)]
+    if sort_by is not None:
+        selected = selected.sort_values(sort_by, ascending=ascending, kind='stable')
+    return selected
+
+
+def rank(metrics, columns, ascending=False):
+    """Composite rank: the mean percentile rank over ``columns``, best first.
+
+    ``ascending`` is one flag or one per column; False ranks high values
+    best. The score is added as a 'Score' column between 0 and 1.
+    """
+    flags = [ascending] * len(columns) if isinstance(ascending, bool) else list(ascending)
+    percentiles = [metrics[column].rank(pct=True, ascending=not flag) for column, flag in zip(columns, flags)]
+    score = pd.concat(percentiles, axis=1).mean(axis=1)
+    return metrics.assign(Score=score).sort_values('Score', ascending=False, kind='stable')
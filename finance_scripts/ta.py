@@ -0,0 +1,163 @@
+"""Vectorized technical indicators over (symbols, bars) arrays.
+
+Every function works along the last axis, so a 1-D series and a matrix
+with one row per symbol go through the same code. Recursive filters
+(EMA, Wilder/RMA smoothing) run through ``scipy.signal.lfilter``, which
+evaluates the recursion for all rows in compiled code; scipy.signal is
+imported on the first filter, as it takes longer to import than the rest
+of the package. Moving averages
+follow the Pine Script conventions: NaN until the window is full, and
+EMA/RMA seeded with the SMA of their first window.
+"""
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def lfilter(b, a, x, axis=-1, zi=None):
+    from scipy.signal import lfilter
+
+    return lfilter(b, a, x, axis=axis, zi=zi)
+
+
+def _nan_like(x):
+    return np.full(np.shape(x), np.nan)
+
+
+def _first_valid(x):
+    """First column at which no row is NaN (``x.shape[-1]`` if none)."""
+    valid = ~np.isnan(x).reshape(-1, x.shape[-1]).any(axis=0)
+    return int(np.argmax(valid)) if valid.any() else x.shape[-1]
+
+
+def recursive_filter(x, alpha, initial=0.0):
+    """``y[i] = alpha * x[i] + (1 - alpha) * y[i - 1]`` with ``y[-1] = initial``."""
+    x = np.asarray(x, dtype=float)
+    initial = np.broadcast_to(np.asarray(initial, dtype=float), x.shape[:-1])
+    zi = ((1 - alpha) * initial)[..., None]
+    return lfilter([alpha], [1.0, -(1 - alpha)], x, axis=-1, zi=zi)[0]
+
+
+def _seeded_filter(x, period, alpha):
+    x = np.asarray(x, dtype=float)
+    out = _nan_like(x)
+    seed_end = _first_valid(x) + period
+    if seed_end > x.shape[-1]:
+        return out
+    seed = x[..., seed_end - period:seed_end].mean(axis=-1)
+    out[..., seed_end - 1] = seed
+    out[..., seed_end:] = recursive_filter(x[..., seed_end:], alpha, seed)
+    return out
+
+
+def ema(x, period):
+    """Exponential moving average, ``alpha = 2 / (period + 1)``."""
+    return _seeded_filter(x, period, 2 / (period + 1))
+
+
+def rma(x, period):
+    """Wilder's smoothing, ``alpha = 1 / period``."""
+    return _seeded_filter(x, period, 1 / period)
+
+
+def _fir(x, weights):
+    """Trailing weighted sum; NaN until the window is full."""
+    x = np.asarray(x, dtype=float)
+    out = _nan_like(x)
+    start = _first_valid(x)
+    n = len(weights)
+    if start + n > x.shape[-1]:
+        return out
+    out[..., start + n - 1:] = lfilter(weights[::-1], [1.0], x[..., start:], axis=-1)[..., n - 1:]
+    return out
+
+
+def sma(x, period):
+    return _fir(x, np.full(period, 1.0 / period))
+
+
+def wma(x, period):
+    """Linearly weighted moving average, heaviest weight on the latest bar."""
+    weights = np.arange(1.0, period + 1)
+    return _fir(x, weights / weights.sum())
+
+
+def hma(x, period):
+    """Hull moving average."""
+    return wma(2 * wma(x, period // 2) - wma(x, period), int(round(np.sqrt(period))))
+
+
+def ehma(x, period):
+    """Exponential Hull moving average."""
+    return ema(2 * ema(x, period // 2) - ema(x, period), int(round(np.sqrt(period))))
+
+
+def thma(x, period):
+    """Triple Hull moving average."""
+    return wma(3 * wma(x, period // 3) - wma(x, period // 2) - wma(x, period), period)
+
+
+def true_range(high, low, close):
+    """True range; the first bar, with no previous close, uses high - low."""
+    high, low, close = (np.asarray(a, dtype=float) for a in (high, low, close))
+    prev_close = np.concatenate([close[..., :1], close[..., :-1]], axis=-1)
+    tr = np.maximum(np.maximum(high - low, np.abs(high - prev_close)), np.abs(low - prev_close))
+    tr[..., 0] = high[..., 0] - low[..., 0]
+    return tr
+
+
+def atr(high, low, close, period):
+    return rma(true_range(high, low, close), period)
+
+
+def adx(high, low, close, period):
+    """ADX, +DI and -DI exactly as the MT5 bot's ``calculate_adx`` computes them."""
+    high, low, close = (np.asarray(a, dtype=float) for a in (high, low, close))
+    up = np.zeros_like(high)
+    down = np.zeros_like(high)
+    up[..., 1:] = np.maximum(high[..., 1:] - high[..., :-1], 0.0)
+    down[..., 1:] = np.maximum(low[..., :-1] - low[..., 1:], 0.0)
+    # Only the larger move counts; ties cancel both.
+    up_wins = up > down
+    down_wins = down > up
+    up = np.where(up_wins, up, 0.0)
+    down = np.where(down_wins, down, 0.0)
+
+    tr = np.zeros_like(high)
+    prev_close = close[..., :-1]
+    tr[..., 1:] = np.maximum(np.maximum(np.abs(high[..., 1:] - low[..., 1:]), np.abs(high[..., 1:] - prev_close)),
+                             np.abs(low[..., 1:] - prev_close))
+    safe_tr = np.where(tr != 0.0, tr, 1.0)
+    pos_dm = np.where(tr != 0.0, 100.0 * up / safe_tr, 0.0)
+    neg_dm = np.where(tr != 0.0, 100.0 * down / safe_tr, 0.0)
+
+    alpha = 2 / (period + 1)
+    pdi = recursive_filter(pos_dm, alpha)
+    ndi = recursive_filter(neg_dm, alpha)
+    total = pdi + ndi
+    safe_total = np.where(total != 0.0, total, 1.0)
+    dx = np.where(total != 0.0, 100.0 * np.abs((pdi - ndi) / safe_total), 0.0)
+    return recursive_filter(dx, alpha), pdi, ndi
+
+
+def cci(high, low, close, period, memory_limit=4 * 2 ** 20):
+    """Commodity Channel Index on the typical price, TA-Lib conventions.
+
+    The mean absolute deviation has no running form, so every bar reduces its
+    full window. Windows are processed in blocks of bars whose temporaries
+    stay within ``memory_limit`` bytes; the default keeps a block in cache.
+    """
+    typical = (np.asarray(high, dtype=float) + low + close) / 3.0
+    out = _nan_like(typical)
+    n = typical.shape[-1]
+    rows = typical.size // n if n else 1
+    chunk_bars = max(memory_limit // (8 * rows * period), 1)
+    for start in range(period - 1, n, chunk_bars):
+        stop = min(start + chunk_bars, n)
+        windows = sliding_window_view(typical[..., start - period + 1:stop], period, axis=-1)
+        mean = windows.mean(axis=-1)
+        mean_deviation = np.abs(windows - mean[..., None]).mean(axis=-1)
+        deviation = typical[..., start:stop] - mean
+        valid = (deviation != 0.0) & (mean_deviation != 0.0)
+        safe = np.where(valid, 0.015 * mean_deviation, 1.0)
+        out[..., start:stop] = np.where(valid, deviation / safe, 0.0)
+    return out
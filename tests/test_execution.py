@@ -0,0 +1,104 @@
+from itertools import count
+
+import numpy as np
+import pytest
+
+from finance_scripts.mt5bot.bar_store import RATES_DTYPE
+from finance_scripts.mt5bot.execution import OrderExecutor
+from finance_scripts.mt5bot.replay import ReplayMT5
+
+
+class RecordingMT5(ReplayMT5):
+    """ReplayMT5 logging the name of every broker call made from outside the simulator."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.calls = []
+        self._depth = 0
+
+    def _record(self, name, *args):
+        if not self._depth:
+            self.calls.append(name)
+        self._depth += 1
+        try:
+            return getattr(super(), name)(*args)
+        finally:
+            self._depth -= 1
+
+    def positions_get(self, symbol=None):
+        return self._record('positions_get', symbol)
+
+    def symbol_info_tick(self, symbol):
+        return self._record('symbol_info_tick', symbol)
+
+    def order_send(self, request):
+        return self._record('order_send', request)
+
+
+def make_mt(slippage=0.0):
+    bars = np.zeros(3, dtype=RATES_DTYPE)
+    bars['time'] = [0, 3600, 7200]
+    bars['open'] = [100.0, 101.0, 102.0]
+    bars['spread'] = 10
+    return RecordingMT5({'SP500': bars}, slippage=slippage)
+
+
+def test_cycle_takes_one_snapshot_of_positions_and_tick():
+    mt = make_mt()
+    executor = OrderExecutor(mt)
+    cycle = executor.cycle('SP500')
+    for _ in range(5):
+        cycle.open_positions()
+        cycle.buy(0.1, "buy")
+    assert mt.calls == ['positions_get', 'symbol_info_tick']
+    assert executor.stats.broker_calls == 2
+    cycle.submit()
+    assert mt.calls == ['positions_get', 'symbol_info_tick'] + ['order_send'] * 5
+
+
+def test_closes_go_first_grouped_by_direction_and_deduplicated():
+    mt = make_mt()
+    executor = OrderExecutor(mt)
+    opening = executor.cycle('SP500')
+    opening.sell(0.1, "sell 1")
+    opening.buy(0.1, "buy 1")
+    opening.sell(0.1, "sell 2")
+    opening.buy(0.1, "buy 2")
+    opening.submit()
+
+    cycle = executor.cycle('SP500')
+    for position in cycle.positions:
+        cycle.close(position, f"close {position.comment}")
+    cycle.close(cycle.positions[0], "duplicate")
+    cycle.buy(0.2, "new buy")
+    assert cycle.open_positions() == []
+    results = cycle.submit()
+
+    comments = [result.request['comment'] for result in results]
+    assert comments == ["close buy 1", "close buy 2", "close sell 1", "close sell 2", "new buy"]
+    assert [result.request['type'] for result in results[:4]] == [mt.ORDER_TYPE_SELL] * 2 + [mt.ORDER_TYPE_BUY] * 2
+    assert len(mt.trades) == 4
+    assert [position.comment for position in mt.positions.values()] == ["new buy"]
+
+
+def test_latency_and_slippage_are_recorded():
+    mt = make_mt(slippage=0.05)
+    ticks = count()
+    executor = OrderExecutor(mt, timer=lambda: 0.25 * next(ticks))
+    cycle = executor.cycle('SP500')
+    cycle.buy(0.1, "buy")
+    cycle.sell(0.1, "sell")
+    cycle.submit()
+
+    buy, sell = executor.stats.records
+    assert buy.requested_price == pytest.approx(100.1)
+    assert buy.fill_price == pytest.approx(100.15)
+    assert sell.requested_price == pytest.approx(100.0)
+    assert sell.fill_price == pytest.approx(99.95)
+    assert buy.slippage == pytest.approx(0.05) and sell.slippage == pytest.approx(0.05)
+    assert buy.latency == sell.latency == 0.25
+    assert buy.retcode == mt.TRADE_RETCODE_DONE
+    summary = executor.stats.summary()
+    assert summary['orders'] == summary['filled'] == 2
+    assert summary['broker_calls'] == 4
+    assert summary['mean_slippage'] == pytest.approx(0.05)
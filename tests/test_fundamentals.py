@@ -0,0 +1,102 @@
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+import pytest
+
+from finance_scripts.data.fundamentals import FrameProvider, FundamentalsStore
+
+NOW = datetime(2024, 3, 1, tzinfo=timezone.utc)
+
+
+def statement(*period_ends):
+    return pd.DataFrame([[100.0] * len(period_ends)], index=['Total Revenue'],
+                        columns=pd.DatetimeIndex(period_ends))
+
+
+class Clock:
+    def __init__(self, now=NOW):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def provider():
+    return FrameProvider({('AAA', 'financials'): statement('2023-12-31', '2022-12-31')}, ['AAA', 'BBB'])
+
+
+def make_store(tmp_path, provider, clock, **options):
+    store = FundamentalsStore(str(tmp_path / 'fundamentals.sqlite'), provider, **options)
+    store._now = clock
+    return store
+
+
+def test_second_read_is_served_from_the_store(tmp_path, provider):
+    store = make_store(tmp_path, provider, Clock())
+    first = store.statement('AAA', 'financials')
+    second = store.statement('AAA', 'financials')
+    assert provider.calls == [('AAA', 'financials')]
+    pd.testing.assert_frame_equal(first, second, check_freq=False)
+    assert store.constituents() == store.constituents() == ['AAA', 'BBB']
+    assert provider.calls.count(('constituents',)) == 1
+
+
+def test_refetch_after_ttl(tmp_path, provider):
+    clock = Clock()
+    store = make_store(tmp_path, provider, clock, ttl=timedelta(days=30), filing_lag=timedelta(days=400))
+    store.statement('AAA', 'financials')
+    clock.now += timedelta(days=29)
+    store.statement('AAA', 'financials')
+    assert len(provider.calls) == 1
+    clock.now += timedelta(days=2)
+    store.statement('AAA', 'financials')
+    assert len(provider.calls) == 2
+
+
+def test_refetch_once_filing_is_due_and_recheck_has_passed(tmp_path, provider):
+    clock = Clock()
+    store = make_store(tmp_path, provider, clock, ttl=timedelta(days=1000), filing_lag=timedelta(days=60),
+                       recheck=timedelta(days=1))
+    store.statement('AAA', 'financials')
+    # The 2024 annual filing is due 365 + 60 days after 2023-12-31.
+    due = datetime(2023, 12, 31, tzinfo=timezone.utc) + timedelta(days=425)
+    clock.now = due - timedelta(hours=1)
+    store.statement('AAA', 'financials')
+    assert len(provider.calls) == 1
+    clock.now = due
+    store.statement('AAA', 'financials')
+    assert len(provider.calls) == 2
+    # The new period has not shown up yet: asked again only once per recheck.
+    clock.now += timedelta(hours=12)
+    store.statement('AAA', 'financials')
+    assert len(provider.calls) == 2
+    clock.now += timedelta(hours=13)
+    store.statement('AAA', 'financials')
+    assert len(provider.calls) == 3
+
+
+def test_empty_fetch_keeps_the_old_snapshot(tmp_path, provider):
+    clock = Clock()
+    store = make_store(tmp_path, provider, clock, ttl=timedelta(days=30))
+    stored = store.statement('AAA', 'financials')
+    provider.statements.clear()
+    clock.now += timedelta(days=31)
+    again = store.statement('AAA', 'financials')
+    assert len(provider.calls) == 2
+    pd.testing.assert_frame_equal(again, stored, check_freq=False)
+    clock.now += timedelta(days=20)
+    store.statement('AAA', 'financials')
+    assert len(provider.calls) == 2  # the failed refresh counts as a fetch
+
+
+def test_offline_never_calls_the_provider(tmp_path, provider):
+    clock = Clock()
+    make_store(tmp_path, provider, clock).statement('AAA', 'financials')
+    provider.calls.clear()
+    clock.now += timedelta(days=1000)
+    store = make_store(tmp_path, provider, clock, offline=True)
+    assert store.statement('AAA', 'financials').shape == (1, 2)
+    assert store.statement('BBB', 'financials').empty
+    assert store.constituents() == []
+    assert provider.calls == []
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+
+from finance_scripts.mt5bot.indicators import COLUMNS, IndicatorState
+
+
+def make_bars(n, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 4000.0 + np.cumsum(rng.normal(0.0, 5.0, n))
+    high = close + rng.uniform(0.0, 5.0, n)
+    low = close - rng.uniform(0.0, 5.0, n)
+    return high, low, close
+
+
+def test_updates_after_warm_up_match_a_full_recompute():
+    n, m = 1500, 700  # m crosses the CCI buffer compaction at 2 * cci_period bars
+    high, low, close = make_bars(n + m)
+    incremental = IndicatorState(adx_period=21, cci_period=1000)
+    incremental.warm_up(high[:n], low[:n], close[:n])
+    fed = {name: [] for name in COLUMNS}
+    for bar in zip(high[n:], low[n:], close[n:]):
+        for name, value in incremental.update(*bar).items():
+            fed[name].append(value)
+
+    full = IndicatorState(adx_period=21, cci_period=1000).warm_up(high, low, close)
+    for name in ('ADX', '+DI', '-DI', 'Royal_Scalping'):
+        np.testing.assert_array_equal(fed[name], full[name][n:], err_msg=name)
+    np.testing.assert_allclose(fed['CCI'], full['CCI'][n:], rtol=0, atol=1e-12)
+    np.testing.assert_allclose([incremental.previous[name] for name in COLUMNS],
+                               [full[name][-2] for name in COLUMNS], rtol=0, atol=1e-12)
+
+
+def test_cci_matches_its_definition():
+    high, low, close = make_bars(1300)
+    values = IndicatorState(cci_period=1000).warm_up(high, low, close)['CCI']
+    typical = pd.Series((high + low + close) / 3.0)
+    mean = typical.rolling(1000).mean()
+    mean_deviation = typical.rolling(1000).apply(lambda window: np.abs(window - window.mean()).mean(), raw=True)
+    expected = ((typical - mean) / (0.015 * mean_deviation)).to_numpy()
+    assert np.isnan(values[:999]).all()
+    np.testing.assert_allclose(values[999:], expected[999:], rtol=1e-12)
@@ -0,0 +1,71 @@
+from collections import Counter
+import time
+
+from finance_scripts.data.pipeline import DONE, FAILURE, RESULT, FetchPipeline, RateLimited
+
+
+def run(pipeline, items):
+    return list(pipeline.start(items))
+
+
+def test_failing_item_is_retried_retries_times_after_the_first_attempt():
+    attempts = Counter()
+
+    def fetch(item):
+        attempts[item] += 1
+        if item == 'bad':
+            raise OSError("unreachable")
+        return item.upper()
+
+    pipeline = FetchPipeline(fetch, retries=3, backoff=0.001)
+    events = run(pipeline, ['a', 'bad', 'b'])
+
+    assert attempts == {'a': 1, 'b': 1, 'bad': 4}
+    assert {event.item: event.value for event in events if event.kind == RESULT} == {'a': 'A', 'b': 'B'}
+    assert [event.item for event in events if event.kind == FAILURE] == ['bad']
+    assert events[-1].kind == DONE and pipeline.failed == ['bad']
+
+
+def test_transient_error_recovers_within_its_retries():
+    attempts = Counter()
+
+    def fetch(item):
+        attempts[item] += 1
+        if attempts[item] <= 3:
+            raise OSError("flaky")
+        return item
+
+    events = run(FetchPipeline(fetch, retries=3, backoff=0.001), ['a'])
+    assert [event.kind for event in events] == [RESULT, DONE]
+
+
+def test_rate_limits_do_not_spend_retries():
+    attempts = Counter()
+
+    def fetch(item):
+        attempts[item] += 1
+        if attempts[item] <= 2:
+            raise RateLimited("429")
+        return item
+
+    events = run(FetchPipeline(fetch, retries=0, backoff=0.001), ['a'])
+    assert [event.kind for event in events] == [RESULT, DONE]
+
+
+def test_cancel_waits_for_calls_in_flight_only():
+    def fetch(item):
+        time.sleep(0.05)
+        return item
+
+    pipeline = FetchPipeline(fetch, initial_workers=2, max_workers=2).start(range(20))
+    first = pipeline.events.get()
+    start = time.perf_counter()
+    pipeline.cancel()
+    events = [first]
+    while events[-1].kind != DONE:
+        events.append(pipeline.events.get())
+    assert time.perf_counter() - start < 3 * 0.05  # one fetch, plus scheduling slack
+    assert events[-1].value is True
+    finished = {event.item for event in events if event.kind == RESULT}
+    assert finished.isdisjoint(pipeline.unfinished)
+    assert len(finished) + len(pipeline.unfinished) == 20
@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+
+from finance_scripts.data.prices import OVERLAP, FrameSource, PriceStore, fetch_data
+
+
+def make_source():
+    dates = pd.bdate_range('2020-01-01', '2023-12-31')
+    return FrameSource(pd.DataFrame({'A': 100.0 + np.arange(len(dates), dtype=float)}, index=dates))
+
+
+def test_refresh_after_the_coverage_fetches_the_gap(tmp_path):
+    source = make_source()
+    store = PriceStore(str(tmp_path), source)
+    fetch_data(['A'], '2020-01-01', '2021-01-01', store=store)
+    fetch_data(['A'], '2022-01-01', '2023-01-01', store=store)
+
+    assert source.calls[-1][1:] == (np.datetime64('2021-01-01') - OVERLAP, np.datetime64('2023-01-01'))
+    assert store.missing('A', '2021-01-01', '2022-01-01') == []
+    data = fetch_data(['A'], '2020-01-01', '2023-01-01', store=store)
+    assert len(data) == 783
+    assert len(data.loc['2021']) == 261
+    assert len(source.calls) == 2
+
+
+def test_refresh_before_the_coverage_fetches_the_gap(tmp_path):
+    source = make_source()
+    store = PriceStore(str(tmp_path), source)
+    fetch_data(['A'], '2022-01-01', '2023-01-01', store=store)
+    fetch_data(['A'], '2020-01-01', '2021-01-01', store=store)
+
+    assert source.calls[-1][1:] == (np.datetime64('2020-01-01'), np.datetime64('2022-01-01') + OVERLAP)
+    assert store.coverage('A') == (np.datetime64('2020-01-01'), np.datetime64('2023-01-01'))
+    assert len(store.load(['A'], '2020-01-01', '2023-01-01')) == 783
+
+
+def test_covered_range_is_served_from_disk(tmp_path):
+    source = make_source()
+    store = PriceStore(str(tmp_path), source)
+    first = fetch_data(['A'], '2020-01-01', '2022-01-01', store=store)
+    again = fetch_data(['A'], '2020-06-01', '2021-06-01', store=store)
+
+    assert len(source.calls) == 1
+    pd.testing.assert_frame_equal(again, first.loc['2020-06-01':'2021-05-31'])
+
+
+def test_readjusted_history_is_fetched_again(tmp_path):
+    source = make_source()
+    store = PriceStore(str(tmp_path), source)
+    fetch_data(['A'], '2020-01-01', '2022-01-01', store=store)
+
+    # A 2-for-1 split on 2022-06-01: the source now reports every earlier close halved.
+    # Closes from the split on are half the old quote anyway, so the whole series halves.
+    prices = source.prices / 2.0
+    source.prices = prices
+    data = fetch_data(['A'], '2020-01-01', '2023-01-01', store=store)
+
+    returns = data['A'].pct_change().dropna()
+    assert returns.abs().max() < 0.02
+    assert source.calls[-1][1:] == (np.datetime64('2020-01-01'), np.datetime64('2023-01-01'))
+    np.testing.assert_array_equal(data['A'].to_numpy(), prices.loc[:'2022-12-31', 'A'].to_numpy())
+    assert store.coverage('A') == (np.datetime64('2020-01-01'), np.datetime64('2023-01-01'))
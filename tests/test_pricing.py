@@ -0,0 +1,29 @@
+import numpy as np
+
+from finance_scripts.options.pricing import black_scholes, black_scholes_greeks
+
+
+def test_matches_the_closed_form():
+    valuation = black_scholes_greeks(100.0, 105.0, 0.5, 0.03, 0.2)
+    assert np.isclose(valuation.call, 4.1783, atol=1e-4)
+    assert np.isclose(valuation.call - valuation.put, 100.0 - 105.0 * np.exp(-0.03 * 0.5))
+
+
+def test_degenerate_contracts_are_worth_discounted_intrinsic_value():
+    S = np.array([90.0, 110.0, 90.0, 110.0])
+    T = np.array([0.0, 0.0, 1.0, 1.0])
+    sigma = np.array([0.2, 0.2, 0.0, 0.0])
+    valuation = black_scholes_greeks(S, 100.0, T, 0.0, sigma)
+    np.testing.assert_allclose(valuation.call, [0.0, 10.0, 0.0, 10.0])
+    np.testing.assert_allclose(valuation.put, [10.0, 0.0, 10.0, 0.0])
+    np.testing.assert_allclose(valuation.delta, [0.0, 1.0, 0.0, 1.0])
+
+
+def test_degenerate_contracts_at_the_money_forward_are_finite():
+    # T = 0 at the money, and sigma = 0 with the strike exactly on the forward (r = 0).
+    for T, sigma in ((0.0, 0.2), (1.0, 0.0)):
+        for option_type in ('call', 'put'):
+            valuation = black_scholes_greeks(100.0, 100.0, T, 0.0, sigma, option_type=option_type)
+            assert all(np.all(np.isfinite(field)) for field in valuation), (T, sigma, option_type)
+            assert valuation.price == 0.0
+            assert black_scholes(100.0, 100.0, T, 0.0, sigma, option_type=option_type) == 0.0
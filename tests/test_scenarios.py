@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from finance_scripts.options.scenarios import BYTES_PER_ELEMENT, _blocks, revalue_book
+
+
+def make_book(n=7, seed=0):
+    rng = np.random.default_rng(seed)
+    return dict(S=rng.uniform(80, 120, n), K=rng.uniform(80, 120, n), T=rng.uniform(0.1, 2.0, n), r=0.02,
+                sigma=rng.uniform(0.1, 0.4, n), option_type=rng.choice(['call', 'put'], n),
+                quantity=rng.integers(-5, 6, n))
+
+
+SHOCKS = dict(spot_shocks=np.linspace(-0.2, 0.2, 5), vol_shocks=np.linspace(-0.05, 0.1, 6),
+              time_shocks=np.array([0.0, 0.05, 0.1, 0.25]))
+
+
+@pytest.mark.parametrize('elements', [1, 3, 5, 24, 100, 10_000])
+def test_blocks_fit_the_memory_limit_and_cover_the_grid(elements):
+    shape = (7, 5, 6, 4)
+    covered = np.zeros(shape, dtype=int)
+    for block in _blocks(*shape, elements * BYTES_PER_ELEMENT):
+        size = np.prod([len(range(*axis.indices(n))) for axis, n in zip(block, shape)])
+        assert size <= elements
+        covered[block] += 1
+    assert (covered == 1).all()
+
+
+def test_small_memory_limit_gives_the_same_result():
+    book = make_book()
+    whole = revalue_book(**book, **SHOCKS)
+    # Less than one position's 6 x 4 vol x time grid per block.
+    split = revalue_book(**book, **SHOCKS, memory_limit=5 * BYTES_PER_ELEMENT)
+    for name in ('pnl', 'delta', 'gamma', 'vega', 'theta', 'rho'):
+        np.testing.assert_allclose(getattr(split, name), getattr(whole, name), rtol=1e-12, atol=1e-12)
+
+
+def test_memory_limit_below_one_element_is_rejected():
+    with pytest.raises(ValueError):
+        revalue_book(**make_book(), **SHOCKS, memory_limit=BYTES_PER_ELEMENT - 1)
@@ -0,0 +1,153 @@
+import asyncio
+from datetime import datetime, timezone
+
+from typing import NamedTuple
+
+import numpy as np
+
+from finance_scripts.mt5bot.scheduler import (BarCloseScheduler, FakeClock, InlineExecutor, next_boundary,
+                                              server_offset, timeframe_seconds)
+
+M5, H1, D1, W1 = 5, 0x4000 | 1, 0x4000 | 24, 0x8000 | 1
+START = datetime(2024, 3, 6, 13, 20, 30, tzinfo=timezone.utc).timestamp()  # a Wednesday
+
+
+def utc(timestamp):
+    return datetime.fromtimestamp(timestamp, timezone.utc)
+
+
+class StubMT5:
+    """Newest bar of any symbol: the one forming ``delay`` seconds ago, stamped in server time.
+
+    The server clock runs ``offset`` seconds ahead of the UTC clock.
+    """
+
+    def __init__(self, clock, delay=0.0, offset=0):
+        self.clock = clock
+        self.delay = delay
+        self.offset = offset
+
+    def server_now(self):
+        return self.clock.time() + self.offset
+
+    def copy_rates_from_pos(self, symbol, timeframe, start_pos, count):
+        rates = np.zeros(1, dtype=[('time', '<i8')])
+        rates['time'] = next_boundary(timeframe, self.server_now() - self.delay) - timeframe_seconds(timeframe)
+        return rates
+
+    def symbol_info_tick(self, symbol):
+        return Tick(time=int(self.server_now()) - 3)
+
+
+class Tick(NamedTuple):
+    time: int
+
+
+def make_scheduler(delay=0.0, offset=0, **options):
+    clock = FakeClock(start=START)
+    mt = StubMT5(clock, delay, offset)
+    scheduler = BarCloseScheduler(mt, clock=clock, executor=InlineExecutor(), **options)
+    return clock, scheduler
+
+
+def test_boundaries_are_aligned_to_bar_opens():
+    assert utc(next_boundary(H1, START)) == datetime(2024, 3, 6, 14, tzinfo=timezone.utc)
+    assert utc(next_boundary(D1, START)) == datetime(2024, 3, 7, tzinfo=timezone.utc)
+    assert utc(next_boundary(W1, START)) == datetime(2024, 3, 10, tzinfo=timezone.utc)  # Sunday
+    assert utc(next_boundary(W1, next_boundary(W1, START))) == datetime(2024, 3, 17, tzinfo=timezone.utc)
+    assert next_boundary(H1, next_boundary(H1, START)) - next_boundary(H1, START) == 3600
+
+
+def test_each_closed_bar_runs_each_strategy_once():
+    clock, scheduler = make_scheduler(delay=0.2)
+    calls = []
+    scheduler.add('SP500', H1, lambda symbol, timeframe, bar_time: calls.append((bar_time, clock.time())))
+    asyncio.run(scheduler.run(cycles=3))
+
+    first = next_boundary(H1, START)
+    assert [bar_time for bar_time, _ in calls] == [first - 3600, first, first + 3600]
+    for bar_time, ran_at in calls:
+        assert bar_time + 3600 + 0.2 <= ran_at < bar_time + 3600 + 0.2 + scheduler.poll_interval + 1e-6
+    assert len(scheduler.latencies['SP500', H1]) == 3
+
+
+def test_pairs_and_strategies_run_concurrently():
+    clock, scheduler = make_scheduler()
+    running, overlap, calls = set(), [], []
+
+    def strategy(name):
+        async def run(symbol, timeframe, bar_time):
+            running.add(name)
+            overlap.append(len(running))
+            await clock.sleep(1.0)
+            running.discard(name)
+            calls.append((name, symbol, timeframe, bar_time))
+        return run
+
+    scheduler.add('SP500', H1, strategy('a'))
+    scheduler.add('SP500', H1, strategy('b'))
+    scheduler.add('EURUSD', H1, strategy('c'))
+    scheduler.add('EURUSD', M5, strategy('d'))
+    asyncio.run(scheduler.run(cycles=2))
+
+    assert max(overlap) == 3  # at 14:00 a, b and c are inside their one-second sleep together
+    assert sorted(name for name, *_ in calls) == ['a', 'a', 'b', 'b', 'c', 'c', 'd', 'd']
+    first = next_boundary(M5, START)
+    assert [bar_time for name, _, _, bar_time in calls if name == 'd'] == [first - 300, first]
+
+
+def test_failing_strategy_is_reported_and_the_pair_keeps_running():
+    errors = []
+    clock, scheduler = make_scheduler(on_error=lambda *args: errors.append(args))
+    calls = []
+
+    def broken(symbol, timeframe, bar_time):
+        raise RuntimeError("broker gone")
+
+    scheduler.add('SP500', H1, broken)
+    scheduler.add('SP500', H1, lambda *args: calls.append(args))
+    asyncio.run(scheduler.run(cycles=2))
+
+    assert scheduler.failures['SP500', H1] == 2
+    assert [(symbol, timeframe, str(e)) for symbol, timeframe, _, e in errors] == [('SP500', H1, "broker gone")] * 2
+    assert len(calls) == 2
+
+
+def test_boundary_without_a_new_bar_is_skipped():
+    clock, scheduler = make_scheduler(delay=120.0, max_wait=60.0)
+    calls = []
+    scheduler.add('SP500', H1, lambda *args: calls.append(args))
+    asyncio.run(scheduler.run(cycles=2))
+    assert calls == []
+
+
+def test_boundaries_follow_the_broker_server_clock():
+    offset = 3 * 3600  # GMT+3
+    clock, scheduler = make_scheduler(delay=0.2, offset=offset)
+    scheduler.server_offset = server_offset(scheduler.mt, 'SP500', now=clock.time())
+    assert scheduler.server_offset == offset
+    calls = []
+
+    def strategy(symbol, timeframe, bar_time):
+        newest = scheduler.mt.copy_rates_from_pos(symbol, timeframe, 0, 1)['time'][-1]
+        calls.append((bar_time, newest, scheduler.mt.server_now()))
+
+    scheduler.add('SP500', H1, strategy)
+    scheduler.add('SP500', D1, strategy)
+    asyncio.run(scheduler.run(cycles=2))
+
+    first_hour = next_boundary(H1, START + offset)
+    assert [bar_time for bar_time, _, _ in calls[:2]] == [first_hour - 3600, first_hour]
+    for bar_time, newest, server_now in calls:
+        period = newest - bar_time
+        assert period in (3600, 86400)
+        assert server_now >= newest + 0.2  # the new bar had opened when the strategy ran
+    assert utc(calls[-1][0]) == datetime(2024, 3, 7, tzinfo=timezone.utc)  # D1 in server days
+
+
+def test_without_the_offset_the_closed_bar_passes_for_the_new_one():
+    clock, scheduler = make_scheduler(delay=0.2, offset=2 * 3600)
+    calls = []
+    scheduler.add('SP500', H1, lambda symbol, timeframe, bar_time: calls.append(clock.time()))
+    asyncio.run(scheduler.run(cycles=1))
+    assert calls == [next_boundary(H1, START)]  # ran at the UTC boundary, 0.2 s before the bar opened